@@ -0,0 +1,4 @@
+"""
+核心功能模块（不依赖 PyQt6）
+数据集、实验等后台逻辑，按需导入具体子模块
+"""
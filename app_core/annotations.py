@@ -0,0 +1,477 @@
+"""
+标注解析与索引
+流式解析 COCO（增量 JSON）、Pascal VOC（进程池解析 XML）、YOLO（txt），
+生成按图片组织的紧凑索引，保存在 .deeplocal/annotations/ 下（与数据集清单相邻）
+
+索引结构（CSR）：
+    image:        图片相对路径（升序，可二分查找）
+    width/height: 图片尺寸（未知为 0）
+    offsets:      第 i 张图片的标注为 [offsets[i], offsets[i+1])
+    class_id:     每个标注的类别编号
+    bbox:         每个标注的框 (x, y, w, h)，YOLO 无图片尺寸时为归一化坐标
+    source*:      标注来源文件及其 mtime/size，用于增量重建
+"""
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+import json
+import os
+import xml.etree.ElementTree as ET
+
+import numpy as np
+
+from app_core.manifest import DatasetManifest, meta_dir, save_array
+
+
+ANNOTATIONS_DIR = "annotations"
+INDEX_FILE = "index.json"
+FORMATS = ("coco", "voc", "yolo")
+
+_ARRAYS = ("image", "width", "height", "offsets", "class_id", "bbox",
+           "source", "source_mtime", "source_size")
+
+
+class AnnotationIndex:
+    """按图片组织的标注索引"""
+
+    def __init__(self, root: Path, arrays: Dict[str, np.ndarray], classes: List[str], meta: Optional[dict] = None):
+        self.root = Path(root)
+        self.arrays = arrays
+        self.classes = list(classes)
+        self.meta = meta or {}
+
+    def __len__(self):
+        return len(self.arrays["image"])
+
+    @property
+    def images(self) -> np.ndarray:
+        return self.arrays["image"]
+
+    @property
+    def annotation_count(self) -> int:
+        return len(self.arrays["class_id"])
+
+    def find(self, image_path: str) -> int:
+        """二分查找图片所在行，不存在返回 -1"""
+        images = self.arrays["image"]
+        i = int(np.searchsorted(images, image_path))
+        if i < len(images) and images[i] == image_path:
+            return i
+        return -1
+
+    def lookup(self, image_path: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """查询单张图片的 (类别编号, 框)"""
+        i = self.find(image_path)
+        if i < 0:
+            return None
+        start, end = self.arrays["offsets"][i], self.arrays["offsets"][i + 1]
+        return self.arrays["class_id"][start:end], self.arrays["bbox"][start:end]
+
+    def class_histogram(self) -> Dict[str, int]:
+        """每个类别的标注数量"""
+        counts = np.bincount(self.arrays["class_id"], minlength=len(self.classes))
+        return {name: int(c) for name, c in zip(self.classes, counts)}
+
+    def image_histogram(self) -> Dict[str, int]:
+        """每个类别出现的图片数量"""
+        offsets = np.asarray(self.arrays["offsets"])
+        rows = np.repeat(np.arange(len(self)), np.diff(offsets))
+        pairs = np.unique(rows.astype(np.int64) * max(len(self.classes), 1) + self.arrays["class_id"])
+        counts = np.bincount(pairs % max(len(self.classes), 1), minlength=len(self.classes))
+        return {name: int(c) for name, c in zip(self.classes, counts)}
+
+    def save(self):
+        index_dir = meta_dir(self.root) / ANNOTATIONS_DIR
+        index_dir.mkdir(parents=True, exist_ok=True)
+        for name in _ARRAYS:
+            save_array(index_dir / f"{name}.npy", self.arrays[name])
+        meta = dict(self.meta)
+        meta.update({
+            "classes": self.classes,
+            "images": len(self),
+            "annotations": self.annotation_count,
+            "updated_at": datetime.now().isoformat()
+        })
+        with open(index_dir / INDEX_FILE, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        self.meta = meta
+        print(f"[操作] 保存标注索引: {index_dir}, 图片={len(self)}, 标注={self.annotation_count}")
+
+    @classmethod
+    def load(cls, root: Path, mmap: bool = True):
+        index_dir = meta_dir(root) / ANNOTATIONS_DIR
+        index_file = index_dir / INDEX_FILE
+        if not index_file.exists():
+            print(f"[操作] 加载标注索引失败: 文件不存在 {index_file}")
+            return None
+        with open(index_file, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        mmap_mode = "r" if mmap else None
+        arrays = {name: np.load(index_dir / f"{name}.npy", mmap_mode=mmap_mode) for name in _ARRAYS}
+        return cls(root, arrays, meta.get("classes", []), meta)
+
+
+def build_index(root: Path, fmt: str, **kwargs) -> AnnotationIndex:
+    """按格式构建标注索引并保存"""
+    builders = {"coco": build_coco_index, "voc": build_voc_index, "yolo": build_yolo_index}
+    if fmt not in builders:
+        raise ValueError(f"不支持的标注格式: {fmt}，可选 {FORMATS}")
+    return builders[fmt](root, **kwargs)
+
+
+# ---------------------------------------------------------------- COCO
+
+
+class _JsonStream:
+    """按块读取 JSON 文本，逐个解码值，内存只保留当前块"""
+
+    def __init__(self, f, chunk_size: int = 1 << 20):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """跳过空白并返回下一个字符，结束返回空串"""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._fill():
+                return ""
+
+    def take(self, expected: str):
+        ch = self.peek()
+        if not ch or ch not in expected:
+            raise ValueError(f"JSON 格式错误: 期望 {expected!r}，实际 {ch!r}")
+        self.pos += 1
+        return ch
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                obj, end = self.decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self._fill():
+                    continue
+                raise
+            # 数字可能在块边界被截断，补读后重新解码
+            if end == len(self.buf) and self._fill():
+                continue
+            self.pos = end
+            return obj
+
+
+def iter_coco(json_file: Path, sections=("images", "annotations", "categories")) -> Iterator[Tuple[str, dict]]:
+    """流式遍历 COCO 文件，产出 (段名, 元素)，其余顶层字段直接跳过"""
+    with open(json_file, "r", encoding="utf-8") as f:
+        stream = _JsonStream(f)
+        stream.take("{")
+        if stream.peek() == "}":
+            return
+        while True:
+            key = stream.value()
+            stream.take(":")
+            if key in sections and stream.peek() == "[":
+                stream.take("[")
+                if stream.peek() == "]":
+                    stream.take("]")
+                else:
+                    while True:
+                        yield key, stream.value()
+                        if stream.take(",]") == "]":
+                            break
+            else:
+                stream.value()
+            if stream.take(",}") == "}":
+                break
+
+
+def build_coco_index(root: Path, json_file: Path, image_dir: str = "", force: bool = False) -> AnnotationIndex:
+    """
+    从 COCO JSON 构建索引
+
+    Args:
+        root: 数据集根目录
+        json_file: COCO 标注文件
+        image_dir: 图片相对数据集根目录的前缀
+        force: 标注文件未变化时默认直接复用已有索引
+    """
+    root = Path(root)
+    json_file = Path(json_file)
+    stat = json_file.stat()
+    source = _relative(json_file, root)
+    previous = None if force else AnnotationIndex.load(root)
+    if previous is not None and previous.meta.get("format") == "coco" and previous.meta.get("source") == {
+        "path": source, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "image_dir": image_dir
+    }:
+        print(f"[操作] 标注未变化，复用索引: {json_file}")
+        return previous
+
+    print(f"[操作] 解析 COCO 标注: {json_file}")
+    image_ids, widths, heights = array("q"), array("i"), array("i")
+    file_names: List[str] = []
+    ann_image, ann_cat, ann_bbox = array("q"), array("q"), array("f")
+    categories: Dict[int, str] = {}
+    for section, item in iter_coco(json_file):
+        if section == "annotations":
+            ann_image.append(item["image_id"])
+            ann_cat.append(item["category_id"])
+            ann_bbox.extend(item.get("bbox") or (0.0, 0.0, 0.0, 0.0))
+        elif section == "images":
+            image_ids.append(item["id"])
+            widths.append(item.get("width", 0))
+            heights.append(item.get("height", 0))
+            file_names.append(_join(image_dir, item["file_name"]))
+        else:
+            categories[item["id"]] = item["name"]
+
+    image_ids = np.frombuffer(image_ids, dtype=np.int64)
+    names = np.array(file_names, dtype=str)
+    name_order = np.argsort(names, kind="stable")
+    rank = np.empty(len(names), dtype=np.int64)
+    rank[name_order] = np.arange(len(names))
+
+    ann_image = np.frombuffer(ann_image, dtype=np.int64)
+    ann_cat = np.frombuffer(ann_cat, dtype=np.int64)
+    ann_bbox = np.frombuffer(ann_bbox, dtype=np.float32).reshape(-1, 4)
+
+    # 标注的 image_id / category_id 映射到行号与类别编号
+    id_order = np.argsort(image_ids, kind="stable")
+    sorted_ids = image_ids[id_order]
+    pos = np.minimum(np.searchsorted(sorted_ids, ann_image), max(len(sorted_ids) - 1, 0))
+    cat_ids = np.array(sorted(categories), dtype=np.int64)
+    cat_pos = np.minimum(np.searchsorted(cat_ids, ann_cat), max(len(cat_ids) - 1, 0))
+    valid = np.ones(len(ann_image), dtype=bool)
+    if len(sorted_ids):
+        valid &= sorted_ids[pos] == ann_image
+    else:
+        valid[:] = False
+    if len(cat_ids):
+        valid &= cat_ids[cat_pos] == ann_cat
+    else:
+        valid[:] = False
+    dropped = int((~valid).sum())
+    if dropped:
+        print(f"[警告] 忽略 {dropped} 个无效标注（图片或类别不存在）")
+
+    rows = rank[id_order[pos[valid]]] if len(sorted_ids) else np.empty(0, dtype=np.int64)
+    ann_order = np.argsort(rows, kind="stable")
+    arrays = {
+        "image": names[name_order],
+        "width": np.frombuffer(widths, dtype=np.int32)[name_order],
+        "height": np.frombuffer(heights, dtype=np.int32)[name_order],
+        "offsets": _offsets(rows, len(names)),
+        "class_id": cat_pos[valid][ann_order].astype(np.int32),
+        "bbox": ann_bbox[valid][ann_order],
+        "source": np.full(len(names), source),
+        "source_mtime": np.full(len(names), stat.st_mtime_ns, dtype=np.int64),
+        "source_size": np.full(len(names), stat.st_size, dtype=np.int64)
+    }
+    meta = {
+        "format": "coco",
+        "normalized": False,
+        "source": {"path": source, "mtime_ns": stat.st_mtime_ns, "size": stat.st_size, "image_dir": image_dir}
+    }
+    index = AnnotationIndex(root, arrays, [categories[c] for c in cat_ids], meta)
+    index.save()
+    return index
+
+
+# ---------------------------------------------------------------- VOC / YOLO
+
+
+def parse_voc_file(xml_file: str) -> Tuple[str, int, int, List[str], List[Tuple[float, float, float, float]]]:
+    """解析单个 VOC XML，返回 (文件名, 宽, 高, 类别名列表, xywh 框列表)"""
+    tree = ET.parse(xml_file)
+    node = tree.getroot()
+    filename = node.findtext("filename", "")
+    width = int(float(node.findtext("size/width", "0") or 0))
+    height = int(float(node.findtext("size/height", "0") or 0))
+    names, boxes = [], []
+    for obj in node.iter("object"):
+        box = obj.find("bndbox")
+        if box is None:
+            continue
+        x1, y1, x2, y2 = (float(box.findtext(k, "0")) for k in ("xmin", "ymin", "xmax", "ymax"))
+        names.append(obj.findtext("name", "").strip())
+        boxes.append((x1, y1, x2 - x1, y2 - y1))
+    return filename, width, height, names, boxes
+
+
+def parse_yolo_file(txt_file: str) -> Tuple[np.ndarray, np.ndarray]:
+    """解析单个 YOLO txt，返回 (类别编号, 归一化 xywh 框，左上角坐标)"""
+    with open(txt_file, "r", encoding="utf-8") as f:
+        values = np.array(f.read().split(), dtype=np.float32)
+    if len(values) == 0:
+        return np.empty(0, dtype=np.int32), np.empty((0, 4), dtype=np.float32)
+    rows = values[: len(values) // 5 * 5].reshape(-1, 5)
+    boxes = rows[:, 1:5].copy()
+    boxes[:, 0] -= boxes[:, 2] / 2
+    boxes[:, 1] -= boxes[:, 3] / 2
+    return rows[:, 0].astype(np.int32), boxes
+
+
+def build_voc_index(root: Path, annotation_dir: str = "Annotations", image_dir: str = "JPEGImages",
+                    workers: Optional[int] = None, force: bool = False) -> AnnotationIndex:
+    """从 Pascal VOC XML 构建索引，只重新解析有变化的文件"""
+    root = Path(root)
+    sources = _list_files(root / annotation_dir, ".xml", root)
+    print(f"[操作] 解析 VOC 标注: {root / annotation_dir}, 文件数={len(sources)}")
+
+    def parse_all(paths: List[str]):
+        files = [str(root / p) for p in paths]
+        if len(files) < 64:
+            return [parse_voc_file(f) for f in files]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            return list(pool.map(parse_voc_file, files, chunksize=256))
+
+    def to_record(source: str, parsed):
+        filename, width, height, names, boxes = parsed
+        image = _join(image_dir, filename) if filename else Path(source).with_suffix(".jpg").as_posix()
+        return image, width, height, names, np.array(boxes, dtype=np.float32).reshape(-1, 4)
+
+    return _build_incremental(root, "voc", sources, parse_all, to_record, force=force,
+                              extra_meta={"annotation_dir": annotation_dir, "image_dir": image_dir})
+
+
+def build_yolo_index(root: Path, classes: Optional[List[str]] = None, force: bool = False) -> AnnotationIndex:
+    """
+    从 YOLO txt 构建索引，只重新解析有变化的文件
+
+    图片列表取自数据集清单，标注文件为 images/ 换成 labels/ 的同名 .txt，找不到则取同目录同名 .txt；
+    类别名取自参数或根目录下的 classes.txt
+    """
+    root = Path(root)
+    manifest = DatasetManifest.load(root) or DatasetManifest.scan(root, classified=False)
+    if classes is None:
+        classes_file = root / "classes.txt"
+        if classes_file.exists():
+            with open(classes_file, "r", encoding="utf-8") as f:
+                classes = [line.strip() for line in f if line.strip()]
+    classes = classes or []
+
+    label_of = {}
+    for image in manifest.paths:
+        image = str(image)
+        for candidate in _yolo_label_candidates(image):
+            if (root / candidate).exists():
+                label_of[candidate] = image
+                break
+    sources = sorted(label_of)
+    print(f"[操作] 解析 YOLO 标注: {root}, 文件数={len(sources)}")
+
+    def parse_all(paths: List[str]):
+        return [parse_yolo_file(str(root / p)) for p in paths]
+
+    def to_record(source: str, parsed):
+        ids, boxes = parsed
+        names = [classes[i] if i < len(classes) else f"class_{i}" for i in ids.tolist()]
+        return label_of[source], 0, 0, names, boxes
+
+    return _build_incremental(root, "yolo", sources, parse_all, to_record, force=force,
+                              extra_meta={"normalized": True})
+
+
+def _build_incremental(root: Path, fmt: str, sources: List[str], parse_all, to_record,
+                       force: bool = False, extra_meta: Optional[dict] = None) -> AnnotationIndex:
+    """按来源文件指纹复用旧索引中的行，仅解析新增或修改的文件"""
+    stats = {s: os.stat(root / s) for s in sources}
+    previous = None if force else AnnotationIndex.load(root, mmap=False)
+    reuse: Dict[str, int] = {}
+    if previous is not None and previous.meta.get("format") == fmt:
+        prev = previous.arrays
+        for i, (source, mtime, size) in enumerate(zip(prev["source"].tolist(), prev["source_mtime"].tolist(),
+                                                      prev["source_size"].tolist())):
+            st = stats.get(source)
+            if st is not None and st.st_mtime_ns == mtime and st.st_size == size:
+                reuse[source] = i
+    changed = [s for s in sources if s not in reuse]
+    print(f"[操作] 增量解析: 复用={len(reuse)}, 解析={len(changed)}")
+
+    records = []
+    for source, parsed in zip(changed, parse_all(changed)):
+        records.append((source,) + tuple(to_record(source, parsed)))
+    if reuse:
+        prev = previous.arrays
+        for source, i in reuse.items():
+            start, end = prev["offsets"][i], prev["offsets"][i + 1]
+            names = [previous.classes[c] for c in prev["class_id"][start:end].tolist()]
+            records.append((source, str(prev["image"][i]), int(prev["width"][i]), int(prev["height"][i]),
+                            names, prev["bbox"][start:end]))
+    records.sort(key=lambda r: r[1])
+
+    classes = sorted({name for r in records for name in r[4]})
+    class_ids = {name: i for i, name in enumerate(classes)}
+    counts = np.array([len(r[4]) for r in records], dtype=np.int64)
+    arrays = {
+        "image": np.array([r[1] for r in records], dtype=str),
+        "width": np.array([r[2] for r in records], dtype=np.int32),
+        "height": np.array([r[3] for r in records], dtype=np.int32),
+        "offsets": np.concatenate(([0], np.cumsum(counts))).astype(np.int64),
+        "class_id": np.array([class_ids[name] for r in records for name in r[4]], dtype=np.int32),
+        "bbox": (np.concatenate([r[5] for r in records]).astype(np.float32) if records
+                 else np.empty((0, 4), dtype=np.float32)),
+        "source": np.array([r[0] for r in records], dtype=str),
+        "source_mtime": np.array([stats[r[0]].st_mtime_ns for r in records], dtype=np.int64),
+        "source_size": np.array([stats[r[0]].st_size for r in records], dtype=np.int64)
+    }
+    meta = {"format": fmt, "normalized": False}
+    meta.update(extra_meta or {})
+    index = AnnotationIndex(root, arrays, classes, meta)
+    index.save()
+    return index
+
+
+def _yolo_label_candidates(image: str) -> List[str]:
+    parts = image.split("/")
+    stem = os.path.splitext(parts[-1])[0] + ".txt"
+    candidates = []
+    if "images" in parts[:-1]:
+        i = len(parts) - 2 - parts[-2::-1].index("images")
+        candidates.append("/".join(parts[:i] + ["labels"] + parts[i + 1:-1] + [stem]))
+    candidates.append("/".join(parts[:-1] + [stem]))
+    return candidates
+
+
+def _offsets(rows: np.ndarray, n: int) -> np.ndarray:
+    return np.concatenate(([0], np.cumsum(np.bincount(rows, minlength=n)))).astype(np.int64)
+
+
+def _list_files(directory: Path, suffix: str, root: Path) -> List[str]:
+    result = []
+    if not directory.exists():
+        return result
+    for dirpath, _, filenames in os.walk(directory):
+        for name in filenames:
+            if name.lower().endswith(suffix):
+                result.append(Path(dirpath, name).relative_to(root).as_posix())
+    return sorted(result)
+
+
+def _relative(path: Path, root: Path) -> str:
+    try:
+        return path.resolve().relative_to(root.resolve()).as_posix()
+    except ValueError:
+        return str(path)
+
+
+def _join(prefix: str, name: str) -> str:
+    return f"{prefix.rstrip('/')}/{name}" if prefix else name
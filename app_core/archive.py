@@ -0,0 +1,321 @@
+"""
+数据集 / 工作区 / 项目的导出与导入
+tar 流式写入，按块多线程 gzip 压缩（多个 gzip 成员拼接，标准 gzip 工具可直接解压），内存占用有上限；
+归档第一个成员为 export.json，记录导出类型、元信息与文件清单
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+import gzip
+import io
+import json
+import os
+import shutil
+import tarfile
+
+from app_core import disk_usage
+from utils.utils import generate_id
+
+
+EXPORT_FILE = "export.json"
+KINDS = ("dataset", "workspace", "project")
+BLOCK_SIZE = 4 << 20
+COPY_BUFFER = 1 << 20
+
+# (已处理字节数, 总字节数)
+ProgressCallback = Callable[[int, int], None]
+
+
+def scan_tree(root: Path, skip_hidden: bool = False) -> Dict[str, Tuple[int, int]]:
+    """列出目录下所有文件：相对路径 -> (size, mtime_ns)"""
+    root = Path(root)
+    result = {}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        with os.scandir(directory) as it:
+            for entry in it:
+                if skip_hidden and entry.name.startswith("."):
+                    continue
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(Path(entry.path))
+                elif entry.is_file(follow_symlinks=False):
+                    st = entry.stat(follow_symlinks=False)
+                    result[Path(entry.path).relative_to(root).as_posix()] = (st.st_size, st.st_mtime_ns)
+    return result
+
+
+def _gzip_block(data: bytes, level: int) -> bytes:
+    return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+class ParallelGzipWriter(io.RawIOBase):
+    """按块并行压缩的 gzip 写入器，最多 2 * workers 个块在途"""
+
+    def __init__(self, fileobj, level: int = 6, workers: Optional[int] = None, block_size: int = BLOCK_SIZE):
+        super().__init__()
+        self.fileobj = fileobj
+        self.level = level
+        self.block_size = block_size
+        workers = workers or os.cpu_count() or 1
+        self.max_pending = 2 * workers
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        self.pending = deque()
+        self.buf = bytearray()
+
+    def writable(self):
+        return True
+
+    def write(self, data) -> int:
+        self.buf += data
+        while len(self.buf) >= self.block_size:
+            self._submit(bytes(self.buf[:self.block_size]))
+            del self.buf[:self.block_size]
+        return len(data)
+
+    def _submit(self, block: bytes):
+        self.pending.append(self.pool.submit(_gzip_block, block, self.level))
+        while len(self.pending) > self.max_pending:
+            self.fileobj.write(self.pending.popleft().result())
+
+    def close(self):
+        if self.closed:
+            return
+        if self.buf:
+            self._submit(bytes(self.buf))
+            self.buf.clear()
+        while self.pending:
+            self.fileobj.write(self.pending.popleft().result())
+        self.pool.shutdown()
+        super().close()
+
+
+class _ProgressReader:
+    """读取文件时累计进度"""
+
+    def __init__(self, f, tracker: "_Progress"):
+        self.f = f
+        self.tracker = tracker
+
+    def read(self, size=-1):
+        data = self.f.read(size)
+        self.tracker.advance(len(data))
+        return data
+
+
+class _Progress:
+    def __init__(self, total: int, callback: Optional[ProgressCallback]):
+        self.total = total
+        self.done = 0
+        self.callback = callback
+
+    def advance(self, n: int):
+        self.done += n
+        if self.callback and n:
+            self.callback(self.done, self.total)
+
+
+def export_archive(
+    source: Path,
+    archive: Path,
+    kind: str,
+    meta: Optional[dict] = None,
+    skip: Optional[Dict[str, Tuple[int, int]]] = None,
+    progress: Optional[ProgressCallback] = None,
+    workers: Optional[int] = None,
+    level: int = 6
+) -> Path:
+    """
+    导出目录为 .tar.gz
+
+    Args:
+        source: 数据集 / 工作区 / 项目目录
+        archive: 输出文件路径
+        kind: dataset / workspace / project
+        meta: 写入 export.json 的元信息（如工作区的 to_dict）
+        skip: 接收端已有的文件清单（scan_tree 格式），大小和修改时间一致的文件不打包
+        progress: 进度回调
+        workers: 压缩线程数
+        level: gzip 压缩级别
+    """
+    if kind not in KINDS:
+        raise ValueError(f"不支持的导出类型: {kind}，可选 {KINDS}")
+    source = Path(source)
+    archive = Path(archive)
+    files = scan_tree(source)
+    skip = skip or {}
+    selected = {p: v for p, v in files.items() if skip.get(p) != v}
+    total = sum(size for size, _ in selected.values())
+    print(f"[操作] 导出{kind}: {source} -> {archive}, 文件={len(selected)}, 跳过={len(files) - len(selected)}, 字节={total}")
+
+    export_meta = {
+        "kind": kind,
+        "name": source.name,
+        "meta": meta or {},
+        "exported_at": datetime.now().isoformat(),
+        "bytes": total,
+        "files": {p: list(v) for p, v in files.items()}
+    }
+    archive.parent.mkdir(parents=True, exist_ok=True)
+    tracker = _Progress(total, progress)
+    tmp_archive = archive.with_name(archive.name + ".part")
+    with open(tmp_archive, "wb") as raw:
+        writer = ParallelGzipWriter(raw, level=level, workers=workers)
+        with tarfile.open(fileobj=writer, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+            data = json.dumps(export_meta, ensure_ascii=False).encode("utf-8")
+            info = tarfile.TarInfo(EXPORT_FILE)
+            info.size = len(data)
+            info.mtime = int(datetime.now().timestamp())
+            tar.addfile(info, io.BytesIO(data))
+            for rel in sorted(selected):
+                path = source / rel
+                info = tar.gettarinfo(str(path), arcname=f"data/{rel}")
+                with open(path, "rb") as f:
+                    tar.addfile(info, _ProgressReader(f, tracker))
+        writer.close()
+    os.replace(tmp_archive, archive)
+    disk_usage.notify(archive)
+    print(f"[操作] 导出完成: {archive}, 大小={archive.stat().st_size}")
+    return archive
+
+
+def read_export_meta(archive: Path) -> dict:
+    """只读取归档开头的 export.json"""
+    with gzip.open(archive, "rb") as gz, tarfile.open(fileobj=gz, mode="r|") as tar:
+        member = tar.next()
+        if member is None or member.name != EXPORT_FILE:
+            raise ValueError(f"无效的导出文件: {archive}")
+        return json.loads(tar.extractfile(member).read().decode("utf-8"))
+
+
+def import_archive(
+    archive: Path,
+    target: Path,
+    progress: Optional[ProgressCallback] = None
+) -> Path:
+    """
+    流式导入归档
+
+    Args:
+        archive: export_archive 生成的文件
+        target: 按类型解释——
+            project: 项目根目录（project_dir），在其下新建项目文件夹
+            workspace: 目标项目目录，工作区放入 workspaces/<id> 并登记到 project.json
+            dataset: 目标工作区目录，数据集放入 datasets/<名称>
+        progress: 进度回调
+
+    Returns:
+        导入后的目录
+    """
+    archive = Path(archive)
+    target = Path(target)
+    with gzip.open(archive, "rb") as gz, tarfile.open(fileobj=gz, mode="r|") as tar:
+        member = tar.next()
+        if member is None or member.name != EXPORT_FILE:
+            raise ValueError(f"无效的导出文件: {archive}")
+        export_meta = json.loads(tar.extractfile(member).read().decode("utf-8"))
+        kind = export_meta["kind"]
+        dest = _import_destination(kind, export_meta, target)
+        tracker = _Progress(export_meta.get("bytes", 0), progress)
+        print(f"[操作] 导入{kind}: {archive} -> {dest}")
+
+        dest_resolved = dest.resolve()
+        # 修改时间按 export.json 清单中的纳秒值恢复（tar 头只保留到秒），与 export_archive 的 skip 比较一致
+        recorded = export_meta.get("files", {})
+        written = skipped = 0
+        for member in tar:
+            if not member.isfile() or not member.name.startswith("data/"):
+                continue
+            rel = member.name[len("data/"):]
+            path = dest / rel
+            if not path.resolve().is_relative_to(dest_resolved):
+                print(f"[警告] 忽略越界路径: {member.name}")
+                continue
+            mtime_ns = recorded[rel][1] if rel in recorded else int(member.mtime) * 1_000_000_000
+            if path.exists():
+                st = path.stat()
+                if st.st_size == member.size and st.st_mtime_ns == mtime_ns:
+                    skipped += 1
+                    tracker.advance(member.size)
+                    continue
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tar.extractfile(member) as src, open(path, "wb") as dst:
+                shutil.copyfileobj(_ProgressReader(src, tracker), dst, COPY_BUFFER)
+            os.utime(path, ns=(mtime_ns, mtime_ns))
+            written += 1
+
+    _finish_import(kind, export_meta, dest, target)
+    disk_usage.notify(dest)
+    print(f"[操作] 导入完成: {dest}, 写入={written}, 跳过已存在={skipped}")
+    return dest
+
+
+def _import_destination(kind: str, export_meta: dict, target: Path) -> Path:
+    if kind == "project":
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        dest = target / f"project_{timestamp}"
+        suffix = 1
+        while dest.exists():
+            dest = target / f"project_{timestamp}_{suffix}"
+            suffix += 1
+        return dest
+    if kind == "workspace":
+        workspace_id = export_meta["meta"].get("id") or generate_id()
+        if (target / "workspaces" / workspace_id).exists():
+            workspace_id = generate_id()
+        export_meta["meta"]["id"] = workspace_id
+        return target / "workspaces" / workspace_id
+    if kind == "dataset":
+        # 名称来自归档，与登记数据集同样只允许单层目录名，防止 ../ 或绝对路径写到工作区之外
+        name = export_meta.get("name")
+        if not isinstance(name, str) or not name or "/" in name or name.startswith("."):
+            raise ValueError(f"无效的数据集名称: {name!r}")
+        return target / "datasets" / name
+    raise ValueError(f"不支持的导入类型: {kind}")
+
+
+def _finish_import(kind: str, export_meta: dict, dest: Path, target: Path):
+    """导入后修正元信息：项目换新 id、路径改为新位置，工作区登记到目标项目"""
+    from app_ui.models import Project, Workspace
+
+    if kind == "project":
+        project = Project.load(dest, lazy=False)
+        if project:
+            # 与原项目（可能仍在本机）区分，和导入工作区一样分配新 id
+            project.id = generate_id()
+            project.path = dest
+            for workspace in project.workspaces:
+                workspace.project_id = project.id
+                workspace.path = dest / "workspaces" / workspace.id
+            # id 不在操作日志的字段中：导入的目录还没有其他写入方，去掉旧快照后按新项目写快照（同时清空日志）
+            (dest / "project.json").unlink()
+            project.save()
+    elif kind == "workspace":
+        project = Project.load(target)
+        if project is None:
+            print(f"[警告] 目标目录不是项目，工作区未登记: {target}")
+            return
+        data = dict(export_meta["meta"])
+        data["project_id"] = project.id
+        data.setdefault("name", export_meta["name"])
+        data.setdefault("created_at", datetime.now().isoformat())
+        project.remove_workspace(data["id"])
+        project.add_workspace(Workspace.from_dict(data, project.path))
+        project.save()
+
+
+def export_project(project, archive: Path, **kwargs) -> Path:
+    """导出整个项目目录"""
+    return export_archive(project.path, archive, "project", meta={"id": project.id, "name": project.name}, **kwargs)
+
+
+def export_workspace(workspace, archive: Path, **kwargs) -> Path:
+    """导出单个工作区目录"""
+    return export_archive(workspace.path, archive, "workspace", meta=workspace.to_dict(), **kwargs)
+
+
+def export_dataset(dataset_path: Path, archive: Path, **kwargs) -> Path:
+    """导出单个数据集目录"""
+    return export_archive(dataset_path, archive, "dataset", **kwargs)
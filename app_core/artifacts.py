@@ -0,0 +1,307 @@
+"""
+实验产物管理
+每个实验的 artifacts.json 记录检查点等产物的大小、sha256、step 和保存时的指标；
+工作区的 usage.json 缓存各实验占用的磁盘空间，登记/删除产物时增量更新，详情页不必递归扫描；
+保留策略（每个实验保留最好 k 个、最近 n 个，工作区总大小上限）在后台线程中执行删除
+"""
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import hashlib
+import json
+import os
+
+from app_core import disk_usage
+from app_core.archive import scan_tree
+
+
+ARTIFACTS_FILE = "artifacts.json"
+USAGE_FILE = "usage.json"
+EXPERIMENTS_DIR = "experiments"
+
+
+@dataclass
+class Artifact:
+    name: str
+    path: str           # 相对实验目录
+    kind: str = "checkpoint"
+    step: int = 0
+    size: int = 0
+    sha256: str = ""
+    metrics: dict = field(default_factory=dict)
+    created_at: str = field(default_factory=lambda: datetime.now().isoformat())
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _write_json(path: Path, data):
+    tmp_file = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    os.replace(tmp_file, path)
+
+
+@contextmanager
+def _file_lock(path: Path):
+    """进程间互斥（训练进程登记产物与 GUI 删除产物可能同时更新同一文件），无 fcntl 的平台不加锁"""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+# ------------------------------------------------------------ 工作区磁盘占用缓存
+
+def _usage_file(workspace_path: Path) -> Path:
+    return Path(workspace_path) / USAGE_FILE
+
+
+def _read_usage(workspace_path: Path) -> Dict[str, int]:
+    try:
+        with open(_usage_file(workspace_path), "r", encoding="utf-8") as f:
+            return json.load(f).get("experiments", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_usage(workspace_path: Path, experiment_id: str, delta: int = 0, total: Optional[int] = None):
+    usage_file = _usage_file(workspace_path)
+    with _file_lock(usage_file.with_suffix(".lock")):
+        experiments = _read_usage(workspace_path)
+        if total is not None:
+            experiments[experiment_id] = total
+        else:
+            experiments[experiment_id] = max(0, experiments.get(experiment_id, 0) + delta)
+        _write_json(usage_file, {
+            "total": sum(experiments.values()),
+            "experiments": experiments,
+            "updated_at": datetime.now().isoformat()
+        })
+
+
+def refresh_experiment_usage(experiment_path: Path) -> int:
+    """重新统计单个实验目录的占用（实验结束时调用一次）"""
+    experiment_path = Path(experiment_path)
+    total = sum(size for size, _ in scan_tree(experiment_path).values()) if experiment_path.exists() else 0
+    _update_usage(experiment_path.parent.parent, experiment_path.name, total=total)
+    return total
+
+
+def workspace_usage(workspace_path: Path) -> Tuple[int, Dict[str, int]]:
+    """工作区缓存的磁盘占用：(总字节数, {实验 id: 字节数})；没有缓存时扫描一次并建立"""
+    workspace_path = Path(workspace_path)
+    if not _usage_file(workspace_path).exists():
+        experiments_dir = workspace_path / EXPERIMENTS_DIR
+        if experiments_dir.exists():
+            for experiment_dir in experiments_dir.iterdir():
+                if experiment_dir.is_dir():
+                    refresh_experiment_usage(experiment_dir)
+    experiments = _read_usage(workspace_path)
+    return sum(experiments.values()), experiments
+
+
+# ------------------------------------------------------------ 产物登记
+
+class ArtifactRegistry:
+    """
+    单个实验的产物登记表
+
+    用法（训练脚本中）：
+        registry = ArtifactRegistry.from_env()
+        registry.register("checkpoints/step_1000.pt", step=1000, metrics={"val_acc": 0.91})
+    """
+
+    def __init__(self, experiment_path: Path):
+        self.experiment_path = Path(experiment_path)
+        self.registry_file = self.experiment_path / ARTIFACTS_FILE
+        self._lock_file = self.experiment_path / (ARTIFACTS_FILE + ".lock")
+
+    @classmethod
+    def from_env(cls):
+        return cls(Path(os.environ["DEEPLOCAL_EXPERIMENT_DIR"]))
+
+    @property
+    def workspace_path(self) -> Path:
+        return self.experiment_path.parent.parent
+
+    def load(self) -> List[Artifact]:
+        try:
+            with open(self.registry_file, "r", encoding="utf-8") as f:
+                return [Artifact(**item) for item in json.load(f)]
+        except FileNotFoundError:
+            return []
+
+    def _save(self, artifacts: List[Artifact]):
+        _write_json(self.registry_file, [asdict(a) for a in artifacts])
+
+    def register(self, path: str, kind: str = "checkpoint", step: int = 0, metrics: Optional[dict] = None,
+                 name: Optional[str] = None) -> Artifact:
+        """登记已写完的产物文件（path 相对实验目录或为绝对路径），同名产物会被替换"""
+        file_path = Path(path)
+        if not file_path.is_absolute():
+            file_path = self.experiment_path / file_path
+        artifact = Artifact(
+            name=name or file_path.name,
+            path=file_path.relative_to(self.experiment_path).as_posix(),
+            kind=kind,
+            step=step,
+            size=file_path.stat().st_size,
+            sha256=_sha256(file_path),
+            metrics=metrics or {}
+        )
+        with _file_lock(self._lock_file):
+            artifacts = self.load()
+            replaced = [a for a in artifacts if a.name == artifact.name]
+            artifacts = [a for a in artifacts if a.name != artifact.name] + [artifact]
+            self._save(artifacts)
+        delta = artifact.size - sum(a.size for a in replaced)
+        _update_usage(self.workspace_path, self.experiment_path.name, delta=delta)
+        print(f"[操作] 登记产物: {artifact.path}, step={step}, size={artifact.size}")
+        return artifact
+
+    def remove(self, names: List[str]) -> int:
+        """删除产物文件并从登记表移除，返回释放的字节数"""
+        names = set(names)
+        with _file_lock(self._lock_file):
+            artifacts = self.load()
+            removed = [a for a in artifacts if a.name in names]
+            for artifact in removed:
+                try:
+                    (self.experiment_path / artifact.path).unlink()
+                except FileNotFoundError:
+                    pass
+            self._save([a for a in artifacts if a.name not in names])
+        freed = sum(a.size for a in removed)
+        if removed:
+            _update_usage(self.workspace_path, self.experiment_path.name, delta=-freed)
+        return freed
+
+    def verify(self, name: str) -> bool:
+        """校验产物文件的 sha256 与登记时一致"""
+        for artifact in self.load():
+            if artifact.name == name:
+                file_path = self.experiment_path / artifact.path
+                return file_path.exists() and _sha256(file_path) == artifact.sha256
+        return False
+
+
+# ------------------------------------------------------------ 保留策略
+
+@dataclass
+class RetentionPolicy:
+    """
+    保留策略：每个实验保留 metric 最好的 keep_best_k 个和最近的 keep_last_n 个（两者取并集），
+    工作区内产物总大小超过 max_bytes 时再从最旧的开始删除（每个实验至少保留一个）；未设置的项不生效
+    """
+    keep_best_k: Optional[int] = None
+    keep_last_n: Optional[int] = None
+    max_bytes: Optional[int] = None
+    metric: str = ""
+    mode: str = "max"
+    kinds: Tuple[str, ...] = ("checkpoint",)
+
+    def __post_init__(self):
+        if self.keep_best_k is not None and not self.metric:
+            raise ValueError("keep_best_k 需要指定 metric")
+        if self.mode not in ("max", "min"):
+            raise ValueError(f"mode 应为 max 或 min: {self.mode}")
+
+    def protected(self, artifacts: List[Artifact]) -> set:
+        """保留的产物名；非空的产物列表至少保留一个（没有任何产物记录 metric 时保留最新的）"""
+        if self.keep_best_k is None and self.keep_last_n is None:
+            return {a.name for a in artifacts}
+        keep = set()
+        newest = sorted(artifacts, key=lambda a: (a.step, a.created_at))
+        if self.keep_last_n:
+            keep.update(a.name for a in newest[-self.keep_last_n:])
+        if self.keep_best_k:
+            scored = [a for a in artifacts if isinstance(a.metrics.get(self.metric), (int, float))]
+            scored.sort(key=lambda a: a.metrics[self.metric], reverse=self.mode == "max")
+            keep.update(a.name for a in scored[:self.keep_best_k])
+        if not keep and newest:
+            keep.add(newest[-1].name)
+        return keep
+
+    def select(self, registries: Dict[str, List[Artifact]]) -> Dict[str, List[str]]:
+        """返回 {实验 id: 待删除产物名}"""
+        doomed: Dict[str, List[str]] = {}
+        candidates = []
+        total = 0
+        for experiment_id, artifacts in registries.items():
+            managed = [a for a in artifacts if a.kind in self.kinds]
+            total += sum(a.size for a in managed)
+            keep = self.protected(managed)
+            # 超出总大小时每个实验仍保留一个：有指标取最好的，否则取最新的
+            anchor = self._anchor([a for a in managed if a.name in keep])
+            for artifact in managed:
+                if artifact.name not in keep:
+                    doomed.setdefault(experiment_id, []).append(artifact.name)
+                    total -= artifact.size
+                elif artifact is not anchor:
+                    candidates.append((experiment_id, artifact))
+        if self.max_bytes is not None and total > self.max_bytes:
+            for experiment_id, artifact in sorted(candidates, key=lambda c: c[1].created_at):
+                if total <= self.max_bytes:
+                    break
+                doomed.setdefault(experiment_id, []).append(artifact.name)
+                total -= artifact.size
+        return doomed
+
+    def _anchor(self, artifacts: List[Artifact]) -> Optional[Artifact]:
+        scored = [a for a in artifacts if isinstance(a.metrics.get(self.metric), (int, float))] if self.metric else []
+        if scored:
+            pick = max if self.mode == "max" else min
+            return pick(scored, key=lambda a: a.metrics[self.metric])
+        return max(artifacts, key=lambda a: (a.step, a.created_at), default=None)
+
+
+class ArtifactJanitor:
+    """
+    后台执行保留策略，删除在单独线程中进行，不阻塞界面
+
+    用法：
+        janitor = ArtifactJanitor()
+        future = janitor.apply(workspace.path, RetentionPolicy(keep_best_k=3, metric="val_acc"))
+    """
+
+    def __init__(self):
+        self._pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="artifact-janitor")
+
+    def apply(self, workspace_path: Path, policy: RetentionPolicy) -> Future:
+        return self._pool.submit(apply_retention, Path(workspace_path), policy)
+
+    def shutdown(self, wait: bool = True):
+        self._pool.shutdown(wait=wait)
+
+
+def apply_retention(workspace_path: Path, policy: RetentionPolicy) -> int:
+    """按策略删除工作区中的产物，返回释放的字节数"""
+    experiments_dir = Path(workspace_path) / EXPERIMENTS_DIR
+    registries = {}
+    if experiments_dir.exists():
+        for experiment_dir in experiments_dir.iterdir():
+            if (experiment_dir / ARTIFACTS_FILE).exists():
+                registries[experiment_dir.name] = ArtifactRegistry(experiment_dir).load()
+    doomed = policy.select(registries)
+    freed = sum(ArtifactRegistry(experiments_dir / e).remove(names) for e, names in doomed.items())
+    for experiment_id in doomed:
+        disk_usage.notify(experiments_dir / experiment_id)
+    print(f"[操作] 执行产物保留策略: {workspace_path}, 删除={sum(len(n) for n in doomed.values())}, 释放={freed} 字节")
+    return freed
@@ -0,0 +1,568 @@
+"""
+本地目录服务（JSON-RPC 2.0）
+自动化脚本在 GUI 打开时通过它列出项目、登记数据集、提交实验，不必自己读写 project.json。
+监听 Unix 套接字（或 127.0.0.1 端口），每行一个 JSON 请求 / 响应；
+读请求直接由事件循环线程中的内存索引回答（需要扫描磁盘的实验索引刷新交给读线程），
+写请求交给单独的写线程经 ProjectService 落盘，
+写完后更新索引，并把变化（delta）推送给 GUI 和订阅了 subscribe 的客户端。
+GUI 中由 CatalogHub 在后台线程运行，也可以单独运行：deeplocal serve
+"""
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import asyncio
+import hashlib
+import json
+import shutil
+import socket
+import tempfile
+import threading
+
+from app_core import disk_usage
+from app_core.progress_channel import socket_in_use
+from app_core.projects import ProjectService
+from app_ui.models import Experiment, Project, Workspace
+
+
+RPC_VERSION = "2.0"
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+APP_ERROR = -32000
+MAX_LINE = 16 * 1024 * 1024
+DATASETS_DIR = "datasets"
+
+
+def rpc_socket_path(project_dir: Path) -> Path:
+    """项目目录对应的服务套接字路径（与进度通道同样放在临时目录）"""
+    digest = hashlib.sha1(str(Path(project_dir).resolve()).encode()).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"deeplocal-{digest}-rpc.sock"
+
+
+class RpcError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+
+
+def _project_summary(project: Project) -> dict:
+    return {
+        "id": project.id,
+        "name": project.name,
+        "desc": project.desc,
+        "created_at": project.created_at.isoformat(),
+        "path": str(project.path),
+        "workspaces": project.workspace_count
+    }
+
+
+def _workspace_dict(workspace: Workspace) -> dict:
+    return {**workspace.to_dict(), "path": str(workspace.path)}
+
+
+def _experiment_dict(experiment: Experiment) -> dict:
+    return {**experiment.to_dict(), "path": str(experiment.path)}
+
+
+class Catalog:
+    """
+    项目 / 工作区的内存索引；只在事件循环线程中读写
+    项目的工作区列表按需展开（Project.load 默认不展开），工作区 -> 项目的映射随之建立；
+    实验列表由各工作区的 ExperimentIndex 提供（按 mtime 增量刷新）；项目列表的排序分页由 ProjectService.index 提供
+    """
+
+    def __init__(self, projects: List[Project]):
+        self.projects: Dict[str, Project] = {}
+        self.workspaces: Dict[str, str] = {}       # 工作区 id -> 项目 id
+        self._experiment_indexes = {}
+        for project in projects:
+            self.put(project)
+
+    def put(self, project: Project):
+        old = self.projects.get(project.id)
+        if old is not None and old.hydrated:
+            for workspace in old.workspaces:
+                self.workspaces.pop(workspace.id, None)
+        self.projects[project.id] = project
+        if project.hydrated:
+            for workspace in project.workspaces:
+                self.workspaces[workspace.id] = project.id
+
+    def drop(self, project_path: Path):
+        """项目已被删除（移入回收站）"""
+        for project in list(self.projects.values()):
+            if project.path == project_path:
+                del self.projects[project.id]
+                for workspace_id in [w for w, p in self.workspaces.items() if p == project.id]:
+                    self.forget_workspace(workspace_id)
+
+    def forget_workspace(self, workspace_id: str):
+        self.workspaces.pop(workspace_id, None)
+        self._experiment_indexes.pop(workspace_id, None)
+
+    def project(self, project_id: str) -> Project:
+        project = self.projects.get(project_id)
+        if project is None:
+            raise RpcError(APP_ERROR, f"项目不存在: {project_id}")
+        return project
+
+    def workspace(self, workspace_id: str) -> Workspace:
+        """只查内存映射；所在项目未展开时由 CatalogServer._workspace 在写线程中查找"""
+        if workspace_id not in self.workspaces:
+            raise RpcError(APP_ERROR, f"工作区不存在: {workspace_id}")
+        return self.project(self.workspaces[workspace_id]).get_workspace(workspace_id)
+
+    def experiment_index(self, workspace: Workspace):
+        from app_core.experiment_index import ExperimentIndex
+        index = self._experiment_indexes.get(workspace.id)
+        if index is None:
+            index = self._experiment_indexes[workspace.id] = ExperimentIndex(workspace.path)
+        return index
+
+
+class CatalogServer:
+    """
+    目录服务
+
+    用法：
+        server = CatalogServer(ProjectService(projects_dir), on_delta=print)
+        server.start()          # 后台线程运行（GUI 中）
+        ...
+        server.stop()
+    或 server.serve_forever() 在当前线程运行
+
+    Args:
+        service: 与 GUI 共用的 ProjectService（写操作持有其 lock）
+        path: Unix 套接字路径，默认 rpc_socket_path(projects_dir)；port 不为 None 或平台不支持时监听 127.0.0.1:port
+        on_delta: 每次写操作后在事件循环线程中调用，参数为 delta 字典
+        submit: 提交实验运行的回调 (experiment, priority)；GUI 中转到主线程调用调度器
+        poll: 单独运行时每秒在事件循环中调用一次（回收结束的实验、启动排队的实验）
+    """
+
+    def __init__(self, service: ProjectService, path: Optional[Path] = None, port: Optional[int] = None,
+                 on_delta: Optional[Callable[[dict], None]] = None,
+                 submit: Optional[Callable[[Experiment, int], None]] = None,
+                 poll: Optional[Callable[[], Any]] = None):
+        self.service = service
+        self.path = Path(path) if path else rpc_socket_path(service.projects_dir)
+        self.port = port
+        self.on_delta = on_delta
+        self.submit = submit
+        self.poll = poll
+        self.catalog: Optional[Catalog] = None
+        self.address = None
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-writer")
+        self._reader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="catalog-reader")
+        self._subscribers = set()
+        self._connections = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._poll_task = None
+        self._thread: Optional[threading.Thread] = None
+        self._ready = threading.Event()
+        self._methods: Dict[str, Callable] = {
+            "ping": self.ping,
+            "subscribe": None,      # 需要连接对象，在 _dispatch 中处理
+            "project.list": self.list_projects,
+            "project.get": self.get_project,
+            "project.create": self.create_project,
+            "project.delete": self.delete_project,
+            "workspace.list": self.list_workspaces,
+            "workspace.create": self.create_workspace,
+            "workspace.delete": self.delete_workspace,
+            "dataset.list": self.list_datasets,
+            "dataset.register": self.register_dataset,
+            "experiment.list": self.list_experiments,
+            "experiment.create": self.create_experiment,
+        }
+
+    # ------------------------------------------------------------ 运行
+
+    async def _start(self):
+        projects = await self._write(self.service.get_projects)
+        self.catalog = Catalog(projects)
+        if self.port is None and hasattr(socket, "AF_UNIX"):
+            # 已有服务（另一个 GUI 或 deeplocal serve）在监听时不抢占，只清理进程退出后残留的文件
+            if socket_in_use(self.path, socket.SOCK_STREAM):
+                print(f"[错误] 本地目录服务已在运行: {self.path}，本实例不启动服务")
+                return
+            if self.path.exists():
+                self.path.unlink()
+            self._server = await asyncio.start_unix_server(self._handle, path=str(self.path), limit=MAX_LINE)
+            self.address = str(self.path)
+        else:
+            self._server = await asyncio.start_server(self._handle, "127.0.0.1", self.port or 0, limit=MAX_LINE)
+            self.address = self._server.sockets[0].getsockname()[:2]
+        print(f"[启动] 本地目录服务: {self.address}, 项目数={len(self.catalog.projects)}")
+
+    async def _main(self):
+        self._loop = asyncio.get_running_loop()
+        try:
+            await self._start()
+        finally:
+            self._ready.set()
+        if self._server is None:
+            return
+        if self.poll is not None:
+            self._poll_task = self._loop.create_task(self._poll_forever())
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def _poll_forever(self):
+        while True:
+            await asyncio.sleep(1.0)
+            self.poll()
+
+    def serve_forever(self):
+        try:
+            asyncio.run(self._main())
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._cleanup()
+
+    def start(self):
+        """在后台线程中运行，返回时已开始监听"""
+        self._thread = threading.Thread(target=self.serve_forever, name="catalog-server", daemon=True)
+        self._thread.start()
+        self._ready.wait()
+
+    def stop(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._shutdown)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _shutdown(self):
+        self._server.close()
+        for connection in list(self._connections):
+            connection.close()
+
+    def _cleanup(self):
+        self._writer.shutdown(wait=True)
+        self._reader.shutdown(wait=True)
+        if self.address is None:
+            return
+        # 只删除本实例绑定的套接字
+        if self.port is None and self.address == str(self.path) and self.path.exists():
+            self.path.unlink()
+        print("[操作] 本地目录服务已停止")
+
+    def invalidate(self, project_path: Path):
+        """GUI 自己写了 project.json 后调用（任意线程），服务重新加载该项目"""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(lambda: self._loop.create_task(self._reload(Path(project_path))))
+
+    async def _reload(self, project_path: Path):
+        project = await self._write(self.service.load_project, project_path)
+        if project is not None:
+            self.catalog.put(project)
+        else:
+            self.catalog.drop(project_path)
+
+    # ------------------------------------------------------------ 连接与分发
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._connections.add(writer)
+        try:
+            while True:
+                try:
+                    line = await reader.readline()
+                except (asyncio.LimitOverrunError, ValueError):
+                    break
+                if not line:
+                    break
+                if not line.strip():
+                    continue
+                response = await self._dispatch_line(line, writer)
+                if response is not None:
+                    writer.write(response)
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self._subscribers.discard(writer)
+            self._connections.discard(writer)
+            writer.close()
+
+    async def _dispatch_line(self, line: bytes, connection) -> Optional[bytes]:
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return self._encode({"jsonrpc": RPC_VERSION, "id": None,
+                                 "error": {"code": PARSE_ERROR, "message": "无法解析的 JSON"}})
+        if isinstance(request, list):
+            # 批量请求：逐个执行，写操作保持顺序
+            responses = [r for r in [await self._dispatch(item, connection) for item in request] if r is not None]
+            return self._encode(responses) if responses else None
+        response = await self._dispatch(request, connection)
+        return self._encode(response) if response is not None else None
+
+    @staticmethod
+    def _encode(payload) -> bytes:
+        return json.dumps(payload, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8") + b"\n"
+
+    async def _dispatch(self, request: Any, connection) -> Optional[dict]:
+        if not isinstance(request, dict) or not isinstance(request.get("method"), str):
+            return {"jsonrpc": RPC_VERSION, "id": None,
+                    "error": {"code": INVALID_REQUEST, "message": "无效的请求"}}
+        request_id = request.get("id")
+        method = request["method"]
+        params = request.get("params") or {}
+        try:
+            if method not in self._methods:
+                raise RpcError(METHOD_NOT_FOUND, f"未知方法: {method}")
+            if method == "subscribe":
+                self._subscribers.add(connection)
+                result = True
+            else:
+                handler = self._methods[method]
+                try:
+                    result = handler(*params) if isinstance(params, list) else handler(**params)
+                except TypeError as e:
+                    raise RpcError(INVALID_PARAMS, str(e))
+                if asyncio.iscoroutine(result):
+                    result = await result
+        except RpcError as e:
+            response = {"jsonrpc": RPC_VERSION, "id": request_id, "error": {"code": e.code, "message": e.message}}
+        except (ValueError, KeyError, OSError) as e:
+            response = {"jsonrpc": RPC_VERSION, "id": request_id, "error": {"code": APP_ERROR, "message": str(e)}}
+        except Exception as e:
+            print(f"[错误] 目录服务处理请求失败: method={method}, {str(e)}")
+            response = {"jsonrpc": RPC_VERSION, "id": request_id, "error": {"code": APP_ERROR, "message": str(e)}}
+        else:
+            response = {"jsonrpc": RPC_VERSION, "id": request_id, "result": result}
+        # 没有 id 的是通知，不回复
+        return response if "id" in request else None
+
+    async def _write(self, fn: Callable, *args):
+        """在写线程中执行（持有 ProjectService.lock），事件循环继续回答读请求"""
+        def locked():
+            with self.service.lock:
+                return fn(*args)
+        return await asyncio.get_running_loop().run_in_executor(self._writer, locked)
+
+    async def _read(self, fn: Callable, *args):
+        """在读线程中执行磁盘扫描等耗时读取（不持有 ProjectService.lock，不阻塞写线程）"""
+        return await asyncio.get_running_loop().run_in_executor(self._reader, fn, *args)
+
+    async def _workspace(self, workspace_id: str) -> Workspace:
+        """
+        按 id 取工作区；所在项目还未建立工作区映射（未展开）时，在写线程中按目录名查找并展开该项目，
+        事件循环不做磁盘扫描
+        """
+        if workspace_id not in self.catalog.workspaces:
+            project, _ = await self._write(self.service.find_workspace, workspace_id)
+            if project is not None:
+                self.catalog.put(project)
+        return self.catalog.workspace(workspace_id)
+
+    def _publish(self, delta: dict):
+        if self.on_delta:
+            self.on_delta(delta)
+        if self._subscribers:
+            payload = self._encode({"jsonrpc": RPC_VERSION, "method": "delta", "params": delta})
+            for connection in list(self._subscribers):
+                if connection.is_closing():
+                    self._subscribers.discard(connection)
+                else:
+                    connection.write(payload)
+
+    # ------------------------------------------------------------ 读
+
+    def ping(self) -> str:
+        return "pong"
+
+    def list_projects(self, sort: str = "created_at", descending: bool = True, cursor: Optional[str] = None,
+                      limit: int = 50, search: Optional[str] = None, created_after: Optional[str] = None,
+                      created_before: Optional[str] = None) -> dict:
+        """分页列出项目摘要；下一页传入上次返回的 next_cursor"""
+        page = self.service.query_projects(sort, descending, cursor, limit, search, created_after, created_before)
+        return {"total": page.total, "next_cursor": page.next_cursor, "projects": page.rows}
+
+    def get_project(self, project_id: str) -> dict:
+        return self.catalog.project(project_id).to_dict()
+
+    def list_workspaces(self, project_id: str) -> List[dict]:
+        return [_workspace_dict(w) for w in self.catalog.project(project_id).workspaces]
+
+    async def list_datasets(self, workspace_id: str) -> List[dict]:
+        from app_core.manifest import MANIFEST_FILE, meta_dir
+        datasets_dir = (await self._workspace(workspace_id)).path / DATASETS_DIR
+        datasets = []
+        if datasets_dir.exists():
+            for dataset_dir in sorted(datasets_dir.iterdir()):
+                manifest_file = meta_dir(dataset_dir) / MANIFEST_FILE
+                if manifest_file.exists():
+                    with open(manifest_file, "r", encoding="utf-8") as f:
+                        meta = json.load(f)
+                    datasets.append({"name": dataset_dir.name, "path": str(dataset_dir), "count": meta["count"],
+                                     "classes": meta.get("classes", []), "version": meta.get("version", 0)})
+        return datasets
+
+    async def list_experiments(self, workspace_id: str, filter: Optional[str] = None, sort: Optional[str] = None,
+                         descending: bool = False, offset: int = 0, limit: Optional[int] = 100,
+                         columns: Optional[List[str]] = None) -> dict:
+        index = self.catalog.experiment_index(await self._workspace(workspace_id))
+        # 刷新要逐个 stat experiment.json，在读线程中执行，事件循环继续回答其他请求
+        await self._read(index.refresh)
+        result = index.query(filter or None, sort, descending, offset, limit, columns)
+        return {"total": result.total, "columns": result.columns, "rows": result.rows}
+
+    # ------------------------------------------------------------ 写
+
+    async def create_project(self, name: str, desc: str = "") -> dict:
+        project = await self._write(self.service.create_project, name, desc)
+        self.catalog.put(project)
+        self._publish({"type": "project_created", "project_id": project.id, "project": _project_summary(project)})
+        return _project_summary(project)
+
+    async def create_workspace(self, project_id: str, name: str) -> dict:
+        path = self.catalog.project(project_id).path
+
+        def create():
+            # 在最新的 project.json 上修改，不覆盖 GUI 刚写入的内容
+            project = self.service.load_project(path)
+            if project is None:
+                raise RpcError(APP_ERROR, f"项目不存在: {project_id}")
+            return project, self.service.create_workspace(project, name)
+
+        project, workspace = await self._write(create)
+        self.catalog.put(project)
+        self._publish({"type": "workspace_created", "project_id": project.id, "workspace": _workspace_dict(workspace)})
+        return _workspace_dict(workspace)
+
+    async def delete_project(self, project_id: str) -> dict:
+        """删除项目（移入回收站，撤销期内可用命令行 trash restore 恢复）"""
+        project = self.catalog.project(project_id)
+        entry = await self._write(self.service.delete_project, project)
+        self.catalog.drop(project.path)
+        self._publish({"type": "project_deleted", "project_id": project_id, "trash_id": entry.id})
+        return {"trash_id": entry.id, "purge_after": entry.purge_after}
+
+    async def delete_workspace(self, workspace_id: str) -> dict:
+        await self._workspace(workspace_id)     # 不存在时抛出 RpcError，同时建立工作区 -> 项目映射
+        path = self.catalog.project(self.catalog.workspaces[workspace_id]).path
+
+        def delete():
+            project = self.service.load_project(path)
+            if project is None:
+                raise RpcError(APP_ERROR, f"项目不存在: {path}")
+            return project, self.service.delete_workspace(project, workspace_id)
+
+        project, entry = await self._write(delete)
+        self.catalog.forget_workspace(workspace_id)
+        self.catalog.put(project)
+        self._publish({"type": "workspace_deleted", "project_id": project.id, "workspace_id": workspace_id,
+                       "trash_id": entry.id})
+        return {"trash_id": entry.id, "purge_after": entry.purge_after}
+
+    async def register_dataset(self, workspace_id: str, name: str, source: Optional[str] = None,
+                               classified: bool = True) -> dict:
+        """
+        登记数据集：扫描 工作区/datasets/<name> 生成清单；给出 source 时先把该目录复制过去
+        """
+        workspace = await self._workspace(workspace_id)
+        if not name or "/" in name or name.startswith("."):
+            raise RpcError(INVALID_PARAMS, f"无效的数据集名称: {name}")
+        dataset_dir = workspace.path / DATASETS_DIR / name
+
+        def register():
+            from app_core.manifest import DatasetManifest
+            if source:
+                if dataset_dir.exists():
+                    raise RpcError(APP_ERROR, f"数据集已存在: {name}")
+                shutil.copytree(source, dataset_dir)
+            elif not dataset_dir.is_dir():
+                raise RpcError(APP_ERROR, f"数据集目录不存在: {dataset_dir}")
+            manifest = DatasetManifest.scan(dataset_dir, classified=classified)
+            if DatasetManifest.exists(dataset_dir):
+                manifest.version = DatasetManifest.load(dataset_dir).version
+            manifest.save()
+            disk_usage.notify(dataset_dir)
+            return {"name": name, "path": str(dataset_dir), "count": len(manifest),
+                    "classes": manifest.classes, "version": manifest.version}
+
+        dataset = await self._write(register)
+        self._publish({"type": "dataset_registered", "project_id": self.catalog.workspaces[workspace_id],
+                       "workspace_id": workspace_id, "dataset": dataset})
+        return dataset
+
+    async def create_experiment(self, workspace_id: str, name: str, dataset_id: str = "",
+                                config: Optional[dict] = None, submit: bool = True, priority: int = 0) -> dict:
+        """创建实验，submit=True 时提交到调度队列"""
+        workspace = await self._workspace(workspace_id)
+        if submit and self.submit is None:
+            raise RpcError(APP_ERROR, "服务未连接调度器，无法提交实验")
+        # 索引中的对象只在事件循环线程中修改：写线程在副本上创建，回到事件循环后再登记
+        detached = Workspace.from_dict(workspace.to_dict(), workspace.path.parent.parent)
+        experiment = await self._write(self.service.create_experiment, detached, name, dataset_id, config)
+        workspace.add_experiment(experiment)
+        if submit:
+            self.submit(experiment, priority)
+        self._publish({"type": "experiment_created", "project_id": self.catalog.workspaces[workspace_id],
+                       "workspace_id": workspace_id, "experiment": _experiment_dict(experiment),
+                       "submitted": submit})
+        return _experiment_dict(experiment)
+
+
+def serve(project_dir: Path, port: Optional[int] = None):
+    """单独运行服务（不启动 GUI），自带调度器；已有服务在运行时返回 False"""
+    from app_core.scheduler import ExperimentScheduler
+    scheduler = ExperimentScheduler(project_dir)
+    server = CatalogServer(ProjectService(project_dir), port=port, submit=scheduler.submit, poll=scheduler.poll)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return server.address is not None
+
+
+class CatalogClient:
+    """
+    同步客户端，供脚本使用
+
+    用法：
+        client = CatalogClient.for_project_dir(projects_dir)
+        projects = client.call("project.list")["projects"]
+        client.call("experiment.create", workspace_id=ws, name="lr-1e-3", config={"lr": 1e-3})
+    """
+
+    def __init__(self, address, timeout: Optional[float] = 30.0):
+        if isinstance(address, (tuple, list)):
+            self._sock = socket.create_connection(tuple(address), timeout=timeout)
+        else:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(timeout)
+            self._sock.connect(str(address))
+        self._file = self._sock.makefile("rb")
+        self._next_id = 0
+        self.deltas: List[dict] = []
+
+    @classmethod
+    def for_project_dir(cls, project_dir: Path, **kwargs):
+        return cls(rpc_socket_path(project_dir), **kwargs)
+
+    def call(self, method: str, **params):
+        self._next_id += 1
+        request = {"jsonrpc": RPC_VERSION, "id": self._next_id, "method": method, "params": params}
+        self._sock.sendall(json.dumps(request, ensure_ascii=False).encode("utf-8") + b"\n")
+        while True:
+            line = self._file.readline()
+            if not line:
+                raise ConnectionError("服务已关闭连接")
+            message = json.loads(line)
+            if message.get("method") == "delta":
+                # 订阅后推送的变化与响应交错到达，先收起来
+                self.deltas.append(message["params"])
+                continue
+            if "error" in message:
+                raise RpcError(message["error"]["code"], message["error"]["message"])
+            return message["result"]
+
+    def close(self):
+        self._file.close()
+        self._sock.close()
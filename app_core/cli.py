@@ -0,0 +1,363 @@
+"""
+deeplocal 命令行
+不导入 PyQt6；各子命令只在执行时导入自己用到的模块（numpy、归档、调度器等），保持启动快。
+项目目录依次取 --project-dir、环境变量 DEEPLOCAL_PROJECT_DIR、仓库根目录 app.yaml 中的 project_dir。
+库函数的日志默认丢弃（-v 时输出到 stderr），stdout 只输出结果，便于管道处理
+
+    deeplocal list --sort name --asc --limit 20
+    deeplocal list workspaces --project <项目 id>
+    deeplocal create project 猫狗分类 --desc "..."
+    deeplocal create workspace ws --project <项目 id> --count 5000
+    deeplocal query <工作区 id> --filter "results.val_acc>0.9" --sort lr --limit 20
+    deeplocal delete workspace <工作区 id>
+    deeplocal trash list / restore <条目 id> / purge --all
+    deeplocal export project <项目 id> out.tar.gz
+    deeplocal du --top 20 --kind dataset
+    deeplocal gc --cache-max-bytes 20G --keep-best-k 3 --metric val_acc
+    deeplocal serve
+"""
+from contextlib import redirect_stdout
+from pathlib import Path
+from typing import List, Optional
+import argparse
+import json
+import os
+import sys
+
+
+PROJECT_DIR_ENV = "DEEPLOCAL_PROJECT_DIR"
+CONFIG_FILE = Path(__file__).resolve().parent.parent / "app.yaml"
+SIZE_UNITS = {"": 1, "K": 1 << 10, "M": 1 << 20, "G": 1 << 30, "T": 1 << 40}
+
+
+class CliError(Exception):
+    pass
+
+
+def _project_dir(args) -> Path:
+    if args.project_dir:
+        return Path(args.project_dir)
+    if os.environ.get(PROJECT_DIR_ENV):
+        return Path(os.environ[PROJECT_DIR_ENV])
+    from app_core.config import ConfigError, ConfigService
+    config_file = Path(os.environ.get("CONFIG_FILE") or CONFIG_FILE)
+    if not config_file.exists():
+        raise CliError(f"未找到配置文件 {config_file}，请用 --project-dir 指定项目目录")
+    try:
+        return ConfigService(config_file).config.project_dir
+    except ConfigError as e:
+        raise CliError(str(e))
+
+
+def _parse_size(text: str) -> int:
+    text = text.strip().upper().rstrip("B")
+    unit = text[-1:] if text[-1:] in SIZE_UNITS else ""
+    try:
+        return int(float(text[:len(text) - len(unit)]) * SIZE_UNITS[unit])
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"无效的大小: {text}")
+
+
+def _read_lines(path: str) -> List[str]:
+    f = sys.stdin if path == "-" else open(path, "r", encoding="utf-8")
+    try:
+        return [line.rstrip("\n") for line in f if line.strip()]
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def _bulk_names(args) -> List[str]:
+    """--from-file 每行一个名称（项目可用制表符分隔描述）；--count N 时名称追加序号"""
+    if args.from_file:
+        return _read_lines(args.from_file)
+    if not args.name:
+        raise CliError("需要提供名称或 --from-file")
+    if args.count == 1:
+        return [args.name]
+    width = len(str(args.count))
+    return [f"{args.name}-{i:0{width}d}" for i in range(1, args.count + 1)]
+
+
+class Cli:
+    """子命令实现；结果写到 out，库函数日志由 main() 重定向"""
+
+    def __init__(self, args, out):
+        self.args = args
+        self.out = out
+        self.project_dir = _project_dir(args)
+        self._service = None
+
+    @property
+    def service(self):
+        if self._service is None:
+            from app_core.projects import ProjectService
+            self._service = ProjectService(self.project_dir)
+        return self._service
+
+    def emit(self, text: str = ""):
+        self.out.write(text + "\n")
+
+    def emit_table(self, rows: List[dict], columns: List[str]):
+        if self.args.json:
+            self.emit(json.dumps(rows, ensure_ascii=False, indent=2, default=str))
+            return
+        cells = [[("" if r.get(c) is None else str(r.get(c))) for c in columns] for r in rows]
+        widths = [max([len(c)] + [len(row[i]) for row in cells]) for i, c in enumerate(columns)]
+        self.emit("  ".join(c.ljust(w) for c, w in zip(columns, widths)).rstrip())
+        for row in cells:
+            self.emit("  ".join(v.ljust(w) for v, w in zip(row, widths)).rstrip())
+
+    def _project(self, project_id: str):
+        project = self.service.find_project(project_id)
+        if project is None:
+            raise CliError(f"项目不存在: {project_id}")
+        return project
+
+    def _workspace(self, workspace_id: str):
+        _, workspace = self.service.find_workspace(workspace_id)
+        if workspace is None:
+            raise CliError(f"工作区不存在: {workspace_id}")
+        return workspace
+
+    # ------------------------------------------------------------ 子命令
+
+    def list(self):
+        if self.args.what == "projects":
+            rows = []
+            cursor = None
+            while self.args.limit is None or len(rows) < self.args.limit:
+                page = self.service.query_projects(self.args.sort, not self.args.asc, cursor,
+                                                   search=self.args.search)
+                rows.extend({"id": r["id"], "name": r["name"], "workspaces": r["workspaces"],
+                             "created_at": r["created_at"].replace("T", " ")[:19], "path": r["path"]}
+                            for r in page.rows)
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+            self.emit_table(rows[:self.args.limit], ["id", "name", "workspaces", "created_at", "path"])
+            return
+        projects = [self._project(self.args.project)] if self.args.project else self.service.get_projects()
+        rows = [{"id": w.id, "name": w.name, "project": p.name,
+                 "created_at": w.created_at.strftime("%Y-%m-%d %H:%M:%S"), "path": str(w.path)}
+                for p in projects for w in p.workspaces]
+        self.emit_table(rows, ["id", "name", "project", "created_at", "path"])
+
+    def create(self):
+        names = _bulk_names(self.args)
+        created = []
+        with self.service.batch():
+            if self.args.what == "project":
+                for line in names:
+                    name, _, desc = line.partition("\t")
+                    project = self.service.create_project(name, desc or self.args.desc)
+                    created.append({"id": project.id, "name": project.name, "path": str(project.path)})
+            else:
+                if not self.args.project:
+                    raise CliError("创建工作区需要 --project")
+                project = self._project(self.args.project)
+                for name in names:
+                    workspace = self.service.create_workspace(project, name)
+                    created.append({"id": workspace.id, "name": workspace.name, "path": str(workspace.path)})
+        if len(created) == 1 or self.args.json:
+            self.emit_table(created, ["id", "name", "path"])
+        else:
+            self.emit(f"已创建 {len(created)} 个{'项目' if self.args.what == 'project' else '工作区'}")
+
+    def delete(self):
+        if self.args.what == "project":
+            entry = self.service.delete_project(self._project(self.args.target))
+        else:
+            project, workspace = self.service.find_workspace(self.args.target)
+            if workspace is None:
+                raise CliError(f"工作区不存在: {self.args.target}")
+            entry = self.service.delete_workspace(project, workspace.id)
+        self.emit(f"已移入回收站: {entry.id}（{entry.purge_after.replace('T', ' ')[:19]} 后清理，"
+                  f"之前可用 trash restore 恢复）")
+
+    def trash(self):
+        trash = self.service.trash
+        if self.args.action == "list":
+            rows = [{"id": e.id, "kind": e.kind, "name": e.name, "deleted_at": e.deleted_at.replace("T", " ")[:19],
+                     "origin": e.origin} for e in trash.entries()]
+            self.emit_table(rows, ["id", "kind", "name", "deleted_at", "origin"])
+        elif self.args.action == "restore":
+            if not self.args.entry:
+                raise CliError("需要提供回收站条目 id")
+            try:
+                project = self.service.restore_deleted(self.args.entry)
+            except ValueError as e:
+                raise CliError(str(e))
+            self.emit(str(project.path))
+        else:
+            from app_core.trash import PURGE_RATE
+            trash.recover()
+            done = trash.purge_due(force=self.args.all, rate=self.args.rate or PURGE_RATE)
+            self.emit(f"回收站: 清理 {done} 项")
+
+    def query(self):
+        from app_core.experiment_index import ExperimentIndex
+        index = ExperimentIndex(self._workspace(self.args.workspace).path)
+        index.refresh()
+        columns = self.args.columns.split(",") if self.args.columns else None
+        try:
+            result = index.query(self.args.filter or None, self.args.sort, self.args.descending,
+                                 self.args.offset, self.args.limit, columns)
+        except (KeyError, ValueError) as e:
+            raise CliError(e.args[0] if e.args else str(e))
+        if not self.args.json:
+            self.emit(f"# 共 {result.total} 条")
+        self.emit_table(result.rows, result.columns)
+
+    def export(self):
+        from app_core import archive
+        output = Path(self.args.output)
+        if self.args.what == "project":
+            path = archive.export_project(self._project(self.args.target), output)
+        elif self.args.what == "workspace":
+            path = archive.export_workspace(self._workspace(self.args.target), output)
+        else:
+            path = archive.export_dataset(Path(self.args.target), output)
+        self.emit(str(path))
+
+    def du(self):
+        from app_core.disk_usage import DiskUsageIndex
+        from utils.utils import format_size
+        project = self._project(self.args.project) if self.args.project else None
+        index = DiskUsageIndex(self.project_dir)
+        try:
+            if project:
+                index.usage(project.path)
+            else:
+                index.load_all()
+            # 已有索引的项目加载后还要按目录 mtime 检查一遍，等全部完成
+            index.join()
+            rows = index.largest(self.args.top, tuple(self.args.kind or ("workspace", "dataset", "experiment")))
+        finally:
+            index.close()
+        for row in rows:
+            row["size"] = format_size(row["bytes"])
+        self.emit_table(rows, ["kind", "size", "files", "path"])
+
+    def gc(self):
+        args = self.args
+        if args.cache_max_bytes is not None or args.cache_max_age_days is not None:
+            from app_core.result_cache import ResultCache
+            removed = ResultCache(self.project_dir).evict(args.cache_max_bytes, args.cache_max_age_days)
+            self.emit(f"结果缓存: 淘汰 {len(removed)} 项")
+        if args.keep_best_k is not None or args.keep_last_n is not None or args.max_bytes is not None:
+            from app_core.artifacts import RetentionPolicy, apply_retention
+            if args.keep_best_k is not None and not args.metric:
+                raise CliError("--keep-best-k 需要同时指定 --metric")
+            policy = RetentionPolicy(keep_best_k=args.keep_best_k, keep_last_n=args.keep_last_n,
+                                     max_bytes=args.max_bytes, metric=args.metric, mode=args.mode)
+            workspaces = [self._workspace(args.workspace)] if args.workspace else \
+                [w for p in self.service.get_projects() for w in p.workspaces]
+            freed = sum(apply_retention(w.path, policy) for w in workspaces)
+            self.emit(f"实验产物: 释放 {freed} 字节（{len(workspaces)} 个工作区）")
+        if args.queue:
+            from app_core.scheduler import ExperimentScheduler
+            scheduler = ExperimentScheduler(self.project_dir)
+            before = len(scheduler.jobs)
+            scheduler.remove_finished()
+            self.emit(f"实验队列: 清理 {before - len(scheduler.jobs)} 项")
+
+    def serve(self):
+        from app_core.catalog_server import serve
+        # 服务日志需要看到，不受 -v 影响
+        with redirect_stdout(sys.stderr):
+            if not serve(self.project_dir, self.args.port):
+                raise CliError("本地目录服务已在运行")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(prog="deeplocal", description="deeplocal 项目管理命令行")
+    parser.add_argument("--project-dir", help="项目目录（默认读取 app.yaml）")
+    parser.add_argument("-v", "--verbose", action="store_true", help="日志输出到 stderr")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出结果")
+    # 子命令也接受 --json（deeplocal list --limit 2 --json）；未给出时不覆盖写在子命令之前的 --json
+    output = argparse.ArgumentParser(add_help=False)
+    output.add_argument("--json", action="store_true", default=argparse.SUPPRESS, help="以 JSON 输出结果")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    p = commands.add_parser("list", parents=[output], help="列出项目或工作区")
+    p.add_argument("what", nargs="?", choices=("projects", "workspaces"), default="projects")
+    p.add_argument("--project", help="只列出该项目的工作区（id 或目录名）")
+    p.add_argument("--sort", choices=("created_at", "name", "last_opened"), default="created_at", help="项目排序键")
+    p.add_argument("--asc", action="store_true", help="升序（默认降序）")
+    p.add_argument("--search", help="只列出名称或描述包含该文本的项目")
+    p.add_argument("--limit", type=int, help="最多列出的项目数")
+
+    p = commands.add_parser("create", parents=[output], help="创建项目或工作区，支持批量")
+    p.add_argument("what", choices=("project", "workspace"))
+    p.add_argument("name", nargs="?")
+    p.add_argument("--desc", default="", help="项目描述")
+    p.add_argument("--project", help="工作区所属项目（id 或目录名）")
+    p.add_argument("--count", type=int, default=1, help="批量创建数量，名称追加序号")
+    p.add_argument("--from-file", help="每行一个名称的文件，- 表示 stdin")
+
+    p = commands.add_parser("delete", parents=[output], help="删除项目或工作区（移入回收站，撤销期后后台清理）")
+    p.add_argument("what", choices=("project", "workspace"))
+    p.add_argument("target", help="项目 / 工作区 id")
+
+    p = commands.add_parser("trash", parents=[output], help="回收站：列出、恢复、清理")
+    p.add_argument("action", choices=("list", "restore", "purge"), nargs="?", default="list")
+    p.add_argument("entry", nargs="?", help="restore 的条目 id")
+    p.add_argument("--all", action="store_true", help="purge 时不等撤销期，清理全部条目")
+    p.add_argument("--rate", type=int, help="每秒最多删除的文件数（默认 2000）")
+
+    p = commands.add_parser("query", parents=[output], help="查询工作区中的实验")
+    p.add_argument("workspace", help="工作区 id")
+    p.add_argument("--filter", help='过滤表达式，如 "config.lr<0.01 and status=completed"')
+    p.add_argument("--sort", help="排序列")
+    p.add_argument("--desc", dest="descending", action="store_true", help="降序")
+    p.add_argument("--offset", type=int, default=0)
+    p.add_argument("--limit", type=int, default=50)
+    p.add_argument("--columns", help="逗号分隔的列名")
+
+    p = commands.add_parser("export", parents=[output], help="导出项目、工作区或数据集为 .tar.gz")
+    p.add_argument("what", choices=("project", "workspace", "dataset"))
+    p.add_argument("target", help="项目 / 工作区 id，或数据集目录")
+    p.add_argument("output", help="输出文件路径")
+
+    p = commands.add_parser("du", parents=[output], help="磁盘占用：最大的工作区 / 数据集 / 实验")
+    p.add_argument("--top", type=int, default=20, help="列出的数量")
+    p.add_argument("--kind", action="append", choices=("project", "workspace", "dataset", "experiment"),
+                   help="只列出该类目录，可重复")
+    p.add_argument("--project", help="只统计该项目（id 或目录名）")
+
+    p = commands.add_parser("gc", parents=[output], help="清理结果缓存、实验产物和已结束的队列项")
+    p.add_argument("--cache-max-bytes", type=_parse_size, help="结果缓存总大小上限，如 20G")
+    p.add_argument("--cache-max-age-days", type=float, help="淘汰闲置超过该天数的结果缓存")
+    p.add_argument("--keep-best-k", type=int, help="每个实验保留指标最好的 k 个产物")
+    p.add_argument("--keep-last-n", type=int, help="每个实验保留最近的 n 个产物")
+    p.add_argument("--max-bytes", type=_parse_size, help="每个工作区产物总大小上限")
+    p.add_argument("--metric", default="", help="保留策略使用的指标（--keep-best-k 时必须指定）")
+    p.add_argument("--mode", choices=("max", "min"), default="max")
+    p.add_argument("--workspace", help="只处理该工作区")
+    p.add_argument("--queue", action="store_true", help="清理已结束的队列项")
+
+    p = commands.add_parser("serve", help="运行本地目录服务（JSON-RPC），不启动 GUI")
+    p.add_argument("--port", type=int, help="监听 127.0.0.1 端口，默认使用 Unix 套接字")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    out = sys.stdout
+    with open(os.devnull, "w") as devnull, redirect_stdout(sys.stderr if args.verbose else devnull):
+        try:
+            cli = Cli(args, out)
+            getattr(cli, args.command)()
+        except CliError as e:
+            sys.stderr.write(f"deeplocal: {e}\n")
+            return 1
+        except BrokenPipeError:
+            # 输出被 head 等提前关闭
+            sys.stdout = None
+            return 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+应用配置
+app.yaml 只解析一次：校验并转换为带类型的 AppConfig（不可变），进程内缓存，get_config() 直接返回缓存对象，不读文件。
+文件变化后调用 reload()（GUI 中由 ConfigHub 监视文件触发）：状态未变时立即返回，变化时重新解析，
+返回有变化的字段并通知订阅者；解析或校验失败时保留原配置
+"""
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Callable, List, Optional
+import os
+import threading
+
+from app_core.journal import file_stat
+
+
+DEFAULT_CONFIG_FILE = Path(__file__).resolve().parent.parent / "app.yaml"
+
+
+class ConfigError(ValueError):
+    pass
+
+
+def _text(name: str, value) -> str:
+    if not isinstance(value, str) or not value.strip():
+        raise ConfigError(f"{name} 应为非空字符串: {value!r}")
+    return value
+
+
+def _positive_int(name: str, value) -> int:
+    if isinstance(value, bool) or not isinstance(value, int) or value <= 0:
+        raise ConfigError(f"{name} 应为正整数: {value!r}")
+    return value
+
+
+def _flag(name: str, value) -> bool:
+    if not isinstance(value, bool):
+        raise ConfigError(f"{name} 应为 true 或 false: {value!r}")
+    return value
+
+
+def _port(name: str, value) -> int:
+    if _positive_int(name, value) > 65535:
+        raise ConfigError(f"{name} 应在 1-65535 之间: {value!r}")
+    return value
+
+
+def _seconds(name: str, value) -> float:
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value < 0:
+        raise ConfigError(f"{name} 应为非负数: {value!r}")
+    return float(value)
+
+
+_RULES = {
+    "window_title": _text,
+    "window_width": _positive_int,
+    "window_height": _positive_int,
+    "rpc_server": _flag,
+    "rpc_port": _port,
+    "trash_undo_seconds": _seconds,
+    "debug_memory": _flag,
+}
+
+
+@dataclass(frozen=True)
+class AppConfig:
+    project_dir: Path
+    window_title: str = "deeplocal-gui"
+    window_width: int = 1200
+    window_height: int = 800
+    rpc_server: bool = False            # 本地目录服务（JSON-RPC）
+    rpc_port: Optional[int] = None      # 不设置时使用 Unix 套接字
+    trash_undo_seconds: float = 30.0    # 删除后可撤销的时间
+    debug_memory: bool = False          # 内存调试模式（app_ui.debug_memory）
+    extra: dict = field(default_factory=dict)     # 未声明的键原样保留
+
+    @classmethod
+    def from_dict(cls, data) -> "AppConfig":
+        """校验并转换类型；缺少的可选项取默认值，值为 null 视为未设置"""
+        if not isinstance(data, dict):
+            raise ConfigError("配置文件内容应为键值对")
+        project_dir = _text("project_dir", data.get("project_dir"))
+        values = {"project_dir": Path(os.path.expanduser(project_dir))}
+        for name, rule in _RULES.items():
+            if data.get(name) is not None:
+                values[name] = rule(name, data[name])
+        extra = {k: v for k, v in data.items() if k != "project_dir" and k not in _RULES}
+        return cls(**values, extra=extra)
+
+    def get(self, key: str, default=None):
+        """按名称读取（含未声明的键）"""
+        if key == "project_dir" or key in _RULES:
+            return getattr(self, key)
+        return self.extra.get(key, default)
+
+
+class ConfigService:
+    """
+    配置服务（线程安全）
+
+    用法：
+        service = ConfigService(path)
+        service.config.project_dir          # 缓存的 AppConfig
+        service.subscribe(lambda old, new, changed: ...)
+        service.reload()                    # 文件有变化时重新解析，返回变化的字段
+    """
+
+    def __init__(self, path: Optional[Path] = None):
+        self.path = Path(path or os.environ.get("CONFIG_FILE") or DEFAULT_CONFIG_FILE)
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[AppConfig, AppConfig, List[str]], None]] = []
+        self._stat = file_stat(self.path)
+        self.config = self._read()
+        print(f"[配置] 加载配置: {self.path}")
+
+    def _read(self) -> AppConfig:
+        import yaml
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = yaml.safe_load(f)
+        except OSError as e:
+            raise ConfigError(f"读取配置文件失败: {self.path}, {str(e)}")
+        except yaml.YAMLError as e:
+            raise ConfigError(f"配置文件格式错误: {self.path}, {str(e)}")
+        return AppConfig.from_dict(data)
+
+    def subscribe(self, callback: Callable[[AppConfig, AppConfig, List[str]], None]):
+        """配置变化后调用 callback(旧配置, 新配置, 变化的字段)，在调用 reload() 的线程中执行"""
+        self._listeners.append(callback)
+
+    def reload(self) -> List[str]:
+        """文件状态有变化时重新解析；返回变化的字段，失败时保留原配置并返回空列表"""
+        with self._lock:
+            stat = file_stat(self.path)
+            if stat is None or stat == self._stat:
+                return []
+            try:
+                config = self._read()
+            except ConfigError as e:
+                print(f"[错误] 配置文件无效，保留原配置: {str(e)}")
+                return []
+            self._stat = stat
+            old, self.config = self.config, config
+        changed = [f.name for f in fields(AppConfig) if getattr(old, f.name) != getattr(config, f.name)]
+        if changed:
+            print(f"[配置] 配置已更新: {', '.join(changed)}")
+            for callback in list(self._listeners):
+                callback(old, config, changed)
+        return changed
+
+
+_service: Optional[ConfigService] = None
+_service_lock = threading.Lock()
+
+
+def config_service() -> ConfigService:
+    """进程内共用的配置服务（第一次调用时解析配置文件，文件路径取环境变量 CONFIG_FILE 或仓库根目录 app.yaml）"""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = ConfigService()
+    return _service
+
+
+def get_config() -> AppConfig:
+    """当前配置（缓存的对象，不读文件）"""
+    return (_service or config_service()).config
@@ -0,0 +1,266 @@
+"""
+近似重复图片检测
+感知哈希（pHash，64 位）在进程池中计算并缓存到数据集清单的 phash 列；
+基于多索引哈希（multi-index hashing）对 uint64 数组做向量化的汉明距离搜索，
+报告同一子集内的重复以及跨子集（训练/验证泄漏）、跨数据集的重复
+"""
+from concurrent.futures import ProcessPoolExecutor
+from itertools import combinations
+from typing import Dict, List, Optional, Tuple
+import os
+
+import numpy as np
+
+from app_core.manifest import DatasetManifest
+from app_core.split import load_split
+
+
+HASH_SIZE = 8
+DCT_SIZE = 32
+DEFAULT_MAX_DISTANCE = 4
+
+
+def _dct_matrix(n: int) -> np.ndarray:
+    k = np.arange(n)
+    m = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    m[0] /= np.sqrt(2)
+    return m * np.sqrt(2 / n)
+
+
+_DCT = _dct_matrix(DCT_SIZE)
+_BITS = (np.uint64(1) << np.arange(HASH_SIZE * HASH_SIZE, dtype=np.uint64))
+
+
+def phash_pixels(pixels: np.ndarray) -> int:
+    """对 32x32 灰度图计算 64 位 pHash"""
+    coeffs = _DCT @ pixels.astype(np.float64) @ _DCT.T
+    low = coeffs[:HASH_SIZE, :HASH_SIZE].reshape(-1)
+    bits = low > np.median(low[1:])
+    return int(np.bitwise_or.reduce(_BITS[bits])) if bits.any() else 0
+
+
+def _hash_files(paths: List[str]) -> List[Optional[int]]:
+    """子进程：批量计算图片哈希，失败返回 None"""
+    from PIL import Image
+
+    result = []
+    for path in paths:
+        try:
+            with Image.open(path) as img:
+                pixels = np.asarray(img.convert("L").resize((DCT_SIZE, DCT_SIZE), Image.Resampling.LANCZOS))
+            result.append(phash_pixels(pixels))
+        except Exception:
+            result.append(None)
+    return result
+
+
+def compute_hashes(manifest: DatasetManifest, workers: Optional[int] = None, batch_size: int = 256,
+                   save: bool = True) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算（或复用缓存的）清单中所有图片的 pHash
+
+    缓存按文件 mtime/size 判断是否失效，只重新计算变化的文件
+
+    Returns:
+        (哈希 uint64 数组, 是否有效的布尔数组)
+    """
+    n = len(manifest)
+    paths = [str(p) for p in manifest.paths]
+    mtimes = np.empty(n, dtype=np.int64)
+    sizes = np.empty(n, dtype=np.int64)
+    for i, path in enumerate(paths):
+        try:
+            st = os.stat(manifest.root / path)
+            mtimes[i], sizes[i] = st.st_mtime_ns, st.st_size
+        except OSError:
+            mtimes[i], sizes[i] = -1, -1
+
+    hashes = np.zeros(n, dtype=np.uint64)
+    valid = np.zeros(n, dtype=bool)
+    stale = np.ones(n, dtype=bool)
+    cached = manifest.column("phash")
+    if cached is not None:
+        cached_mtime = manifest.column("phash_mtime")
+        cached_size = manifest.column("phash_size")
+        stale = (cached_mtime != mtimes) | (cached_size != sizes)
+        hashes[~stale] = cached[~stale]
+        valid[~stale] = manifest.column("phash_valid")[~stale]
+
+    todo = np.flatnonzero(stale & (mtimes >= 0))
+    print(f"[操作] 计算图片哈希: {manifest.root}, 总数={n}, 缓存={n - len(todo)}, 计算={len(todo)}")
+    if len(todo):
+        batches = [[str(manifest.root / paths[i]) for i in todo[s:s + batch_size]]
+                   for s in range(0, len(todo), batch_size)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            computed = [h for batch in pool.map(_hash_files, batches) for h in batch]
+        valid[todo] = [h is not None for h in computed]
+        hashes[todo] = np.array([h or 0 for h in computed], dtype=np.uint64)
+
+    if save:
+        manifest.set_column("phash", hashes)
+        manifest.set_column("phash_valid", valid)
+        manifest.set_column("phash_mtime", mtimes)
+        manifest.set_column("phash_size", sizes)
+        manifest.save()
+    return hashes, valid
+
+
+def _popcount(x: np.ndarray) -> np.ndarray:
+    if hasattr(np, "bitwise_count"):
+        return np.bitwise_count(x)
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    return table[x.view(np.uint8)].reshape(len(x), 8).sum(axis=1)
+
+
+def _probe_masks(bits: int, radius: int) -> np.ndarray:
+    """子串内汉明距离不超过 radius 的所有异或掩码"""
+    masks = [0]
+    for r in range(1, radius + 1):
+        for combo in combinations(range(bits), r):
+            masks.append(sum(1 << b for b in combo))
+    return np.array(masks, dtype=np.uint64)
+
+
+def _choose_chunks(n: int, max_distance: int) -> int:
+    """估算每个样本的 查表次数 + 候选数，选代价最小的段数（段宽不超过 24 位）"""
+    best, best_cost = 1, None
+    for chunks in range(3, 9):
+        width = 64 // chunks
+        if width > 24:
+            continue
+        probes = sum(len(list(combinations(range(width), r))) for r in range(max_distance // chunks + 1))
+        cost = chunks * probes * (1 + n / (1 << width))
+        if best_cost is None or cost < best_cost:
+            best, best_cost = chunks, cost
+    return best
+
+
+def find_near_duplicates(hashes: np.ndarray, max_distance: int = DEFAULT_MAX_DISTANCE,
+                         chunks: Optional[int] = None, block_size: int = 1 << 18,
+                         valid: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    查找汉明距离不超过 max_distance 的哈希对
+
+    多索引哈希：64 位切成 chunks 段，若总距离 <= r，则至少有一段距离 <= r // chunks；
+    每段建立 值 -> 区间 的稠密桶表，查询值异或探测掩码后 O(1) 取出候选，最后统一算真实距离过滤。
+    默认按 探测次数 x 桶内样本数 的估算代价选择段数
+
+    Returns:
+        (pairs: (k, 2) int64，满足 i < j；distances: (k,) uint8)
+    """
+    hashes = np.asarray(hashes, dtype=np.uint64)
+    candidates_index = np.flatnonzero(valid) if valid is not None else np.arange(len(hashes))
+    h = hashes[candidates_index]
+    n = len(h)
+    if n < 2:
+        return np.empty((0, 2), dtype=np.int64), np.empty(0, dtype=np.uint8)
+
+    if chunks is None:
+        chunks = _choose_chunks(n, max_distance)
+    widths = [64 // chunks + (1 if c < 64 % chunks else 0) for c in range(chunks)]
+    radius = max_distance // chunks
+    found = []
+    shift = 0
+    for width in widths:
+        keys = ((h >> np.uint64(shift)) & np.uint64((1 << width) - 1)).astype(np.int64)
+        shift += width
+        # 按段值分桶：starts[v]..starts[v+1] 为该值在 order 中的区间
+        starts = np.concatenate(([0], np.cumsum(np.bincount(keys, minlength=1 << width))))
+        order = np.argsort(keys, kind="stable")
+        for mask in _probe_masks(width, radius).astype(np.int64):
+            for start in range(0, n, block_size):
+                q_idx = np.arange(start, min(start + block_size, n))
+                target = keys[q_idx] ^ mask
+                lo = starts[target]
+                counts = starts[target + 1] - lo
+                total = int(counts.sum())
+                if total == 0:
+                    continue
+                left = np.repeat(q_idx, counts)
+                # 展开每个查询的 [lo, lo + count) 区间
+                run_starts = np.repeat(lo - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+                right = order[run_starts + np.arange(total)]
+                keep = left < right
+                left, right = left[keep], right[keep]
+                close = _popcount(h[left] ^ h[right]) <= max_distance
+                if close.any():
+                    found.append(left[close].astype(np.int64) * n + right[close])
+
+    if not found:
+        return np.empty((0, 2), dtype=np.int64), np.empty(0, dtype=np.uint8)
+    packed = np.unique(np.concatenate(found))
+    left, right = packed // n, packed % n
+    distances = _popcount(h[left] ^ h[right]).astype(np.uint8)
+    pairs = np.stack([candidates_index[left], candidates_index[right]], axis=1).astype(np.int64)
+    return pairs, distances
+
+
+def dedupe_report(manifest: DatasetManifest, split_name: Optional[str] = None,
+                  max_distance: int = DEFAULT_MAX_DISTANCE, workers: Optional[int] = None) -> Dict:
+    """
+    数据集去重报告
+
+    Returns:
+        {
+            "pairs": (k, 2) 样本索引, "distances": (k,),
+            "within": {子集: 重复对数}, "across": {"子集A/子集B": 重复对数}
+        }
+        未指定分割时整个数据集视为一个子集 "all"
+    """
+    hashes, valid = compute_hashes(manifest, workers=workers)
+    pairs, distances = find_near_duplicates(hashes, max_distance, valid=valid)
+
+    subset_of = np.zeros(len(manifest), dtype=np.int64)
+    names = ["all"]
+    if split_name:
+        subsets = load_split(manifest.root, split_name)
+        if subsets is None:
+            raise ValueError(f"分割不存在: {split_name}")
+        names = list(subsets)
+        subset_of[:] = -1
+        for i, name in enumerate(names):
+            subset_of[np.asarray(subsets[name])] = i
+
+    a, b = subset_of[pairs[:, 0]], subset_of[pairs[:, 1]]
+    within, across = {}, {}
+    for i, name in enumerate(names):
+        count = int(((a == i) & (b == i)).sum())
+        if count:
+            within[name] = count
+    for i, j in combinations(range(len(names)), 2):
+        count = int((((a == i) & (b == j)) | ((a == j) & (b == i))).sum())
+        if count:
+            across[f"{names[i]}/{names[j]}"] = count
+    print(f"[操作] 去重完成: {manifest.root}, 重复对={len(pairs)}, 子集内={within}, 跨子集={across}")
+    return {"pairs": pairs, "distances": distances, "subsets": names,
+            "within": within, "across": across}
+
+
+def cross_dataset_duplicates(manifests: List[DatasetManifest], max_distance: int = DEFAULT_MAX_DISTANCE,
+                             workers: Optional[int] = None) -> List[Tuple[int, int, int, int, int]]:
+    """
+    跨数据集的重复
+
+    Returns:
+        [(数据集A序号, 样本A索引, 数据集B序号, 样本B索引, 距离), ...]
+    """
+    all_hashes, all_valid, owner, local = [], [], [], []
+    for k, manifest in enumerate(manifests):
+        hashes, valid = compute_hashes(manifest, workers=workers)
+        all_hashes.append(hashes)
+        all_valid.append(valid)
+        owner.append(np.full(len(hashes), k, dtype=np.int64))
+        local.append(np.arange(len(hashes), dtype=np.int64))
+    if not all_hashes:
+        return []
+    owner = np.concatenate(owner)
+    local = np.concatenate(local)
+    pairs, distances = find_near_duplicates(np.concatenate(all_hashes), max_distance,
+                                            valid=np.concatenate(all_valid))
+    cross = owner[pairs[:, 0]] != owner[pairs[:, 1]]
+    pairs, distances = pairs[cross], distances[cross]
+    print(f"[操作] 跨数据集去重完成: 数据集数={len(manifests)}, 重复对={len(pairs)}")
+    return [
+        (int(owner[i]), int(local[i]), int(owner[j]), int(local[j]), int(d))
+        for (i, j), d in zip(pairs.tolist(), distances.tolist())
+    ]
@@ -0,0 +1,431 @@
+"""
+磁盘占用索引
+每个项目目录树用一次并行 scandir 建立每个目录的占用（目录自身文件的字节数 / 文件数 + 修改时间），
+子树合计常驻内存，详情面板和"最大占用"报告直接读取，不再递归遍历；
+索引保存在 项目目录/disk_usage/<项目目录名>.json，下次启动直接加载。
+之后按事件增量更新：
+    notify(path)  —— 导入、导出、删除、实验结束、登记数据集等操作后调用，重新统计该路径（子树）
+    verify()      —— 比较各目录的 mtime，只重新扫描有增删文件的目录（监视到目录变化或其他进程修改后调用）
+统计的是文件大小（st_size），不跟随符号链接；硬链接（结果缓存）在各自目录分别计入
+"""
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+import heapq
+import json
+import os
+import queue
+import threading
+import weakref
+
+
+USAGE_DIR = "disk_usage"
+PROJECT_FILE = "project.json"
+SCAN_WORKERS = min(32, (os.cpu_count() or 1) * 4)
+# 报告中的目录类别：相对项目目录的路径形如 workspaces/<id>/datasets/<name>
+KINDS = ("project", "workspace", "dataset", "experiment")
+
+_indexes = weakref.WeakSet()
+
+
+def notify(path: Path):
+    """通知本进程中的所有占用索引：path（文件或目录，可以已被删除）有变化"""
+    for index in list(_indexes):
+        index.notify(path)
+
+
+def _join(rel: str, name: str) -> str:
+    return f"{rel}/{name}" if rel else name
+
+
+def _parent(rel: str) -> Optional[str]:
+    if not rel:
+        return None
+    return rel.rsplit("/", 1)[0] if "/" in rel else ""
+
+
+def _kind(rel: str) -> Optional[str]:
+    parts = rel.split("/") if rel else []
+    if not parts:
+        return "project"
+    if parts[0] != "workspaces":
+        return None
+    if len(parts) == 2:
+        return "workspace"
+    if len(parts) == 4 and parts[2] == "datasets":
+        return "dataset"
+    if len(parts) == 4 and parts[2] == "experiments":
+        return "experiment"
+    return None
+
+
+def _scan_dir(path: str):
+    """统计单个目录（不递归）：(自身文件字节数, 文件数, mtime, 子目录名列表)；目录不存在时为 None"""
+    size = files = 0
+    subdirs = []
+    try:
+        mtime = os.stat(path).st_mtime_ns
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append(entry.name)
+                    elif entry.is_file(follow_symlinks=False):
+                        size += entry.stat(follow_symlinks=False).st_size
+                        files += 1
+                except FileNotFoundError:
+                    continue
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    except PermissionError:
+        return 0, 0, 0, []
+    return size, files, mtime, subdirs
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+
+
+class _Tree:
+    """一个项目目录树的索引：dirs 为每个目录自身的 [字节数, 文件数, mtime]，totals 为子树合计 [字节数, 文件数]"""
+
+    def __init__(self, root: Path, index_file: Path):
+        self.root = str(root)
+        self.index_file = index_file
+        self.dirs: Dict[str, list] = {}
+        self.children: Dict[str, set] = {}
+        self.totals: Dict[str, list] = {}
+        self.scanned_at: Optional[str] = None
+
+    def abspath(self, rel: str) -> str:
+        return os.path.join(self.root, rel) if rel else self.root
+
+    def load(self) -> bool:
+        try:
+            with open(self.index_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"[错误] 磁盘占用索引损坏，将重新扫描: {self.index_file}, {str(e)}")
+            return False
+        self.scanned_at = data.get("scanned_at")
+        self.dirs = data["dirs"]
+        self.children = {rel: set() for rel in self.dirs}
+        for rel in self.dirs:
+            parent = _parent(rel)
+            if parent is not None and parent in self.children:
+                self.children[parent].add(rel)
+        self.totals = {}
+        self._sum(self.dirs)
+        return True
+
+    def save(self):
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"root": self.root, "scanned_at": self.scanned_at, "dirs": self.dirs}, f,
+                      ensure_ascii=False, separators=(",", ":"))
+        os.replace(tmp_file, self.index_file)
+
+    def _sum(self, rels):
+        """按深度从深到浅重新计算这些目录的子树合计（子目录的合计须已是最新）"""
+        for rel in sorted(rels, key=lambda r: r.count("/") + bool(r), reverse=True):
+            size, files, _ = self.dirs[rel]
+            for child in self.children[rel]:
+                child_size, child_files = self.totals[child]
+                size += child_size
+                files += child_files
+            self.totals[rel] = [size, files]
+
+    def _propagate(self, rel: str, size: int, files: int):
+        """把子树合计的变化加到各级上层目录"""
+        rel = _parent(rel)
+        while rel is not None and rel in self.totals:
+            self.totals[rel][0] += size
+            self.totals[rel][1] += files
+            rel = _parent(rel)
+
+    def _subtree(self, rel: str) -> List[str]:
+        result, stack = [], [rel]
+        while stack:
+            current = stack.pop()
+            if current in self.dirs:
+                result.append(current)
+                stack.extend(self.children[current])
+        return result
+
+    def replace(self, rel: str, scanned: Dict[str, list]):
+        """用扫描结果替换 rel 子树（scanned 为空表示 rel 已被删除）"""
+        old = self.totals.get(rel, [0, 0])
+        for r in self._subtree(rel):
+            del self.dirs[r], self.children[r], self.totals[r]
+        parent = _parent(rel)
+        if scanned:
+            self.dirs.update(scanned)
+            for r in scanned:
+                self.children[r] = set()
+            for r in scanned:
+                if r != rel:
+                    self.children[_parent(r)].add(r)
+            self._sum(scanned)
+            if parent is not None and parent in self.children:
+                self.children[parent].add(rel)
+        elif parent is not None and parent in self.children:
+            self.children[parent].discard(rel)
+        new = self.totals.get(rel, [0, 0])
+        self._propagate(rel, new[0] - old[0], new[1] - old[1])
+
+    def update_own(self, rel: str, size: int, files: int, mtime: int):
+        old_size, old_files, _ = self.dirs[rel]
+        self.dirs[rel] = [size, files, mtime]
+        self.totals[rel][0] += size - old_size
+        self.totals[rel][1] += files - old_files
+        self._propagate(rel, size - old_size, files - old_files)
+
+
+class DiskUsageIndex:
+    """
+    项目目录的磁盘占用索引；扫描在后台线程进行，查询立即返回内存中的合计
+
+    用法：
+        usage = DiskUsageIndex(projects_dir, on_update=callback)
+        usage.usage(project.path)       # (字节数, 文件数)，尚未建立索引时返回 None 并开始扫描
+        usage.largest(20)               # 占用最大的工作区 / 数据集 / 实验
+        disk_usage.notify(path)         # 任意模块在修改磁盘后调用
+
+    Args:
+        on_update: 某个项目的合计更新后在后台线程中调用，参数为项目目录
+    """
+
+    def __init__(self, projects_dir: Path, on_update: Optional[Callable[[Path], None]] = None,
+                 workers: int = SCAN_WORKERS):
+        self.projects_dir = Path(projects_dir)
+        self.usage_dir = self.projects_dir / USAGE_DIR
+        self.on_update = on_update
+        self._trees: Dict[str, _Tree] = {}
+        self._lock = threading.Lock()
+        self._tasks = queue.Queue()
+        self._queued = set()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="disk-usage-scan")
+        self._thread = threading.Thread(target=self._run, name="disk-usage", daemon=True)
+        self._closed = False
+        self._thread.start()
+        _indexes.add(self)
+
+    def close(self):
+        self._closed = True
+        self._tasks.put(None)
+        self._thread.join(timeout=5)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        _indexes.discard(self)
+
+    # ------------------------------------------------------------ 查询（立即返回）
+
+    def _locate(self, path: Path) -> Optional[Tuple[str, str]]:
+        """路径 -> (项目目录名, 相对项目目录的路径)；不在项目目录中时为 None"""
+        try:
+            parts = Path(path).resolve().relative_to(self.projects_dir.resolve()).parts
+        except ValueError:
+            return None
+        if not parts or parts[0] == USAGE_DIR:
+            return None
+        return parts[0], "/".join(parts[1:])
+
+    def usage(self, path: Path) -> Optional[Tuple[int, int]]:
+        """path（项目 / 工作区 / 数据集等目录）的 (字节数, 文件数)；项目还没有索引时返回 None 并在后台建立"""
+        located = self._locate(path)
+        if located is None:
+            return None
+        folder, rel = located
+        with self._lock:
+            tree = self._trees.get(folder)
+            if tree is not None:
+                total = tree.totals.get(rel)
+                return (total[0], total[1]) if total else (0, 0)
+        self._submit("load", folder)
+        return None
+
+    def largest(self, limit: int = 20, kinds: Tuple[str, ...] = ("workspace", "dataset", "experiment")) -> List[dict]:
+        """已建立索引的项目中占用最大的目录"""
+        with self._lock:
+            candidates = [(total[0], total[1], folder, rel)
+                          for folder, tree in self._trees.items()
+                          for rel, total in tree.totals.items() if _kind(rel) in kinds]
+        top = heapq.nlargest(limit, candidates)
+        return [{"kind": _kind(rel), "path": str(self.projects_dir / folder / rel) if rel else
+                 str(self.projects_dir / folder), "bytes": size, "files": files}
+                for size, files, folder, rel in top]
+
+    # ------------------------------------------------------------ 事件
+
+    def _submit(self, op: str, folder: str, rel: str = ""):
+        key = (op, folder, rel)
+        with self._lock:
+            if key in self._queued:
+                return
+            self._queued.add(key)
+        self._tasks.put(key)
+
+    def notify(self, path: Path):
+        """path 有变化（新增、修改或已删除）：重新统计该路径"""
+        located = self._locate(path)
+        if located is not None:
+            self._submit("notify", *located)
+
+    def verify(self, project_path: Optional[Path] = None):
+        """按目录 mtime 检查变化；不指定项目时检查所有已加载的项目，并加载新出现的项目"""
+        if project_path is not None:
+            located = self._locate(project_path)
+            if located is not None:
+                self._submit("verify", located[0])
+            return
+        with self._lock:
+            folders = list(self._trees)
+        for folder in folders:
+            self._submit("verify", folder)
+
+    def load_all(self):
+        """为所有项目建立或加载索引（命令行报告用）"""
+        if self.projects_dir.exists():
+            for entry in os.scandir(self.projects_dir):
+                if entry.is_dir() and os.path.exists(os.path.join(entry.path, PROJECT_FILE)):
+                    self._submit("load", entry.name)
+
+    def join(self):
+        """等待已提交的任务完成"""
+        self._tasks.join()
+
+    # ------------------------------------------------------------ 后台线程
+
+    def _run(self):
+        handlers = {"load": self._load, "notify": self._notify, "verify": self._verify}
+        dirty = set()
+        while True:
+            task = self._tasks.get()
+            try:
+                if task is None or self._closed:
+                    return
+                with self._lock:
+                    self._queued.discard(task)
+                op, folder, rel = task
+                try:
+                    changed = handlers[op](folder, rel)
+                except Exception as e:
+                    print(f"[错误] 磁盘占用统计失败: {folder}/{rel}, {str(e)}")
+                    continue
+                if changed:
+                    dirty.add(folder)
+                    if self.on_update:
+                        self.on_update(self.projects_dir / folder)
+                # 连续的事件处理完再写索引文件
+                if dirty and self._tasks.empty():
+                    for name in dirty:
+                        if name in self._trees:
+                            self._trees[name].save()
+                    dirty.clear()
+            finally:
+                self._tasks.task_done()
+
+    def _scan(self, tree: _Tree, rel: str) -> Dict[str, list]:
+        """并行扫描 rel 子树：每个目录一个任务，子目录在父目录扫描完后提交"""
+        result = {}
+        pending = {self._pool.submit(_scan_dir, tree.abspath(rel)): rel}
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                current = pending.pop(future)
+                info = future.result()
+                if info is None:
+                    continue
+                size, files, mtime, subdirs = info
+                result[current] = [size, files, mtime]
+                for name in subdirs:
+                    child = _join(current, name)
+                    pending[self._pool.submit(_scan_dir, tree.abspath(child))] = child
+        return result
+
+    def _load(self, folder: str, rel: str = "") -> bool:
+        if folder in self._trees:
+            return False
+        tree = _Tree(self.projects_dir / folder, self.usage_dir / f"{folder}.json")
+        if tree.load():
+            with self._lock:
+                self._trees[folder] = tree
+            # 上次运行之后的变化
+            self._submit("verify", folder)
+            if self.on_update:
+                self.on_update(self.projects_dir / folder)
+            return False
+        started = datetime.now()
+        scanned = self._scan(tree, "")
+        with self._lock:
+            tree.replace("", scanned)
+            tree.scanned_at = started.isoformat()
+            self._trees[folder] = tree
+        total = tree.totals.get("", [0, 0])
+        print(f"[操作] 建立磁盘占用索引: {tree.root}, 目录={len(scanned)}, 文件={total[1]}, 字节={total[0]}, "
+              f"耗时={(datetime.now() - started).total_seconds():.1f}s")
+        return True
+
+    def _notify(self, folder: str, rel: str) -> bool:
+        tree = self._trees.get(folder)
+        if tree is None:
+            # 还没有索引的项目在加载 / 建立索引时自然包含这次变化
+            return False
+        if not os.path.isdir(tree.root):
+            # 整个项目已被删除
+            with self._lock:
+                del self._trees[folder]
+            if tree.index_file.exists():
+                tree.index_file.unlink()
+            return False
+        # 新目录从已索引的上层目录开始；文件或已删除的路径只重新统计所在目录
+        while rel and _parent(rel) not in tree.dirs:
+            rel = _parent(rel)
+        if rel and os.path.isdir(tree.abspath(rel)):
+            scanned = self._scan(tree, rel)
+            with self._lock:
+                tree.replace(rel, scanned)
+            return True
+        self._refresh_dir(tree, _parent(rel) if rel else "")
+        return True
+
+    def _refresh_dir(self, tree: _Tree, rel: str):
+        """重新统计单个目录：更新自身文件，去掉已删除的子目录，扫描新增的子目录"""
+        info = _scan_dir(tree.abspath(rel))
+        if info is None:
+            with self._lock:
+                tree.replace(rel, {})
+            return
+        size, files, mtime, subdirs = info
+        names = {_join(rel, name) for name in subdirs}
+        with self._lock:
+            known = set(tree.children[rel])
+            tree.update_own(rel, size, files, mtime)
+            for child in known - names:
+                tree.replace(child, {})
+        for child in names - known:
+            scanned = self._scan(tree, child)
+            with self._lock:
+                tree.replace(child, scanned)
+
+    def _verify(self, folder: str, rel: str = "") -> bool:
+        tree = self._trees.get(folder)
+        if tree is None:
+            return False
+        with self._lock:
+            rels = list(tree.dirs)
+        mtimes = list(self._pool.map(_mtime, [tree.abspath(r) for r in rels], chunksize=256))
+        changed = [r for r, m in zip(rels, mtimes) if m != tree.dirs[r][2]]
+        # 从浅到深处理；上层目录重新统计时已经去掉了被删除的子目录
+        changed.sort(key=lambda r: r.count("/") + bool(r))
+        for rel in changed:
+            if rel in tree.dirs:
+                self._refresh_dir(tree, rel)
+        if changed:
+            print(f"[操作] 更新磁盘占用索引: {tree.root}, 变化目录={len(changed)}")
+        return bool(changed)
@@ -0,0 +1,117 @@
+"""
+曲线降采样
+EnvelopeBuffer 以固定容量保存一条序列的分桶 (min, max, sum, count)，追加新点只处理新点，
+容量满时相邻两桶合并、桶宽翻倍，因此内存与绘制开销与序列长度无关；
+pixel_envelope 再把桶按像素列合并为 min/max 包络，保证尖峰不会在降采样中丢失
+"""
+from typing import Tuple
+
+import numpy as np
+
+
+class EnvelopeBuffer:
+    """定容分桶序列，只有最后一个桶可能未满"""
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = capacity - capacity % 2
+        self.bucket_size = 1
+        self.n = 0
+        self.total = 0
+        self._step = np.empty(self.capacity, dtype=np.int64)
+        self._min = np.empty(self.capacity, dtype=np.float64)
+        self._max = np.empty(self.capacity, dtype=np.float64)
+        self._sum = np.empty(self.capacity, dtype=np.float64)
+        self._count = np.empty(self.capacity, dtype=np.int64)
+
+    @property
+    def step(self) -> np.ndarray:
+        return self._step[:self.n]
+
+    @property
+    def min(self) -> np.ndarray:
+        return self._min[:self.n]
+
+    @property
+    def max(self) -> np.ndarray:
+        return self._max[:self.n]
+
+    @property
+    def mean(self) -> np.ndarray:
+        return self._sum[:self.n] / self._count[:self.n]
+
+    def clear(self):
+        self.bucket_size = 1
+        self.n = 0
+        self.total = 0
+
+    def extend(self, steps: np.ndarray, values: np.ndarray):
+        """追加新点（steps 递增）"""
+        steps = np.asarray(steps, dtype=np.int64)
+        values = np.asarray(values, dtype=np.float64)
+        self.total += len(values)
+        if self.n == 0:
+            # 首次加载长序列时直接选好桶宽，避免反复合并
+            while len(values) > self.capacity * self.bucket_size:
+                self.bucket_size *= 2
+        while len(values):
+            last = self.n - 1
+            if self.n and self._count[last] < self.bucket_size:
+                take = min(self.bucket_size - int(self._count[last]), len(values))
+                head = values[:take]
+                self._min[last] = np.fmin(self._min[last], np.fmin.reduce(head))
+                self._max[last] = np.fmax(self._max[last], np.fmax.reduce(head))
+                self._sum[last] += head.sum()
+                self._count[last] += take
+                steps, values = steps[take:], values[take:]
+                continue
+            if self.n == self.capacity:
+                self._halve()
+                continue
+            take = min(len(values), (self.capacity - self.n) * self.bucket_size)
+            starts = np.arange(0, take, self.bucket_size)
+            chunk = values[:take]
+            k = len(starts)
+            self._step[self.n:self.n + k] = steps[starts]
+            self._min[self.n:self.n + k] = np.fmin.reduceat(chunk, starts)
+            self._max[self.n:self.n + k] = np.fmax.reduceat(chunk, starts)
+            self._sum[self.n:self.n + k] = np.add.reduceat(chunk, starts)
+            self._count[self.n:self.n + k] = np.diff(np.append(starts, take))
+            self.n += k
+            steps, values = steps[take:], values[take:]
+
+    def _halve(self):
+        """相邻两桶合并，桶宽翻倍"""
+        pairs = self.n // 2
+        odd = self.n % 2
+        for arr, reduce in ((self._min, np.fmin), (self._max, np.fmax)):
+            arr[:pairs] = reduce(arr[0:2 * pairs:2], arr[1:2 * pairs:2])
+        self._sum[:pairs] = self._sum[0:2 * pairs:2] + self._sum[1:2 * pairs:2]
+        self._count[:pairs] = self._count[0:2 * pairs:2] + self._count[1:2 * pairs:2]
+        self._step[:pairs] = self._step[0:2 * pairs:2]
+        if odd:
+            for arr in (self._step, self._min, self._max, self._sum, self._count):
+                arr[pairs] = arr[self.n - 1]
+        self.n = pairs + odd
+        self.bucket_size *= 2
+
+
+def pixel_envelope(step: np.ndarray, low: np.ndarray, high: np.ndarray, mean: np.ndarray,
+                   x0: float, x1: float, width: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    按像素列合并分桶，返回 (列号, min, max, mean)，每列最多一个点
+
+    step 需递增；只保留落在 [x0, x1] 内的桶
+    """
+    lo = int(np.searchsorted(step, x0, side="left"))
+    hi = int(np.searchsorted(step, x1, side="right"))
+    if hi <= lo or width <= 0:
+        empty = np.empty(0)
+        return empty.astype(np.int64), empty, empty, empty
+    span = max(x1 - x0, 1e-12)
+    columns = ((step[lo:hi] - x0) * ((width - 1) / span)).astype(np.int64)
+    starts = np.flatnonzero(np.r_[True, columns[1:] != columns[:-1]])
+    counts = np.diff(np.append(starts, hi - lo))
+    return (columns[starts],
+            np.fmin.reduceat(low[lo:hi], starts),
+            np.fmax.reduceat(high[lo:hi], starts),
+            np.add.reduceat(mean[lo:hi], starts) / counts)
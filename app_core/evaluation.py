@@ -0,0 +1,259 @@
+"""
+分类评估
+训练进程用 PredictionWriter 把逐样本预测追加写入实验目录 eval/<name>/（定长二进制，可内存映射）；
+evaluate() 分块读取，向量化计算混淆矩阵、每类 precision/recall/F1 和基于分数直方图的 PR 曲线，
+内存占用只与分块大小和错分样本数有关；错分样本按混淆矩阵单元格排序保存（CSR 形式），报告页可直接定位某个单元格的样本
+"""
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import os
+
+import numpy as np
+
+from app_core.manifest import save_array
+
+
+EVAL_DIR = "eval"
+META_FILE = "eval.json"
+REPORT_FILE = "report.json"
+LABEL_FILE = "labels.bin"
+PRED_FILE = "pred.bin"
+SCORE_FILE = "scores.bin"
+SAMPLE_FILE = "sample_index.bin"
+CHUNK_SIZE = 1 << 20
+PR_BINS = 1000
+
+
+def eval_dir(experiment_path: Path, name: str = "default") -> Path:
+    return Path(experiment_path) / EVAL_DIR / name
+
+
+class PredictionWriter:
+    """
+    逐样本预测写入器
+
+    用法：
+        writer = PredictionWriter(experiment.path, "val", classes)
+        writer.write(labels, scores=probs, sample_index=idx)   # 每个 batch 调用
+        writer.close()
+    """
+
+    def __init__(self, experiment_path: Path, name: str = "default", classes: Optional[List[str]] = None,
+                 num_classes: Optional[int] = None):
+        self.dir = eval_dir(experiment_path, name)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.classes = list(classes or [])
+        self.num_classes = num_classes or len(self.classes)
+        if not self.num_classes:
+            raise ValueError("需要提供 classes 或 num_classes")
+        self.count = 0
+        self.has_scores = None
+        self.has_sample_index = None
+        # 重新写入时清掉旧结果
+        for file_name in (LABEL_FILE, PRED_FILE, SCORE_FILE, SAMPLE_FILE, REPORT_FILE):
+            if (self.dir / file_name).exists():
+                (self.dir / file_name).unlink()
+        self._files = {}
+
+    def _append(self, file_name: str, values: np.ndarray):
+        f = self._files.get(file_name)
+        if f is None:
+            f = self._files[file_name] = open(self.dir / file_name, "ab")
+        f.write(np.ascontiguousarray(values).tobytes())
+
+    def write(self, labels: np.ndarray, preds: Optional[np.ndarray] = None, scores: Optional[np.ndarray] = None,
+              sample_index: Optional[np.ndarray] = None):
+        """追加一批预测；preds 缺省时取 scores 的 argmax"""
+        labels = np.asarray(labels, dtype=np.int32)
+        if scores is not None:
+            scores = np.asarray(scores, dtype=np.float32).reshape(len(labels), self.num_classes)
+            if preds is None:
+                preds = scores.argmax(axis=1)
+        if preds is None:
+            raise ValueError("需要提供 preds 或 scores")
+        if self.has_scores is None:
+            self.has_scores = scores is not None
+            self.has_sample_index = sample_index is not None
+        if self.has_scores != (scores is not None) or self.has_sample_index != (sample_index is not None):
+            raise ValueError("每批提供的字段必须一致")
+        self._append(LABEL_FILE, labels)
+        self._append(PRED_FILE, np.asarray(preds, dtype=np.int32))
+        if scores is not None:
+            self._append(SCORE_FILE, scores)
+        if sample_index is not None:
+            self._append(SAMPLE_FILE, np.asarray(sample_index, dtype=np.int64))
+        self.count += len(labels)
+
+    def close(self):
+        for f in self._files.values():
+            f.close()
+        self._files = {}
+        meta = {
+            "count": self.count,
+            "num_classes": self.num_classes,
+            "classes": self.classes,
+            "has_scores": bool(self.has_scores),
+            "has_sample_index": bool(self.has_sample_index)
+        }
+        tmp_file = self.dir / (META_FILE + ".tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.dir / META_FILE)
+        print(f"[操作] 保存预测结果: {self.dir}, 样本数={self.count}")
+
+
+class Predictions:
+    """内存映射读取 PredictionWriter 写入的预测"""
+
+    def __init__(self, directory: Path):
+        self.dir = Path(directory)
+        with open(self.dir / META_FILE, "r", encoding="utf-8") as f:
+            self.meta = json.load(f)
+        self.count = self.meta["count"]
+        self.num_classes = self.meta["num_classes"]
+        self.classes = self.meta.get("classes") or [str(i) for i in range(self.num_classes)]
+        self.labels = self._map(LABEL_FILE, np.int32)
+        self.preds = self._map(PRED_FILE, np.int32)
+        self.scores = self._map(SCORE_FILE, np.float32, (self.count, self.num_classes)) if self.meta["has_scores"] else None
+        self.sample_index = self._map(SAMPLE_FILE, np.int64) if self.meta["has_sample_index"] else None
+
+    def _map(self, file_name: str, dtype, shape=None) -> np.ndarray:
+        if self.count == 0:
+            return np.empty(shape or (0,), dtype=dtype)
+        return np.memmap(self.dir / file_name, dtype=dtype, mode="r", shape=shape or (self.count,))
+
+
+def _pr_curve(positives: np.ndarray, totals: np.ndarray, num_positive: int) -> Dict[str, list]:
+    """由分数直方图（低分到高分）计算 PR 曲线与平均精度"""
+    tp = np.cumsum(positives[::-1])
+    predicted = np.cumsum(totals[::-1])
+    keep = predicted > 0
+    precision = tp[keep] / predicted[keep]
+    recall = tp[keep] / max(num_positive, 1)
+    thresholds = (np.arange(len(totals))[::-1] / len(totals))[keep]
+    ap = float(np.sum(np.diff(np.concatenate([[0.0], recall])) * precision))
+    return {
+        "precision": precision.round(6).tolist(),
+        "recall": recall.round(6).tolist(),
+        "thresholds": thresholds.round(6).tolist(),
+        "ap": ap
+    }
+
+
+def evaluate(directory: Path, chunk_size: int = CHUNK_SIZE, pr_bins: int = PR_BINS) -> dict:
+    """
+    分块计算评估指标并写入 report.json、confusion.npy 与错分样本索引
+
+    Returns:
+        报告字典（accuracy、macro 指标、每类指标、PR 曲线）
+    """
+    data = Predictions(directory)
+    k = data.num_classes
+    confusion = np.zeros(k * k, dtype=np.int64)
+    pos_hist = np.zeros(k * pr_bins, dtype=np.int64)
+    all_hist = np.zeros(k * pr_bins, dtype=np.int64)
+    class_offsets = np.arange(k, dtype=np.int64) * pr_bins
+    error_index, error_cell = [], []
+
+    for start in range(0, data.count, chunk_size):
+        stop = min(start + chunk_size, data.count)
+        labels = np.asarray(data.labels[start:stop], dtype=np.int64)
+        preds = np.asarray(data.preds[start:stop], dtype=np.int64)
+        valid = (labels >= 0) & (labels < k) & (preds >= 0) & (preds < k)
+        cells = labels * k + preds
+        confusion += np.bincount(cells[valid], minlength=k * k)
+        wrong = np.flatnonzero(valid & (labels != preds))
+        error_index.append(wrong + start)
+        error_cell.append(cells[wrong])
+        if data.scores is not None:
+            scores = np.asarray(data.scores[start:stop])
+            bins = np.clip((scores * pr_bins).astype(np.int64), 0, pr_bins - 1) + class_offsets
+            all_hist += np.bincount(bins[valid].ravel(), minlength=k * pr_bins)
+            positive_bins = bins[valid][np.arange(int(valid.sum())), labels[valid]]
+            pos_hist += np.bincount(positive_bins, minlength=k * pr_bins)
+
+    matrix = confusion.reshape(k, k)
+    tp = np.diag(matrix).astype(np.float64)
+    support = matrix.sum(axis=1)
+    predicted = matrix.sum(axis=0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        precision = np.where(predicted > 0, tp / predicted, 0.0)
+        recall = np.where(support > 0, tp / support, 0.0)
+        f1 = np.where(precision + recall > 0, 2 * precision * recall / (precision + recall), 0.0)
+    total = int(matrix.sum())
+    present = support > 0
+    report = {
+        "count": total,
+        "accuracy": float(tp.sum() / total) if total else 0.0,
+        "macro_precision": float(precision[present].mean()) if present.any() else 0.0,
+        "macro_recall": float(recall[present].mean()) if present.any() else 0.0,
+        "macro_f1": float(f1[present].mean()) if present.any() else 0.0,
+        "per_class": [
+            {"class": data.classes[c], "precision": float(precision[c]), "recall": float(recall[c]),
+             "f1": float(f1[c]), "support": int(support[c])}
+            for c in range(k)
+        ]
+    }
+    if data.scores is not None:
+        pos = pos_hist.reshape(k, pr_bins)
+        alls = all_hist.reshape(k, pr_bins)
+        report["pr_curves"] = {data.classes[c]: _pr_curve(pos[c], alls[c], int(support[c])) for c in range(k)}
+        aps = [report["pr_curves"][data.classes[c]]["ap"] for c in range(k) if present[c]]
+        report["mean_ap"] = float(np.mean(aps)) if aps else 0.0
+
+    # 错分样本按单元格排序，offsets[t * k + p] 起为真实类 t 被预测为 p 的样本
+    error_index = np.concatenate(error_index) if error_index else np.empty(0, dtype=np.int64)
+    error_cell = np.concatenate(error_cell) if error_cell else np.empty(0, dtype=np.int64)
+    order = np.argsort(error_cell, kind="stable")
+    offsets = np.zeros(k * k + 1, dtype=np.int64)
+    np.cumsum(np.bincount(error_cell, minlength=k * k), out=offsets[1:])
+    save_array(data.dir / "confusion.npy", matrix)
+    save_array(data.dir / "errors.npy", error_index[order])
+    save_array(data.dir / "error_offsets.npy", offsets)
+    tmp_file = data.dir / (REPORT_FILE + ".tmp")
+    with open(tmp_file, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False)
+    os.replace(tmp_file, data.dir / REPORT_FILE)
+    print(f"[操作] 评估完成: {data.dir}, 样本数={total}, accuracy={report['accuracy']:.4f}")
+    return report
+
+
+def load_report(directory: Path) -> Optional[dict]:
+    report_file = Path(directory) / REPORT_FILE
+    if not report_file.exists():
+        return None
+    with open(report_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def misclassified(directory: Path, true_class: Optional[int] = None, pred_class: Optional[int] = None,
+                  offset: int = 0, limit: int = 100) -> Dict[str, np.ndarray]:
+    """
+    错分样本分页：可按真实类别和/或预测类别筛选
+
+    Returns:
+        {"index": 预测文件中的行号, "label", "pred", "sample_index"（若有）, "scores"（若有）}
+    """
+    data = Predictions(directory)
+    k = data.num_classes
+    errors = np.load(data.dir / "errors.npy", mmap_mode="r")
+    offsets = np.load(data.dir / "error_offsets.npy")
+    if true_class is not None and pred_class is not None:
+        cell = true_class * k + pred_class
+        rows = errors[offsets[cell]:offsets[cell + 1]]
+    elif true_class is not None:
+        # 同一真实类别的单元格连续存放
+        rows = errors[offsets[true_class * k]:offsets[(true_class + 1) * k]]
+    elif pred_class is not None:
+        rows = np.sort(np.concatenate([errors[offsets[t * k + pred_class]:offsets[t * k + pred_class + 1]]
+                                       for t in range(k)]))
+    else:
+        rows = errors
+    page = np.asarray(rows[offset:offset + limit])
+    result = {"index": page, "label": np.asarray(data.labels[page]), "pred": np.asarray(data.preds[page])}
+    if data.sample_index is not None:
+        result["sample_index"] = np.asarray(data.sample_index[page])
+    if data.scores is not None:
+        result["scores"] = np.asarray(data.scores[page])
+    return result
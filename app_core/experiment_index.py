@@ -0,0 +1,414 @@
+"""
+实验查询索引
+把工作区下每个实验的 config / results 展开为列（config.lr、results.val_acc ...），
+数值列存为 float64（缺失为 NaN），其余存为字符串；过滤、排序、分页都在列数组上向量化完成。
+索引按 experiment.json 的 mtime 增量刷新：只改动变化的行在各列中的值，变化追加到 experiments/index.journal
+（格式与项目操作日志相同），日志超过阈值时再写 experiments/index.json 快照，启动时不必逐个解析
+"""
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import os
+import re
+import threading
+
+import numpy as np
+
+from app_core import journal
+from app_core.journal import dir_lock, file_stat, read_records
+
+
+EXPERIMENTS_DIR = "experiments"
+INDEX_FILE = "index.json"
+INDEX_JOURNAL = "index.journal"
+EXPERIMENT_FILE = "experiment.json"
+META_FIELDS = ("id", "name", "status", "dataset_id", "created_at")
+FLATTEN_FIELDS = ("config", "results")
+OPERATORS = ("<=", ">=", "==", "!=", "<", ">", "=", "~")
+
+_CONDITION = re.compile(r"^\s*([\w.\-]+)\s*(<=|>=|==|!=|<|>|=|~)\s*(.+?)\s*$")
+_SEPARATOR = re.compile(r"\s+and\s+|,", re.IGNORECASE)
+
+
+def flatten(data: Dict[str, Any], prefix: str = "") -> Dict[str, Any]:
+    """嵌套字典展开为点分键；列表等非标量转为 JSON 字符串"""
+    out = {}
+    for key, value in data.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            out.update(flatten(value, name + "."))
+        elif isinstance(value, (list, tuple)):
+            out[name] = json.dumps(value, ensure_ascii=False)
+        else:
+            out[name] = value
+    return out
+
+
+def flatten_experiment(data: Dict[str, Any]) -> Dict[str, Any]:
+    row = {field: data.get(field, "") for field in META_FIELDS}
+    for field in FLATTEN_FIELDS:
+        row.update(flatten(data.get(field) or {}, field + "."))
+    return row
+
+
+def _parse_value(text: str) -> Any:
+    if len(text) >= 2 and text[0] == text[-1] and text[0] in "'\"":
+        return text[1:-1]
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+
+def parse_filter(text: str) -> List[Tuple[str, str, Any]]:
+    """
+    解析过滤表达式，如 "lr<1e-3 and status==completed"、"model~resnet, epochs>=10"
+
+    条件之间用 and 或逗号分隔；~ 表示包含子串
+    """
+    conditions = []
+    for part in _SEPARATOR.split(text or ""):
+        if not part.strip():
+            continue
+        match = _CONDITION.match(part)
+        if not match:
+            raise ValueError(f"无法解析的过滤条件: {part.strip()}")
+        column, op, value = match.groups()
+        conditions.append((column, "==" if op == "=" else op, _parse_value(value)))
+    return conditions
+
+
+@dataclass
+class QueryResult:
+    total: int
+    columns: List[str]
+    rows: List[Dict[str, Any]]
+
+
+def _is_missing(value: Any) -> bool:
+    return value is None or value == ""
+
+
+def _is_text(value: Any) -> bool:
+    return not _is_missing(value) and not isinstance(value, (int, float))
+
+
+class _Column:
+    """一列：数值列为 float64 数组，其余为字符串数组，missing 标记缺失；出现非数值的值后整列转为字符串"""
+
+    def __init__(self, values: List[Any]):
+        self.missing = np.array([_is_missing(v) for v in values], dtype=bool)
+        self.text = np.array([_is_text(v) for v in values], dtype=bool)
+        self.numeric = not self.text.any()
+        self.values = self._convert(values, self.numeric)
+
+    @staticmethod
+    def _convert(values: List[Any], numeric: bool) -> np.ndarray:
+        if numeric:
+            return np.array([np.nan if _is_missing(v) else float(v) for v in values], dtype=np.float64)
+        return np.array(["" if v is None else str(v) for v in values], dtype=object)
+
+    def set(self, i: int, value: Any) -> bool:
+        """修改第 i 行；列的类型（数值 / 字符串）因此改变时不修改并返回 False，由调用方重建该列"""
+        text = _is_text(value)
+        if (int(self.text.sum()) - int(self.text[i]) + int(text) == 0) != self.numeric:
+            return False
+        self.missing[i], self.text[i] = _is_missing(value), text
+        self.values[i] = self._convert([value], self.numeric)[0]
+        return True
+
+    def extend(self, values: List[Any]) -> bool:
+        """追加若干行；列的类型因此改变时不追加并返回 False"""
+        text = np.array([_is_text(v) for v in values], dtype=bool)
+        if self.numeric and text.any():
+            return False
+        self.missing = np.concatenate([self.missing, np.array([_is_missing(v) for v in values], dtype=bool)])
+        self.text = np.concatenate([self.text, text])
+        self.values = np.concatenate([self.values, self._convert(values, self.numeric)])
+        return True
+
+    def mask(self, op: str, value: Any) -> np.ndarray:
+        if op == "~":
+            needle = str(value).lower()
+            return np.array([needle in str(v).lower() for v in self.values.tolist()], dtype=bool) & ~self.missing
+        if self.numeric and isinstance(value, float):
+            target, values = value, self.values
+        else:
+            target = value if isinstance(value, str) else _format_number(value)
+            values = self.values if not self.numeric else np.array([_format_number(v) for v in self.values.tolist()],
+                                                                   dtype=object)
+        with np.errstate(invalid="ignore"):
+            result = {
+                "<": lambda: values < target, "<=": lambda: values <= target,
+                ">": lambda: values > target, ">=": lambda: values >= target,
+                "==": lambda: values == target, "!=": lambda: values != target,
+            }[op]()
+        return np.asarray(result, dtype=bool) & ~self.missing
+
+    def order(self, rows: np.ndarray, descending: bool) -> np.ndarray:
+        """rows 按本列排序，缺失值始终排在最后"""
+        present = rows[~self.missing[rows]]
+        absent = rows[self.missing[rows]]
+        keys = self.values[present]
+        order = np.argsort(-keys if descending and self.numeric else keys, kind="stable")
+        if descending and not self.numeric:
+            order = order[::-1]
+        return np.concatenate([present[order], absent])
+
+
+def _format_number(value: float) -> str:
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+class ExperimentIndex:
+    """
+    工作区实验索引（线程安全，refresh 可在后台线程执行）
+
+    用法：
+        index = ExperimentIndex(workspace.path)
+        index.refresh()
+        result = index.query("lr<1e-3", sort="val_acc", descending=True, limit=1)
+    """
+
+    def __init__(self, workspace_path: Path):
+        self.dir = Path(workspace_path) / EXPERIMENTS_DIR
+        self.index_file = self.dir / INDEX_FILE
+        self.journal_file = self.dir / INDEX_JOURNAL
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._mtimes: Dict[str, int] = {}
+        # 列数组中的行顺序：_ids[i] 为第 i 行的实验 id，_pos 为反向映射
+        self._ids: List[str] = []
+        self._pos: Dict[str, int] = {}
+        self._columns: Optional[Dict[str, _Column]] = None
+        # 上次读写后 index.json 的状态与已读取到的日志偏移（多个索引对象共用同一工作区时据此合并）
+        self._synced_stat: Optional[tuple] = None
+        self._journal_end = 0
+        self._lock = threading.RLock()
+        self._catch_up()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # ------------------------------------------------------------ 维护
+
+    def _catch_up(self):
+        """读取其他索引对象写入的变化：快照变了则重新加载，再应用日志中的新记录"""
+        stat = file_stat(self.index_file)
+        if stat != self._synced_stat:
+            data = {}
+            if stat is not None:
+                try:
+                    with open(self.index_file, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                except (OSError, ValueError) as e:
+                    print(f"[错误] 实验索引损坏，将重新建立: {self.index_file}, {str(e)}")
+            self._rows = {k: item["row"] for k, item in data.items()}
+            self._mtimes = {k: item["mtime"] for k, item in data.items()}
+            self._columns = None
+            self._synced_stat = stat
+            self._journal_end = 0
+        records, self._journal_end = read_records(self.journal_file, self._journal_end)
+        self._apply(records)
+
+    def _commit(self, records: List[dict]):
+        """追加到索引日志并应用；日志超过阈值时写新快照"""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with self._lock, dir_lock(self.dir):
+            self._catch_up()
+            self._apply(records)
+            self._journal_end = journal.append_records(self.journal_file, records, self._journal_end)
+            if self._journal_end > max(journal.COMPACT_MIN_BYTES, (self._synced_stat or (0, 0, 0))[2]):
+                self._write_snapshot()
+
+    def _write_snapshot(self):
+        tmp_file = self.index_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({k: {"mtime": self._mtimes[k], "row": row} for k, row in self._rows.items()}, f,
+                      ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.index_file)
+        journal.reset(self.journal_file)
+        self._synced_stat = file_stat(self.index_file)
+        self._journal_end = 0
+
+    def _apply(self, records: List[dict]):
+        """应用 put / remove 记录；列数组已建立时只改动变化的行，新增的行一次性追加到各列末尾"""
+        added: Dict[str, None] = {}
+        removed = False
+        for record in records:
+            experiment_id = record["id"]
+            if record["op"] == "remove":
+                if self._rows.pop(experiment_id, None) is not None:
+                    del self._mtimes[experiment_id]
+                    removed = True
+                continue
+            old = self._rows.get(experiment_id)
+            self._rows[experiment_id] = record["row"]
+            self._mtimes[experiment_id] = record["mtime"]
+            if self._columns is None:
+                continue
+            if experiment_id in self._pos:
+                self._set_row(self._pos[experiment_id], old or {}, record["row"])
+            else:
+                added[experiment_id] = None
+        if self._columns is None:
+            return
+        if removed:
+            # 删除实验很少见，下次查询时整体重建
+            self._columns = None
+            return
+        if added:
+            self._append_rows(list(added))
+
+    def _rebuild_column(self, name: str):
+        values = [self._rows[k].get(name) for k in self._ids]
+        if all(_is_missing(v) for v in values):
+            self._columns.pop(name, None)
+        else:
+            self._columns[name] = _Column(values)
+
+    def _set_row(self, i: int, old: Dict[str, Any], new: Dict[str, Any]):
+        for name in old.keys() | new.keys():
+            value = new.get(name)
+            if value == old.get(name) and type(value) is type(old.get(name)):
+                continue
+            column = self._columns.get(name)
+            if column is None:
+                column = self._columns[name] = _Column([None] * len(self._ids))
+            if not column.set(i, value) or (_is_missing(value) and column.missing.all()):
+                self._rebuild_column(name)
+
+    def _append_rows(self, ids: List[str]):
+        rows = [self._rows[k] for k in ids]
+        names = set(self._columns)
+        for row in rows:
+            names.update(row)
+        self._pos.update((k, len(self._ids) + i) for i, k in enumerate(ids))
+        count = len(self._ids)
+        self._ids.extend(ids)
+        for name in names:
+            values = [row.get(name) for row in rows]
+            column = self._columns.get(name)
+            if column is None:
+                if not all(_is_missing(v) for v in values):
+                    self._columns[name] = _Column([None] * count + values)
+            elif not column.extend(values):
+                self._rebuild_column(name)
+
+    def refresh(self) -> List[str]:
+        """
+        按 experiment.json 的 mtime 增量更新，返回有变化的实验 id；
+        逐个 stat 的目录扫描不持有锁，在后台线程刷新时查询不必等待
+        """
+        with self._lock:
+            self._catch_up()
+            known = dict(self._mtimes)
+        records = []
+        seen = set()
+        if self.dir.exists():
+            for entry in os.scandir(self.dir):
+                if not entry.is_dir():
+                    continue
+                try:
+                    mtime = os.stat(entry.path + os.sep + EXPERIMENT_FILE).st_mtime_ns
+                except FileNotFoundError:
+                    continue
+                seen.add(entry.name)
+                if known.get(entry.name) != mtime:
+                    record = self._read(Path(entry.path), mtime)
+                    if record:
+                        records.append(record)
+        changed = len(records)
+        records += [{"op": "remove", "id": k} for k in known if k not in seen]
+        if records:
+            self._commit(records)
+            print(f"[操作] 更新实验索引: {self.dir}, 变化={changed}, 删除={len(records) - changed}, "
+                  f"总数={len(self._rows)}")
+        return [r["id"] for r in records]
+
+    def update(self, experiment_path: Path):
+        """单个实验状态变化（如训练结束）后更新索引"""
+        experiment_path = Path(experiment_path)
+        try:
+            mtime = (experiment_path / EXPERIMENT_FILE).stat().st_mtime_ns
+        except FileNotFoundError:
+            return
+        record = self._read(experiment_path, mtime)
+        if record:
+            self._commit([record])
+
+    def _read(self, experiment_path: Path, mtime: int) -> Optional[dict]:
+        try:
+            with open(experiment_path / EXPERIMENT_FILE, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            # 正在写入或已损坏，下次刷新再读
+            return None
+        return {"op": "put", "id": data.get("id") or experiment_path.name, "mtime": mtime,
+                "row": flatten_experiment(data)}
+
+    # ------------------------------------------------------------ 查询
+
+    def _build(self) -> Dict[str, _Column]:
+        if self._columns is None:
+            self._ids = list(self._rows)
+            self._pos = {k: i for i, k in enumerate(self._ids)}
+            rows = [self._rows[k] for k in self._ids]
+            names = set()
+            for row in rows:
+                names.update(row)
+            self._columns = {name: _Column([row.get(name) for row in rows]) for name in names}
+        return self._columns
+
+    def columns(self) -> List[str]:
+        """列名：元信息列在前，其余按字母序"""
+        with self._lock:
+            names = self._build()
+        extra = sorted(n for n in names if n not in META_FIELDS)
+        return [n for n in META_FIELDS if n in names] + extra
+
+    def resolve(self, column: str) -> str:
+        """列名解析：允许省略 config./results. 前缀，如 lr -> config.lr"""
+        with self._lock:
+            names = self._build()
+        if column in names:
+            return column
+        candidates = [n for n in names if n.endswith("." + column)]
+        if len(candidates) == 1:
+            return candidates[0]
+        if not candidates:
+            raise KeyError(f"未知列: {column}")
+        raise KeyError(f"列名不唯一: {column} ({', '.join(sorted(candidates))})")
+
+    def query(self, filters: Any = None, sort: Optional[str] = None, descending: bool = False,
+              offset: int = 0, limit: Optional[int] = 100, columns: Optional[List[str]] = None) -> QueryResult:
+        """
+        过滤、排序并分页
+
+        Args:
+            filters: 过滤表达式字符串（见 parse_filter）或 (列, 运算符, 值) 列表
+            sort: 排序列，缺失值排在最后
+            columns: 返回的列，默认全部
+        """
+        if isinstance(filters, str):
+            filters = parse_filter(filters)
+        with self._lock:
+            names = self._build()
+            mask = np.ones(len(self._ids), dtype=bool)
+            for column, op, value in filters or []:
+                if op not in OPERATORS:
+                    raise ValueError(f"不支持的运算符: {op}")
+                mask &= names[self.resolve(column)].mask("==" if op == "=" else op, value)
+            rows = np.flatnonzero(mask)
+            if sort:
+                rows = names[self.resolve(sort)].order(rows, descending)
+            end = None if limit is None else offset + limit
+            page = rows[offset:end].tolist()
+            selected = [self.resolve(c) for c in columns] if columns else self.columns()
+            return QueryResult(
+                total=len(rows),
+                columns=selected,
+                rows=[{c: self._rows[self._ids[i]].get(c) for c in selected} for i in page]
+            )
@@ -0,0 +1,159 @@
+"""
+追加式操作日志
+project.json 是快照，之后的结构变化（新增 / 删除工作区等）作为小记录追加到同目录的 project.journal，
+写入代价只与变化大小有关；日志超过阈值时由 Project.save 写新快照并清空日志。
+每行一条记录："<crc32 十六进制> <JSON>"，读取时校验，遇到不完整或损坏的记录即停止（崩溃时最后一条可能只写了一半），
+下次追加前截断到最后一条有效记录之后。
+fsync 批量进行：追加只写入系统缓冲，后台线程每 FSYNC_INTERVAL 秒统一落盘一次；需要立即落盘时传 sync=True
+"""
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Optional, Tuple
+import atexit
+import json
+import os
+import threading
+import time
+import zlib
+
+
+JOURNAL_FILE = "project.journal"
+FSYNC_INTERVAL = 0.05
+# 日志超过该大小且超过快照大小时压缩，摊还后每条记录的写入代价为常数
+COMPACT_MIN_BYTES = 256 * 1024
+
+
+def file_stat(path: Path) -> Optional[tuple]:
+    """(inode, mtime, size)，文件不存在时为 None；inode 或 mtime 变化说明文件被替换或改写"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return st.st_ino, st.st_mtime_ns, st.st_size
+
+
+@contextmanager
+def dir_lock(path: Path):
+    """对目录加进程间建议锁（flock），多个应用实例或脚本同时写入时串行化；无 fcntl 的平台不加锁"""
+    try:
+        import fcntl
+    except ImportError:
+        yield
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(fd)
+
+
+def encode_record(record: dict) -> bytes:
+    payload = json.dumps(record, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    return b"%08x " % zlib.crc32(payload) + payload + b"\n"
+
+
+def read_records(path: Path, offset: int = 0) -> Tuple[List[dict], int]:
+    """
+    从 offset 开始读取有效记录
+
+    Returns:
+        (记录列表, 最后一条有效记录之后的偏移)
+    """
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            data = f.read()
+    except FileNotFoundError:
+        return [], 0
+    records = []
+    end = offset
+    for line in data.splitlines(keepends=True):
+        if not line.endswith(b"\n") or len(line) < 10 or line[8:9] != b" ":
+            break
+        payload = line[9:-1]
+        try:
+            if int(line[:8], 16) != zlib.crc32(payload):
+                break
+            records.append(json.loads(payload))
+        except ValueError:
+            break
+        end += len(line)
+    return records, end
+
+
+class _Flusher:
+    """后台批量 fsync：同一周期内多次追加只落盘一次"""
+
+    def __init__(self):
+        self._dirty = set()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def mark(self, path: Path):
+        with self._cond:
+            self._dirty.add(str(path))
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="journal-fsync", daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._dirty:
+                    self._cond.wait()
+            time.sleep(FSYNC_INTERVAL)
+            self.flush()
+
+    def flush(self):
+        with self._cond:
+            dirty, self._dirty = self._dirty, set()
+        for path in dirty:
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+
+_flusher = _Flusher()
+atexit.register(_flusher.flush)
+
+
+def append_records(path: Path, records: List[dict], valid_end: int, sync: bool = False) -> int:
+    """
+    追加记录（调用方持有项目目录锁），先截掉 valid_end 之后的残缺数据
+
+    Returns:
+        追加后的文件末尾偏移
+    """
+    data = b"".join(encode_record(r) for r in records)
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT, 0o644)
+    try:
+        if os.fstat(fd).st_size != valid_end:
+            print(f"[操作] 截断操作日志中的残缺记录: {path}, 偏移={valid_end}")
+            os.ftruncate(fd, valid_end)
+        os.lseek(fd, valid_end, os.SEEK_SET)
+        os.write(fd, data)
+        if sync:
+            os.fsync(fd)
+    finally:
+        os.close(fd)
+    if not sync:
+        _flusher.mark(path)
+    return valid_end + len(data)
+
+
+def reset(path: Path):
+    """快照写入后清空日志"""
+    with open(path, "wb") as f:
+        os.fsync(f.fileno())
+
+
+def flush():
+    """立即落盘所有待 fsync 的日志"""
+    _flusher.flush()
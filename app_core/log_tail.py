@@ -0,0 +1,269 @@
+"""
+训练日志跟随
+按偏移量只读取新增字节，最近 N 行保存在环形缓冲中；
+读取时顺带建立稀疏行偏移索引（每 INDEX_EVERY 行记录一次字节偏移），
+查看早期内容时从最近的索引点 seek 读取，不必加载整个文件；
+Linux 下用 inotify 等待文件变化，其他平台退回定时 stat 轮询
+"""
+from collections import OrderedDict, deque
+from pathlib import Path
+from typing import List, Optional
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import time
+
+import numpy as np
+
+
+INDEX_EVERY = 1024
+READ_CHUNK = 1 << 20
+# GUI 中每次读取的字节数上限
+READ_BUDGET = 8 << 20
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+class _Inotify:
+    """最小的 inotify 封装（ctypes 调用 libc），不可用时构造抛出 OSError"""
+
+    def __init__(self):
+        if not hasattr(os, "O_NONBLOCK"):
+            raise OSError("inotify 不可用")
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError("inotify 不可用")
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify 不可用")
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+
+    def add_watch(self, path: Path, mask: int):
+        wd = self._libc.inotify_add_watch(self.fd, str(path).encode(), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch 失败: {path}")
+
+    def drain(self, name: str) -> bool:
+        """读出所有待处理事件，返回其中是否有与 name 相关的事件"""
+        hit = False
+        while True:
+            try:
+                data = os.read(self.fd, 65536)
+            except BlockingIOError:
+                return hit
+            pos = 0
+            while pos < len(data):
+                _, _, _, length = _EVENT_HEADER.unpack_from(data, pos)
+                event_name = data[pos + _EVENT_HEADER.size:pos + _EVENT_HEADER.size + length].rstrip(b"\0")
+                hit = hit or event_name.decode(errors="replace") == name
+                pos += _EVENT_HEADER.size + length
+
+    def close(self):
+        os.close(self.fd)
+
+
+class FileWatcher:
+    """
+    等待单个文件变化：优先 inotify（监听所在目录，文件尚未创建也能等待），否则轮询 size/mtime
+    """
+
+    def __init__(self, path: Path, poll_interval: float = 0.5):
+        self.path = Path(path)
+        self.poll_interval = poll_interval
+        self._last = None
+        try:
+            self._inotify = _Inotify()
+            self._inotify.add_watch(self.path.parent, IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE |
+                                    IN_MOVED_TO | IN_CREATE | IN_DELETE)
+        except OSError:
+            self._inotify = None
+
+    def fileno(self) -> Optional[int]:
+        """inotify 描述符（可交给事件循环监听），轮询模式返回 None"""
+        return self._inotify.fd if self._inotify else None
+
+    def _stat(self):
+        try:
+            st = self.path.stat()
+            return st.st_size, st.st_mtime_ns
+        except FileNotFoundError:
+            return None
+
+    def changed(self) -> bool:
+        """非阻塞检查文件自上次调用后是否有变化"""
+        if self._inotify:
+            return self._inotify.drain(self.path.name)
+        current = self._stat()
+        changed, self._last = current != self._last, current
+        return changed
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """阻塞等待文件变化，超时返回 False"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            if self.changed():
+                return True
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            if self._inotify:
+                select.select([self._inotify.fd], [], [], remaining)
+            else:
+                time.sleep(self.poll_interval if remaining is None else min(self.poll_interval, remaining))
+
+    def close(self):
+        if self._inotify:
+            self._inotify.close()
+            self._inotify = None
+
+
+def _decode(raw: bytes) -> str:
+    return raw.decode("utf-8", errors="replace").rstrip("\r")
+
+
+class LogTail:
+    """
+    日志跟随器
+
+    用法：
+        tail = LogTail(experiment.path / "train.log")
+        count = tail.read_new(READ_BUDGET)  # 文件变化时调用，每次最多读取 READ_BUDGET 字节
+        while tail.pending:                 # 大文件第一次打开时分多次追上（GUI 中每个事件循环周期一次）
+            tail.read_new(READ_BUDGET)
+        tail.lines(0, 50)                   # 任意位置的行，早期内容经索引 seek 读取
+    """
+
+    def __init__(self, path: Path, max_lines: int = 10000, index_every: int = INDEX_EVERY, cache_blocks: int = 8):
+        self.path = Path(path)
+        self.max_lines = max_lines
+        self.index_every = index_every
+        self.cache_blocks = cache_blocks
+        self.line_count = 0
+        self._offset = 0
+        self._size = 0
+        self._partial = b""
+        self._ring: deque = deque(maxlen=max_lines)
+        # _index[k] 为第 k * index_every 行的起始字节偏移
+        self._index: List[int] = [0]
+        self._blocks: "OrderedDict[int, List[str]]" = OrderedDict()
+
+    def reset(self):
+        self.line_count = 0
+        self._offset = 0
+        self._size = 0
+        self._partial = b""
+        self._ring.clear()
+        self._index = [0]
+        self._blocks.clear()
+
+    @property
+    def pending(self) -> int:
+        """上次 read_new 时文件中还没有读取的字节数"""
+        return max(0, self._size - self._offset)
+
+    def read_new(self, max_bytes: Optional[int] = None) -> int:
+        """
+        读取新增的完整行（最多 max_bytes 字节，剩余的下次再读），返回新增行数；
+        只有最后 max_lines 行进入环形缓冲，其余只记录索引。文件被截断或替换时从头开始
+        """
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            return 0
+        if size < self._offset:
+            print(f"[操作] 日志文件被截断，重新读取: {self.path}")
+            self.reset()
+        self._size = size
+        if size == self._offset:
+            return 0
+        stop = size if max_bytes is None else min(size, self._offset + max_bytes)
+        count = 0
+        with open(self.path, "rb") as f:
+            f.seek(self._offset)
+            while self._offset < stop:
+                chunk = f.read(min(READ_CHUNK, stop - self._offset))
+                if not chunk:
+                    break
+                count += self._consume(chunk)
+        return count
+
+    def _consume(self, chunk: bytes) -> int:
+        start_offset = self._offset - len(self._partial)
+        data = self._partial + chunk
+        self._offset += len(chunk)
+        ends = np.flatnonzero(np.frombuffer(data, dtype=np.uint8) == 0x0A)
+        if len(ends) == 0:
+            self._partial = data
+            return 0
+        # 新行中落在索引点上的行，记录其起始偏移（上一行换行符之后）
+        first = self.line_count
+        line_numbers = np.arange(first + 1, first + len(ends) + 1)
+        marks = ends[line_numbers % self.index_every == 0]
+        self._index.extend((start_offset + marks + 1).tolist())
+        # 只解码会留在环形缓冲中的最后几行
+        keep = min(len(ends), self.max_lines)
+        if keep:
+            start = ends[len(ends) - keep - 1] + 1 if keep < len(ends) else 0
+            self._ring.extend(_decode(line) for line in data[start:ends[-1]].split(b"\n"))
+        self._partial = data[ends[-1] + 1:]
+        self.line_count += len(ends)
+        return len(ends)
+
+    @property
+    def first_buffered(self) -> int:
+        """环形缓冲中第一行的行号"""
+        return self.line_count - len(self._ring)
+
+    def lines(self, start: int, count: int) -> List[str]:
+        """读取行号 [start, start + count) 的行"""
+        start = max(0, start)
+        end = min(start + count, self.line_count)
+        if start >= end:
+            return []
+        if start >= self.first_buffered:
+            base = self.first_buffered
+            return [self._ring[i - base] for i in range(start, end)]
+        out = []
+        line = start
+        while line < end:
+            block = line // self.index_every
+            block_lines = self._block(block)
+            offset = line - block * self.index_every
+            take = block_lines[offset:offset + end - line]
+            if not take:
+                break
+            out.extend(take)
+            line += len(take)
+        return out
+
+    def _block(self, block: int) -> List[str]:
+        """按索引 seek 读取一个索引块内的行，最近使用的块缓存在内存中"""
+        cached = self._blocks.get(block)
+        if cached is not None:
+            self._blocks.move_to_end(block)
+            return cached
+        start = self._index[block]
+        stop = self._index[block + 1] if block + 1 < len(self._index) else self._offset - len(self._partial)
+        with open(self.path, "rb") as f:
+            f.seek(start)
+            data = f.read(stop - start)
+        lines = [_decode(line) for line in data.split(b"\n")[:-1]]
+        # 最后一个块仍在增长，不缓存
+        if block + 1 < len(self._index):
+            self._blocks[block] = lines
+            if len(self._blocks) > self.cache_blocks:
+                self._blocks.popitem(last=False)
+        return lines
@@ -0,0 +1,153 @@
+"""
+数据集清单
+以 NumPy 数组按列保存样本信息（路径、标签、分组等），存放在数据集目录的 .deeplocal/ 下
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import os
+
+import numpy as np
+
+
+META_DIR = ".deeplocal"
+MANIFEST_FILE = "manifest.json"
+COLUMNS_DIR = "columns"
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".bmp", ".tif", ".tiff", ".webp"}
+
+
+def meta_dir(root: Path) -> Path:
+    """数据集元信息目录"""
+    return Path(root) / META_DIR
+
+
+def save_array(path: Path, values: np.ndarray):
+    """保存 .npy：先写临时文件再替换，避免截断仍被内存映射的旧文件"""
+    tmp_file = Path(f"{path}.tmp")
+    with open(tmp_file, "wb") as f:
+        np.save(f, values)
+    os.replace(tmp_file, path)
+
+
+class DatasetManifest:
+    """
+    数据集清单 - 每列一个 .npy 文件，可内存映射读取
+
+    固定列：
+        path: 相对数据集根目录的文件路径
+        label: 类别编号（-1 表示无标签）
+    其他列（group、size、mtime 等）按需添加
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        columns: Dict[str, np.ndarray],
+        classes: Optional[List[str]] = None,
+        version: int = 0
+    ):
+        self.root = Path(root)
+        self.columns = columns
+        self.classes = list(classes or [])
+        self.version = version
+
+    def __len__(self):
+        return len(self.columns["path"])
+
+    @property
+    def paths(self) -> np.ndarray:
+        return self.columns["path"]
+
+    @property
+    def labels(self) -> np.ndarray:
+        return self.columns["label"]
+
+    def column(self, name: str) -> Optional[np.ndarray]:
+        return self.columns.get(name)
+
+    def set_column(self, name: str, values: np.ndarray):
+        """添加或替换一列，长度必须与样本数一致"""
+        values = np.asarray(values)
+        if len(values) != len(self):
+            raise ValueError(f"列 {name} 长度 {len(values)} 与样本数 {len(self)} 不一致")
+        self.columns[name] = values
+
+    def save(self):
+        """保存清单，版本号递增"""
+        columns_dir = meta_dir(self.root) / COLUMNS_DIR
+        columns_dir.mkdir(parents=True, exist_ok=True)
+        for name, values in self.columns.items():
+            save_array(columns_dir / f"{name}.npy", values)
+        self.version += 1
+        meta = {
+            "version": self.version,
+            "count": len(self),
+            "classes": self.classes,
+            "columns": sorted(self.columns),
+            "updated_at": datetime.now().isoformat()
+        }
+        with open(meta_dir(self.root) / MANIFEST_FILE, "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        print(f"[操作] 保存数据集清单: {self.root}, 样本数={len(self)}, version={self.version}")
+
+    @classmethod
+    def exists(cls, root: Path) -> bool:
+        return (meta_dir(root) / MANIFEST_FILE).exists()
+
+    @classmethod
+    def load(cls, root: Path, mmap: bool = True):
+        """加载清单，默认内存映射各列"""
+        manifest_file = meta_dir(root) / MANIFEST_FILE
+        if not manifest_file.exists():
+            print(f"[操作] 加载数据集清单失败: 文件不存在 {manifest_file}")
+            return None
+        with open(manifest_file, "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        columns_dir = meta_dir(root) / COLUMNS_DIR
+        mmap_mode = "r" if mmap else None
+        columns = {
+            name: np.load(columns_dir / f"{name}.npy", mmap_mode=mmap_mode)
+            for name in meta["columns"]
+        }
+        return cls(root, columns, meta.get("classes", []), meta.get("version", 0))
+
+    @classmethod
+    def scan(cls, root: Path, classified: bool = True):
+        """
+        扫描数据集目录生成清单
+
+        Args:
+            root: 数据集根目录
+            classified: 是否按一级子目录名作为类别（root/<类别>/<图片>）
+        """
+        root = Path(root)
+        print(f"[操作] 扫描数据集: {root}")
+        paths = sorted(_walk_files(root, root))
+        classes: List[str] = []
+        if classified:
+            tops = [p.split("/", 1)[0] if "/" in p else "" for p in paths]
+            classes = sorted({t for t in tops if t})
+            class_ids = {name: i for i, name in enumerate(classes)}
+            labels = np.fromiter((class_ids.get(t, -1) for t in tops), dtype=np.int32, count=len(paths))
+        else:
+            labels = np.full(len(paths), -1, dtype=np.int32)
+        columns = {
+            "path": np.array(paths, dtype=str),
+            "label": labels
+        }
+        print(f"[操作] 扫描完成: 样本数={len(paths)}, 类别数={len(classes)}")
+        return cls(root, columns, classes)
+
+
+def _walk_files(directory: Path, root: Path):
+    """递归列出图片文件（相对路径），跳过隐藏目录"""
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.name.startswith("."):
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                yield from _walk_files(Path(entry.path), root)
+            elif os.path.splitext(entry.name)[1].lower() in IMAGE_EXTENSIONS:
+                yield Path(entry.path).relative_to(root).as_posix()
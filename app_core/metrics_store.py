@@ -0,0 +1,310 @@
+"""
+实验指标存储
+每个实验的 metrics/ 目录下：
+    metrics.bin         追加写入的定长记录 (step, time, metric_id, value)，是唯一的原始数据
+    names.json          指标名 -> 编号
+    m<id>_L0.bin        单个指标的原始序列 (step, time, value)
+    m<id>_L<k>.bin      多分辨率汇总，每条覆盖 FACTOR^k 个原始点 (first_step, last_step, min, max, sum, count)
+派生文件可随时从 metrics.bin 重建；读取时内存映射，按像素数选择合适层级，开销与像素数成正比
+"""
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import os
+import time
+
+import numpy as np
+
+
+METRICS_DIR = "metrics"
+LOG_FILE = "metrics.bin"
+NAMES_FILE = "names.json"
+FACTOR = 16
+LEVELS = 4
+
+RECORD_DTYPE = np.dtype([("step", "<i8"), ("time", "<f8"), ("metric", "<u4"), ("value", "<f4")])
+POINT_DTYPE = np.dtype([("step", "<i8"), ("time", "<f8"), ("value", "<f4")])
+SUMMARY_DTYPE = np.dtype([("first_step", "<i8"), ("last_step", "<i8"), ("min", "<f4"), ("max", "<f4"),
+                          ("sum", "<f8"), ("count", "<u4")])
+
+
+def metrics_dir(experiment_path: Path) -> Path:
+    return Path(experiment_path) / METRICS_DIR
+
+
+def _level_file(directory: Path, metric_id: int, level: int) -> Path:
+    return directory / f"m{metric_id}_L{level}.bin"
+
+
+def _summarize(points: np.ndarray, size: int) -> np.ndarray:
+    """原始点每 size 个汇总为一条，只输出完整的组"""
+    n = len(points) // size
+    out = np.empty(n, dtype=SUMMARY_DTYPE)
+    if n == 0:
+        return out
+    steps = points["step"][:n * size].reshape(n, size)
+    values = points["value"][:n * size].reshape(n, size)
+    out["first_step"] = steps[:, 0]
+    out["last_step"] = steps[:, -1]
+    out["min"] = values.min(axis=1)
+    out["max"] = values.max(axis=1)
+    out["sum"] = values.sum(axis=1, dtype=np.float64)
+    out["count"] = size
+    return out
+
+
+def _group(buckets: np.ndarray, size: int) -> np.ndarray:
+    """汇总记录每 size 条合并为上一层的一条，只输出完整的组"""
+    n = len(buckets) // size
+    out = np.empty(n, dtype=SUMMARY_DTYPE)
+    if n == 0:
+        return out
+    b = buckets[:n * size].reshape(n, size)
+    out["first_step"] = b["first_step"][:, 0]
+    out["last_step"] = b["last_step"][:, -1]
+    out["min"] = b["min"].min(axis=1)
+    out["max"] = b["max"].max(axis=1)
+    out["sum"] = b["sum"].sum(axis=1)
+    out["count"] = b["count"].sum(axis=1)
+    return out
+
+
+def _merge(buckets: np.ndarray) -> Optional[np.void]:
+    """合并若干汇总记录为一条"""
+    if len(buckets) == 0:
+        return None
+    out = np.zeros(1, dtype=SUMMARY_DTYPE)[0]
+    out["first_step"] = buckets["first_step"][0]
+    out["last_step"] = buckets["last_step"][-1]
+    out["min"] = buckets["min"].min()
+    out["max"] = buckets["max"].max()
+    out["sum"] = buckets["sum"].sum()
+    out["count"] = buckets["count"].sum()
+    return out
+
+
+def _raw_bucket(raw: np.ndarray) -> Optional[np.void]:
+    """一段原始点汇总为一条（点数不足一组时用）"""
+    if len(raw) == 0:
+        return None
+    out = np.zeros(1, dtype=SUMMARY_DTYPE)[0]
+    out["first_step"], out["last_step"] = raw["step"][0], raw["step"][-1]
+    out["min"], out["max"] = raw["value"].min(), raw["value"].max()
+    out["sum"], out["count"] = raw["value"].sum(dtype=np.float64), len(raw)
+    return out
+
+
+def _load_names(directory: Path) -> List[str]:
+    names_file = directory / NAMES_FILE
+    if not names_file.exists():
+        return []
+    with open(names_file, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+class MetricsWriter:
+    """
+    指标写入器（训练进程中使用）
+
+    用法：
+        writer = MetricsWriter.from_env()
+        writer.log({"loss": 0.5, "acc": 0.8}, step=100)
+        writer.close()
+    """
+
+    def __init__(self, experiment_path: Path, flush_every: int = 1024):
+        self.dir = metrics_dir(experiment_path)
+        self.dir.mkdir(parents=True, exist_ok=True)
+        self.flush_every = flush_every
+        self.names = _load_names(self.dir)
+        self._ids = {name: i for i, name in enumerate(self.names)}
+        self._buffer: List[tuple] = []
+        # 每个指标每层尚未凑满一组的数据，用于增量追加汇总
+        self._pending: Dict[int, List[np.ndarray]] = {}
+        self._rebuild()
+        self._log = open(self.dir / LOG_FILE, "ab")
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """从调度器设置的 DEEPLOCAL_EXPERIMENT_DIR 环境变量创建"""
+        return cls(Path(os.environ["DEEPLOCAL_EXPERIMENT_DIR"]), **kwargs)
+
+    def _metric_id(self, name: str) -> int:
+        metric_id = self._ids.get(name)
+        if metric_id is None:
+            metric_id = len(self.names)
+            self.names.append(name)
+            self._ids[name] = metric_id
+            tmp_file = self.dir / (NAMES_FILE + ".tmp")
+            with open(tmp_file, "w", encoding="utf-8") as f:
+                json.dump(self.names, f, ensure_ascii=False)
+            os.replace(tmp_file, self.dir / NAMES_FILE)
+        return metric_id
+
+    def log(self, values: Dict[str, float], step: int, timestamp: Optional[float] = None):
+        """记录一个 step 的若干指标"""
+        timestamp = time.time() if timestamp is None else timestamp
+        for name, value in values.items():
+            self._buffer.append((step, timestamp, self._metric_id(name), value))
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        records = np.array(self._buffer, dtype=RECORD_DTYPE)
+        self._buffer = []
+        self._log.write(records.tobytes())
+        self._log.flush()
+        self._append_derived(records)
+
+    def close(self):
+        self.flush()
+        self._log.close()
+
+    def _append_derived(self, records: np.ndarray):
+        for metric_id in np.unique(records["metric"]).tolist():
+            rows = records[records["metric"] == metric_id]
+            points = np.empty(len(rows), dtype=POINT_DTYPE)
+            points["step"], points["time"], points["value"] = rows["step"], rows["time"], rows["value"]
+            with open(_level_file(self.dir, metric_id, 0), "ab") as f:
+                f.write(points.tobytes())
+            # pending[0] 为未凑满一组的原始点，pending[k] 为第 k 层未凑满一组的汇总记录
+            pending = self._pending.setdefault(
+                metric_id, [np.empty(0, dtype=POINT_DTYPE)] + [np.empty(0, dtype=SUMMARY_DTYPE)] * (LEVELS - 1))
+            raw = np.concatenate([pending[0], points])
+            full = len(raw) // FACTOR * FACTOR
+            completed = _summarize(raw[:full], FACTOR)
+            pending[0] = raw[full:]
+            for level in range(1, LEVELS + 1):
+                if len(completed) == 0:
+                    break
+                with open(_level_file(self.dir, metric_id, level), "ab") as f:
+                    f.write(completed.tobytes())
+                if level == LEVELS:
+                    break
+                buf = np.concatenate([pending[level], completed])
+                full = len(buf) // FACTOR * FACTOR
+                completed = _group(buf[:full], FACTOR)
+                pending[level] = buf[full:]
+
+    def _rebuild(self):
+        """从 metrics.bin 重建派生文件（打开时执行，修复崩溃导致的不一致并恢复增量状态）"""
+        log_file = self.dir / LOG_FILE
+        for path in self.dir.glob("m*_L*.bin"):
+            path.unlink()
+        if not log_file.exists():
+            return
+        # 丢弃崩溃时写了一半的尾部记录
+        size = log_file.stat().st_size
+        valid = size // RECORD_DTYPE.itemsize * RECORD_DTYPE.itemsize
+        if valid != size:
+            os.truncate(log_file, valid)
+        if valid == 0:
+            return
+        records = np.fromfile(log_file, dtype=RECORD_DTYPE)
+        order = np.argsort(records["metric"], kind="stable")
+        records = records[order]
+        self._append_derived(records)
+        print(f"[操作] 重建指标索引: {self.dir}, 记录数={len(records)}, 指标数={len(self.names)}")
+
+
+class MetricsReader:
+    """指标读取器（GUI 中使用），文件增长后自动重新映射"""
+
+    def __init__(self, experiment_path: Path):
+        self.dir = metrics_dir(experiment_path)
+        self._maps: Dict[Path, np.ndarray] = {}
+        self._names: List[str] = []
+        self._names_mtime = None
+
+    @property
+    def names(self) -> List[str]:
+        """指标名列表，names.json 变化时重新读取"""
+        try:
+            mtime = (self.dir / NAMES_FILE).stat().st_mtime_ns
+        except FileNotFoundError:
+            return []
+        if mtime != self._names_mtime:
+            self._names = _load_names(self.dir)
+            self._names_mtime = mtime
+        return self._names
+
+    def _array(self, path: Path, dtype: np.dtype) -> np.ndarray:
+        try:
+            size = path.stat().st_size // dtype.itemsize
+        except FileNotFoundError:
+            return np.empty(0, dtype=dtype)
+        cached = self._maps.get(path)
+        if cached is not None and len(cached) == size:
+            return cached
+        if size == 0:
+            return np.empty(0, dtype=dtype)
+        mapped = np.memmap(path, dtype=dtype, mode="r", shape=(size,))
+        self._maps[path] = mapped
+        return mapped
+
+    def count(self, name: str) -> int:
+        """指标的原始点数"""
+        if name not in self.names:
+            return 0
+        return len(self._array(_level_file(self.dir, self.names.index(name), 0), POINT_DTYPE))
+
+    def points(self, name: str, start: int = 0) -> np.ndarray:
+        """从第 start 个点开始的原始点（用于增量追加）"""
+        if name not in self.names:
+            return np.empty(0, dtype=POINT_DTYPE)
+        return self._array(_level_file(self.dir, self.names.index(name), 0), POINT_DTYPE)[start:]
+
+    def read(self, name: str, max_points: int = 1000,
+             start_step: Optional[int] = None, end_step: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        读取 [start_step, end_step] 范围内的指标，返回不超过约 max_points 个点
+
+        Returns:
+            {"step", "min", "max", "mean"}；点数较少时直接返回原始值（min = max = mean）
+        """
+        if name not in self.names:
+            empty = np.empty(0)
+            return {"step": empty, "min": empty, "max": empty, "mean": empty}
+        metric_id = self.names.index(name)
+        raw = self._array(_level_file(self.dir, metric_id, 0), POINT_DTYPE)
+        lo = 0 if start_step is None else int(np.searchsorted(raw["step"], start_step, side="left"))
+        hi = len(raw) if end_step is None else int(np.searchsorted(raw["step"], end_step, side="right"))
+        if hi - lo <= max_points:
+            values = np.asarray(raw["value"][lo:hi], dtype=np.float64)
+            return {"step": np.asarray(raw["step"][lo:hi]), "min": values, "max": values, "mean": values}
+
+        # 选择满足点数要求的最细层级
+        level = 1
+        while level < LEVELS and (hi - lo) // FACTOR ** level > max_points:
+            level += 1
+        size = FACTOR ** level
+        buckets = self._array(_level_file(self.dir, metric_id, level), SUMMARY_DTYPE)
+        b_lo, b_hi = lo // size, min(-(-hi // size), len(buckets))
+        if end_step is not None:
+            # 最后一组可能越过 end_step：只取完整落在范围内的组，剩余的原始点（不足一组）单独汇总
+            b_hi = min(hi // size, len(buckets))
+        selected = np.asarray(buckets[b_lo:b_hi])
+        if end_step is not None:
+            tail = _raw_bucket(raw[max(b_hi * size, lo):hi])
+            if tail is not None:
+                selected = np.concatenate([selected, np.array([tail], dtype=SUMMARY_DTYPE)])
+        elif hi > len(buckets) * size:
+            tail = self._partial(metric_id, level)
+            if tail is not None:
+                selected = np.concatenate([selected, np.array([tail], dtype=SUMMARY_DTYPE)])
+        mean = selected["sum"] / np.maximum(selected["count"], 1)
+        return {"step": selected["first_step"], "min": selected["min"].astype(np.float64),
+                "max": selected["max"].astype(np.float64), "mean": mean}
+
+    def _partial(self, metric_id: int, level: int) -> Optional[np.void]:
+        """第 level 层尚未写入的最后一个未满组：由下一层剩余的组加上下一层的未满组合并"""
+        covered = len(self._array(_level_file(self.dir, metric_id, level), SUMMARY_DTYPE)) * FACTOR
+        if level == 1:
+            return _raw_bucket(self._array(_level_file(self.dir, metric_id, 0), POINT_DTYPE)[covered:])
+        lower = self._array(_level_file(self.dir, metric_id, level - 1), SUMMARY_DTYPE)[covered:]
+        parts = [b for b in (_merge(lower), self._partial(metric_id, level - 1)) if b is not None]
+        if not parts:
+            return None
+        return _merge(np.array(parts, dtype=SUMMARY_DTYPE))
@@ -0,0 +1,235 @@
+"""
+训练进度通道
+训练子进程通过 Unix 数据报套接字向 GUI 发布进度、指标和状态事件（每条一个 JSON），
+发送非阻塞且按最小间隔合并，GUI 未启动或接收不过来时直接丢弃，不会拖慢训练；
+指标同时写入实验的指标存储，GUI 关闭期间的数据不会丢失，重新打开时从存储读取。
+GUI 端 ProgressServer 收取事件，ProgressAggregator 按实验合并，界面按固定频率批量刷新
+"""
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import errno
+import hashlib
+import json
+import os
+import socket
+import tempfile
+import time
+
+from app_core.metrics_store import MetricsWriter
+
+
+SOCKET_ENV = "DEEPLOCAL_PROGRESS_SOCKET"
+EXPERIMENT_ENV = "DEEPLOCAL_EXPERIMENT_DIR"
+PROGRESS_METRIC = "_progress"
+MAX_DATAGRAM = 64 * 1024
+RELIABLE_RETRIES = 100
+
+
+def socket_path(project_dir: Path) -> Path:
+    """项目目录对应的套接字路径（放在临时目录，避免超过 Unix 套接字路径长度限制）"""
+    digest = hashlib.sha1(str(Path(project_dir).resolve()).encode()).hexdigest()[:12]
+    return Path(tempfile.gettempdir()) / f"deeplocal-{digest}.sock"
+
+
+def channel_supported() -> bool:
+    return hasattr(socket, "AF_UNIX")
+
+
+def socket_in_use(path: Path, kind: int = socket.SOCK_DGRAM) -> bool:
+    """
+    Unix 套接字文件是否有进程在监听：能连上（或连接失败但不是被拒绝）视为在用；
+    文件不存在或连接被拒绝（进程退出后留下的文件）返回 False，可以删除后重新绑定
+    """
+    if not path.exists():
+        return False
+    probe = socket.socket(socket.AF_UNIX, kind)
+    try:
+        probe.connect(str(path))
+        return True
+    except (ConnectionRefusedError, FileNotFoundError):
+        return False
+    except OSError:
+        return True
+    finally:
+        probe.close()
+
+
+class ProgressPublisher:
+    """训练进程端：发送事件，失败时静默丢弃"""
+
+    def __init__(self, path: Optional[str], experiment_id: str = ""):
+        self.path = path
+        self.experiment_id = experiment_id
+        self.dropped = 0
+        self._sock = None
+        if path and channel_supported():
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+            self._sock.setblocking(False)
+
+    def publish(self, event_type: str, reliable: bool = False, **data):
+        """
+        发送事件；reliable=True 时接收队列满会短暂重试（用于状态等不能丢的事件）
+        """
+        if self._sock is None:
+            return
+        event = {"type": event_type, "experiment_id": self.experiment_id, "time": time.time(), **data}
+        payload = json.dumps(event, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        for _ in range(RELIABLE_RETRIES if reliable else 1):
+            try:
+                self._sock.sendto(payload, self.path)
+                return
+            except OSError as e:
+                # GUI 未运行 / 接收队列满 / 消息过大
+                if e.errno not in (errno.ENOENT, errno.ECONNREFUSED, errno.EAGAIN, errno.EWOULDBLOCK, errno.EMSGSIZE):
+                    raise
+                if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                    break
+                if reliable:
+                    time.sleep(0.01)
+        self.dropped += 1
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+
+class ProgressReporter:
+    """
+    训练脚本使用的进度上报器：指标写入指标存储并实时发布，进度和状态只发布
+
+    用法：
+        reporter = ProgressReporter.from_env()
+        reporter.log({"loss": 0.5}, step=100)
+        reporter.progress(100, 1000, "epoch 1")
+        reporter.close()
+    """
+
+    def __init__(self, experiment_path: Path, socket_file: Optional[str] = None, flush_every: int = 256,
+                 min_interval: float = 0.05):
+        experiment_path = Path(experiment_path)
+        self.writer = MetricsWriter(experiment_path, flush_every=flush_every)
+        self.publisher = ProgressPublisher(socket_file, experiment_path.name)
+        self.min_interval = min_interval
+        # 发布节流：间隔内的指标和进度合并为最新值，下次发送时一并发出
+        self._metrics: Dict[str, float] = {}
+        self._step = None
+        self._progress = None
+        self._last_send = 0.0
+
+    @classmethod
+    def from_env(cls, **kwargs):
+        """从调度器设置的环境变量创建"""
+        return cls(Path(os.environ[EXPERIMENT_ENV]), os.environ.get(SOCKET_ENV), **kwargs)
+
+    def log(self, values: Dict[str, float], step: int):
+        self.writer.log(values, step)
+        self._metrics.update((k, float(v)) for k, v in values.items())
+        self._step = step
+        self._send()
+
+    def progress(self, done: int, total: int, message: str = ""):
+        if total:
+            self.writer.log({PROGRESS_METRIC: done / total}, step=done)
+        self._progress = {"done": done, "total": total, "message": message}
+        self._send()
+
+    def status(self, status: str, **data):
+        self._send(force=True)
+        self.publisher.publish("status", reliable=True, status=status, **data)
+
+    def _send(self, force: bool = False):
+        now = time.monotonic()
+        if not force and now - self._last_send < self.min_interval:
+            return
+        self._last_send = now
+        if self._metrics:
+            self.publisher.publish("metrics", step=self._step, values=self._metrics)
+            self._metrics = {}
+        if self._progress:
+            self.publisher.publish("progress", **self._progress)
+            self._progress = None
+
+    def close(self):
+        self._send(force=True)
+        self.writer.close()
+        self.publisher.close()
+
+
+class ProgressServer:
+    """GUI 端：绑定套接字，非阻塞收取事件"""
+
+    def __init__(self, project_dir: Path):
+        self.path = socket_path(project_dir)
+        self._sock = None
+        if not channel_supported():
+            print("[启动] 当前平台不支持 Unix 套接字，实时进度不可用")
+            return
+        # 同一项目目录已有其他 GUI 实例在接收时不抢占（删除文件会让对方再也收不到事件），只清理残留文件
+        if socket_in_use(self.path):
+            print(f"[错误] 实时进度通道已被其他实例使用: {self.path}，本实例不接收实时进度")
+            return
+        if self.path.exists():
+            self.path.unlink()
+        self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sock.bind(str(self.path))
+        self._sock.setblocking(False)
+        # 加大接收缓冲区，突发事件时少丢包
+        try:
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4 << 20)
+        except OSError:
+            pass
+        print(f"[启动] 实时进度通道: {self.path}")
+
+    def fileno(self) -> Optional[int]:
+        return self._sock.fileno() if self._sock else None
+
+    def drain(self, limit: int = 10000) -> List[Dict[str, Any]]:
+        """读取当前所有待处理事件（最多 limit 条）"""
+        events = []
+        while self._sock is not None and len(events) < limit:
+            try:
+                payload = self._sock.recv(MAX_DATAGRAM)
+            except (BlockingIOError, InterruptedError):
+                break
+            try:
+                events.append(json.loads(payload))
+            except ValueError:
+                continue
+        return events
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+
+
+class ProgressAggregator:
+    """
+    按实验合并事件：同一刷新周期内只保留每个实验的最新进度、状态和各指标最新值
+    """
+
+    def __init__(self):
+        self._pending: Dict[str, Dict[str, Any]] = {}
+
+    def add(self, events: List[Dict[str, Any]]):
+        for event in events:
+            state = self._pending.setdefault(event.get("experiment_id", ""), {"metrics": {}})
+            kind = event.get("type")
+            if kind == "metrics":
+                state["step"] = event.get("step")
+                state["metrics"].update(event.get("values", {}))
+            elif kind == "progress":
+                state["progress"] = (event.get("done", 0), event.get("total", 0), event.get("message", ""))
+            elif kind == "status":
+                state["status"] = event.get("status")
+            state["time"] = event.get("time")
+
+    def take(self) -> Dict[str, Dict[str, Any]]:
+        """取出并清空本周期的合并结果"""
+        pending, self._pending = self._pending, {}
+        return pending
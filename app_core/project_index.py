@@ -0,0 +1,298 @@
+"""
+项目列表索引
+每个项目一行（名称、描述、创建时间、工作区数量、最近打开时间），持久化在项目目录的 project_index.json，
+之后的变化追加到 project_index.journal（格式与项目操作日志相同），其他进程的写入按日志增量读取。
+每种排序键维护一个有序列表，查询按游标二分定位后只取一页，不必加载和排序全部项目；
+项目目录有新增 / 删除时（目录 mtime 变化）只扫描目录名，已有项目的变化在返回该页时按文件状态校验
+"""
+from bisect import bisect_left, bisect_right, insort
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+import base64
+import json
+import os
+import threading
+
+from app_core import journal
+from app_core.journal import dir_lock, file_stat, read_records
+
+
+INDEX_FILE = "project_index.json"
+INDEX_JOURNAL = "project_index.journal"
+PROJECT_FILE = "project.json"
+SORT_KEYS = ("created_at", "name", "last_opened")
+PAGE_SIZE = 50
+
+
+@dataclass
+class ProjectPage:
+    rows: List[dict]
+    next_cursor: Optional[str]
+    total: int          # 符合搜索 / 时间条件的项目数（没有条件时为全部项目数）
+
+
+def _stamp(project_path: str) -> list:
+    """project.json 与操作日志的状态，变化时重新读取该项目（每页都要检查，用字符串路径）"""
+    stat = file_stat(os.path.join(project_path, PROJECT_FILE))
+    journal_stat = file_stat(os.path.join(project_path, journal.JOURNAL_FILE))
+    return [stat[1] if stat else 0, stat[2] if stat else 0, journal_stat[2] if journal_stat else 0]
+
+
+def _sort_value(key: str, row: dict) -> str:
+    if key == "name":
+        return row["name"].casefold()
+    return row.get(key) or ""
+
+
+def _encode_cursor(key: tuple) -> str:
+    return base64.urlsafe_b64encode(json.dumps(list(key), ensure_ascii=False).encode("utf-8")).decode("ascii")
+
+
+def _decode_cursor(cursor: str) -> tuple:
+    try:
+        value, folder = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    except (ValueError, TypeError):
+        raise ValueError(f"无效的游标: {cursor}")
+    return value, folder
+
+
+def _normalize_time(text: Optional[str]) -> Optional[str]:
+    return datetime.fromisoformat(text).isoformat() if text else None
+
+
+class ProjectIndex:
+    """
+    项目列表索引（线程安全）
+
+    用法：
+        index = ProjectIndex(projects_dir)
+        page = index.query(sort="name", descending=False, limit=30)
+        more = index.query(sort="name", descending=False, cursor=page.next_cursor, limit=30)
+    """
+
+    def __init__(self, projects_dir: Path):
+        self.dir = Path(projects_dir)
+        self._root = str(self.dir)
+        self.index_file = self.dir / INDEX_FILE
+        self.journal_file = self.dir / INDEX_JOURNAL
+        self._rows: Dict[str, dict] = {}                # 目录名 -> 行
+        self._orders: Dict[str, List[tuple]] = {}       # 排序键 -> 升序的 (键值, 目录名)，第一次按该键查询时建立
+        self._dir_mtime: Optional[int] = None
+        self._synced_stat: Optional[tuple] = None
+        self._journal_end = 0
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    # ------------------------------------------------------------ 维护
+
+    def refresh(self):
+        """读取其他进程写入的索引变化；项目目录有增删时扫描目录名"""
+        with self._lock:
+            self._catch_up()
+            try:
+                dir_mtime = os.stat(self.dir).st_mtime_ns
+            except FileNotFoundError:
+                return
+            if dir_mtime != self._dir_mtime:
+                self._scan(dir_mtime)
+
+    def _catch_up(self):
+        stat = file_stat(self.index_file)
+        if stat != self._synced_stat:
+            rows, dir_mtime = {}, None
+            if stat is not None:
+                try:
+                    with open(self.index_file, "r", encoding="utf-8") as f:
+                        data = json.load(f)
+                    rows, dir_mtime = data["projects"], data.get("dir_mtime")
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"[错误] 项目索引损坏，将重新建立: {self.index_file}, {str(e)}")
+            self._rows, self._dir_mtime, self._orders = rows, dir_mtime, {}
+            self._synced_stat = stat
+            self._journal_end = 0
+        records, self._journal_end = read_records(self.journal_file, self._journal_end)
+        for record in records:
+            self._apply(record)
+
+    def _scan(self, dir_mtime: int):
+        folders = set()
+        for entry in os.scandir(self.dir):
+            if entry.is_dir() and (entry.name in self._rows or os.path.exists(os.path.join(entry.path, PROJECT_FILE))):
+                folders.add(entry.name)
+        records = [{"op": "remove", "folder": f} for f in self._rows if f not in folders]
+        for folder in folders - self._rows.keys():
+            row = self._read(self.dir / folder)
+            if row is not None:
+                records.append({"op": "put", "folder": folder, "row": row})
+        if not records:
+            # 只是 queue.json 等其他文件变化，不必写日志
+            self._dir_mtime = dir_mtime
+            return
+        self._commit(records + [{"op": "scanned", "dir_mtime": dir_mtime}])
+        print(f"[操作] 更新项目索引: 变化={len(records)}, 总数={len(self._rows)}")
+
+    def _read(self, project_path: Path) -> Optional[dict]:
+        from app_ui.models import Project
+        try:
+            project = Project.load(project_path)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[错误] 读取项目失败，不加入索引: {project_path}, {str(e)}")
+            return None
+        if project is None:
+            return None
+        return self._row(project, self._rows.get(project_path.name))
+
+    @staticmethod
+    def _row(project, old: Optional[dict] = None) -> dict:
+        return {
+            "id": project.id,
+            "name": project.name,
+            "desc": project.desc,
+            "created_at": project.created_at.isoformat(),
+            "workspaces": project.workspace_count,
+            "last_opened": old.get("last_opened") if old else None,
+            "stamp": _stamp(str(project.path))
+        }
+
+    def _apply(self, record: dict):
+        op = record["op"]
+        if op == "scanned":
+            self._dir_mtime = record["dir_mtime"]
+            return
+        folder = record["folder"]
+        old = self._rows.get(folder)
+        if op == "put":
+            row = record["row"]
+        elif op == "opened" and old is not None:
+            row = {**old, "last_opened": record["at"]}
+        else:
+            row = None
+        for key, order in self._orders.items():
+            if old is not None:
+                i = bisect_left(order, (_sort_value(key, old), folder))
+                if i < len(order) and order[i][1] == folder:
+                    del order[i]
+            if row is not None:
+                insort(order, (_sort_value(key, row), folder))
+        if row is not None:
+            self._rows[folder] = row
+        elif old is not None and op == "remove":
+            del self._rows[folder]
+
+    def _commit(self, records: List[dict]):
+        """追加到索引日志并应用；日志超过阈值时写新快照"""
+        self.dir.mkdir(parents=True, exist_ok=True)
+        with self._lock, dir_lock(self.dir):
+            self._catch_up()
+            for record in records:
+                self._apply(record)
+            self._journal_end = journal.append_records(self.journal_file, records, self._journal_end)
+            if self._journal_end > max(journal.COMPACT_MIN_BYTES, (self._synced_stat or (0, 0, 0))[2]):
+                self._write_snapshot()
+
+    def _write_snapshot(self):
+        tmp_file = self.index_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"dir_mtime": self._dir_mtime, "projects": self._rows}, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, self.index_file)
+        journal.reset(self.journal_file)
+        self._synced_stat = file_stat(self.index_file)
+        self._journal_end = 0
+
+    def update(self, projects: Iterable):
+        """项目保存后更新索引（ProjectService 调用）"""
+        with self._lock:
+            records = [{"op": "put", "folder": p.path.name, "row": self._row(p, self._rows.get(p.path.name))}
+                       for p in projects]
+            if records:
+                self._commit(records)
+
+    def remove(self, folder: str):
+        with self._lock:
+            if folder in self._rows:
+                self._commit([{"op": "remove", "folder": folder}])
+
+    def touch(self, folder: str):
+        """记录项目最近打开时间"""
+        with self._lock:
+            if folder in self._rows:
+                self._commit([{"op": "opened", "folder": folder, "at": datetime.now().isoformat()}])
+
+    # ------------------------------------------------------------ 查询
+
+    def _order(self, key: str) -> List[tuple]:
+        order = self._orders.get(key)
+        if order is None:
+            order = self._orders[key] = sorted((_sort_value(key, row), folder) for folder, row in self._rows.items())
+        return order
+
+    def query(self, sort: str = "created_at", descending: bool = True, cursor: Optional[str] = None,
+              limit: int = PAGE_SIZE, search: Optional[str] = None, created_after: Optional[str] = None,
+              created_before: Optional[str] = None) -> ProjectPage:
+        """
+        按排序键取一页
+
+        Args:
+            sort: created_at / name / last_opened（从未打开的按空值排序：降序时在最后，升序时在最前）
+            cursor: 上一页返回的 next_cursor，None 表示第一页（此时先 refresh）
+            search: 名称或描述包含该文本（不区分大小写）
+            created_after / created_before: ISO 格式时间，按创建时间过滤；
+                有过滤条件时 total 需要检查全部项目，没有条件时直接取项目数
+        """
+        if sort not in SORT_KEYS:
+            raise ValueError(f"不支持的排序键: {sort}，可选 {', '.join(SORT_KEYS)}")
+        needle = search.casefold() if search else None
+        after, before = _normalize_time(created_after), _normalize_time(created_before)
+
+        def matches(row: dict) -> bool:
+            if needle and needle not in row["name"].casefold() and needle not in row["desc"].casefold():
+                return False
+            return not ((after and row["created_at"] < after) or (before and row["created_at"] >= before))
+
+        with self._lock:
+            if cursor is None:
+                self.refresh()
+            order = self._order(sort)
+            if cursor is None:
+                pos = len(order) - 1 if descending else 0
+            else:
+                key = _decode_cursor(cursor)
+                pos = bisect_left(order, key) - 1 if descending else bisect_right(order, key)
+            step = -1 if descending else 1
+            page = []
+            while 0 <= pos < len(order) and len(page) < limit:
+                key = order[pos]
+                pos += step
+                if matches(self._rows[key[1]]):
+                    page.append(key)
+            next_cursor = _encode_cursor(page[-1]) if page and 0 <= pos < len(order) else None
+            folders = self._validate([folder for _, folder in page])
+            rows = []
+            for folder in folders:
+                row = dict(self._rows[folder])
+                del row["stamp"]
+                row["folder"], row["path"] = folder, os.path.join(self._root, folder)
+                rows.append(row)
+            if needle or after or before:
+                total = sum(1 for row in self._rows.values() if matches(row))
+            else:
+                total = len(self._rows)
+            return ProjectPage(rows=rows, next_cursor=next_cursor, total=total)
+
+    def _validate(self, folders: List[str]) -> List[str]:
+        """其他写入方改过的项目重新读取（只检查本页），已删除的项目从索引移除"""
+        records = []
+        for folder in folders:
+            if _stamp(os.path.join(self._root, folder)) == self._rows[folder]["stamp"]:
+                continue
+            row = self._read(self.dir / folder)
+            records.append({"op": "put", "folder": folder, "row": row} if row else {"op": "remove", "folder": folder})
+        if records:
+            self._commit(records)
+        return [f for f in folders if f in self._rows]
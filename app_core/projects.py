@@ -0,0 +1,321 @@
+"""
+项目与工作区操作（不依赖 Qt）
+GUI（MainWindow）、命令行和脚本共用；批量模式下所有 project.json 在结束时统一写入，
+中途出错则删除本批次新建的目录，不留下半成品
+"""
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import shutil
+import threading
+
+from app_core import disk_usage
+from app_core.project_index import PAGE_SIZE, ProjectIndex, ProjectPage
+from app_core.trash import Trash, TrashEntry
+from app_ui.models import Experiment, Project, Workspace
+from utils.utils import generate_id
+
+
+PROJECT_FILE = "project.json"
+
+
+def project_readme(project: Project) -> str:
+    """项目 README 内容"""
+    content = f"""# {project.name}
+
+## 项目信息
+
+- **项目ID**: {project.id}
+- **项目名称**: {project.name}
+- **项目描述**: {project.desc}
+- **创建时间**: {project.created_at.strftime("%Y-%m-%d %H:%M:%S")}
+- **项目路径**: {project.path}
+
+## 工作区列表
+
+"""
+    for i, workspace in enumerate(project.workspaces, 1):
+        content += f"{i}. {workspace.name} (ID: {workspace.id})\n"
+    content += f"""
+## 说明
+
+此项目由 deeplocal-gui 创建和管理。
+项目配置文件: `project.json`
+"""
+    return content
+
+
+class ProjectService:
+    """
+    项目服务
+
+    用法：
+        service = ProjectService(projects_dir)
+        project = service.create_project("猫狗分类")
+        with service.batch():
+            for i in range(1000):
+                service.create_workspace(project, f"ws-{i}")
+    """
+
+    def __init__(self, projects_dir: Path):
+        self.projects_dir = Path(projects_dir)
+        self._batch: Optional[Dict[str, Project]] = None
+        self._batch_dirs: List[Path] = []
+        self._batch_workspaces: List[tuple] = []
+        self._folder_seq = ("", 0)
+        # 项目列表的有序索引（项目中心分页、本地服务 project.list）
+        self.index = ProjectIndex(self.projects_dir)
+        # 删除的项目 / 工作区先移入回收站，撤销期过后由 TrashPurger 在后台删除文件
+        self.trash = Trash(self.projects_dir)
+        # GUI 线程与本地服务（catalog_server）的写线程共用同一个服务对象时串行化写操作
+        self.lock = threading.RLock()
+
+    # ------------------------------------------------------------ 读取
+
+    def get_projects(self) -> List[Project]:
+        """获取所有项目列表（按创建时间倒序）；逐个读取 project.json，只显示一页时用 query_projects"""
+        print(f"[操作] 加载项目列表: {self.projects_dir}")
+        projects = []
+        if not self.projects_dir.exists():
+            print(f"[操作] 项目目录不存在，返回空列表")
+            return projects
+        # 项目目录下还有 queue.json、result_cache/ 等，只加载含 project.json 的子目录
+        for project_dir in self.projects_dir.iterdir():
+            if project_dir.is_dir() and (project_dir / PROJECT_FILE).exists():
+                project = Project.load(project_dir)
+                if project:
+                    projects.append(project)
+        result = sorted(projects, key=lambda p: p.created_at, reverse=True)
+        print(f"[操作] 加载完成，共 {len(result)} 个项目")
+        return result
+
+    def query_projects(self, sort: str = "created_at", descending: bool = True, cursor: Optional[str] = None,
+                       limit: int = PAGE_SIZE, search: Optional[str] = None, created_after: Optional[str] = None,
+                       created_before: Optional[str] = None) -> ProjectPage:
+        """按排序键分页查询项目摘要（见 ProjectIndex.query），耗时与项目总数无关"""
+        return self.index.query(sort, descending, cursor, limit, search, created_after, created_before)
+
+    def mark_opened(self, project: Project):
+        """记录最近打开时间（按 last_opened 排序用）"""
+        self.index.touch(project.path.name)
+
+    def load_project(self, project_path: Path) -> Optional[Project]:
+        """从磁盘重新加载项目（其他写入方修改后调用）"""
+        with self.lock:
+            return Project.load(Path(project_path))
+
+    def find_project(self, project_id: str) -> Optional[Project]:
+        """按 id 或目录名查找项目"""
+        if (self.projects_dir / project_id / PROJECT_FILE).exists():
+            return Project.load(self.projects_dir / project_id)
+        for project in self.get_projects():
+            if project.id == project_id:
+                return project
+        return None
+
+    def find_workspace(self, workspace_id: str):
+        """按 id 查找工作区，返回 (项目, 工作区)；工作区目录名即 id，只加载所在的项目"""
+        if self.projects_dir.exists():
+            for project_dir in self.projects_dir.iterdir():
+                if (project_dir / "workspaces" / workspace_id).is_dir():
+                    project = Project.load(project_dir, lazy=False)
+                    workspace = project.get_workspace(workspace_id) if project else None
+                    if workspace:
+                        return project, workspace
+        return None, None
+
+    # ------------------------------------------------------------ 写入
+
+    def save_project(self, project: Project):
+        """保存项目；批量模式中只登记，结束时统一写入"""
+        if self._batch is not None:
+            self._batch[str(project.path)] = project
+            return
+        project.save()
+        self.index.update([project])
+
+    @contextmanager
+    def batch(self):
+        """批量模式：块内的保存推迟到结束时一次写入；出错时撤销本批次新建的目录"""
+        if self._batch is not None:
+            yield self
+            return
+        self._batch, self._batch_dirs, self._batch_workspaces = {}, [], []
+        try:
+            yield self
+            pending = list(self._batch.values())
+            # 先全部序列化，任何一个失败都不改动磁盘；再逐个加锁保存（并发写入时按工作区合并）
+            for project in pending:
+                json.dumps(project.to_dict(), ensure_ascii=False)
+            for project in pending:
+                project.save()
+            self.index.update(pending)
+            print(f"[操作] 批量保存项目: {len(pending)} 个")
+            for project in pending:
+                if not (project.path / "README.md").exists():
+                    self._write_readme(project)
+        except BaseException:
+            # 内存中的项目对象也恢复原状
+            for project, workspace_id in self._batch_workspaces:
+                project.remove_workspace(workspace_id)
+            for path in reversed(self._batch_dirs):
+                shutil.rmtree(path, ignore_errors=True)
+                disk_usage.notify(path)
+            print(f"[错误] 批量操作失败，已撤销 {len(self._batch_dirs)} 个新建目录")
+            raise
+        finally:
+            self._batch, self._batch_dirs, self._batch_workspaces = None, [], []
+
+    def _mkdir(self, path: Path):
+        path.mkdir(parents=True, exist_ok=True)
+        if self._batch is not None:
+            self._batch_dirs.append(path)
+
+    def _project_folder(self) -> Path:
+        """project_<时间戳> 目录；同一秒内创建多个项目时追加序号（从上次的序号继续，批量创建不必逐个试探）"""
+        base = f"project_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        n = self._folder_seq[1] if self._folder_seq[0] == base else 0
+        path = self.projects_dir / (f"{base}_{n}" if n else base)
+        while path.exists():
+            n += 1
+            path = self.projects_dir / f"{base}_{n}"
+        self._folder_seq = (base, n)
+        return path
+
+    def create_project(self, name: str, desc: str = "") -> Project:
+        """创建新项目（含默认工作区和 README）"""
+        with self.lock:
+            return self._create_project(name, desc)
+
+    def _create_project(self, name: str, desc: str) -> Project:
+        print(f"[操作] 创建项目: name={name}, desc={desc}")
+        project_path = self._project_folder()
+        self._mkdir(project_path)
+        project = Project(
+            id=generate_id(),
+            name=name,
+            desc=desc,
+            created_at=datetime.now(),
+            path=project_path
+        )
+        self.create_workspace(project, "默认工作区", auto_save=False)
+        self.save_project(project)
+        if self._batch is None:
+            self._write_readme(project)
+        disk_usage.notify(project_path)
+        print(f"[操作] 项目创建成功: id={project.id}, path={project_path}")
+        return project
+
+    def _write_readme(self, project: Project):
+        readme_path = project.path / "README.md"
+        with open(readme_path, "w", encoding="utf-8") as f:
+            f.write(project_readme(project))
+        print(f"[操作] 创建项目 README: {readme_path}")
+
+    def create_workspace(self, project: Project, name: str, auto_save: bool = True) -> Workspace:
+        """创建工作区"""
+        with self.lock:
+            return self._create_workspace(project, name, auto_save)
+
+    def _create_workspace(self, project: Project, name: str, auto_save: bool) -> Workspace:
+        print(f"[操作] 创建工作区: project={project.name}, name={name}, auto_save={auto_save}")
+        workspace_id = generate_id()
+        workspace_path = project.path / "workspaces" / workspace_id
+        self._mkdir(workspace_path)
+        workspace = Workspace(
+            id=workspace_id,
+            name=name,
+            project_id=project.id,
+            created_at=datetime.now(),
+            path=workspace_path
+        )
+        project.add_workspace(workspace)
+        if self._batch is not None:
+            self._batch_workspaces.append((project, workspace_id))
+        if auto_save:
+            self.save_project(project)
+        disk_usage.notify(workspace_path)
+        print(f"[操作] 工作区创建成功: id={workspace_id}, path={workspace_path}")
+        return workspace
+
+    def create_experiment(self, workspace: Workspace, name: str, dataset_id: str = "",
+                          config: Optional[dict] = None) -> Experiment:
+        """创建实验（状态为 pending，尚未提交运行）"""
+        print(f"[操作] 创建实验: workspace={workspace.name}, name={name}, dataset_id={dataset_id}")
+        experiment_id = generate_id()
+        experiment = Experiment(
+            id=experiment_id,
+            name=name,
+            workspace_id=workspace.id,
+            dataset_id=dataset_id,
+            created_at=datetime.now(),
+            path=workspace.path / "experiments" / experiment_id,
+            config=config or {}
+        )
+        experiment.save()
+        workspace.add_experiment(experiment)
+        disk_usage.notify(experiment.path)
+        print(f"[操作] 实验创建成功: id={experiment_id}, path={experiment.path}")
+        return experiment
+
+    # ------------------------------------------------------------ 删除
+
+    def delete_project(self, project: Project) -> TrashEntry:
+        """删除项目：目录移入回收站（改名，立即返回），撤销期内可用 restore_deleted 恢复"""
+        with self.lock:
+            print(f"[操作] 删除项目: id={project.id}, name={project.name}")
+            entry = self.trash.move(project.path, "project", project.name,
+                                    meta={"project_id": project.id, "folder": project.path.name})
+            self.index.remove(project.path.name)
+            disk_usage.notify(project.path)
+            return entry
+
+    def delete_workspace(self, project: Project, workspace_id: str) -> TrashEntry:
+        """
+        删除工作区：先把目录移入回收站，再从项目中移除并保存；
+        保存失败时把目录移回原处、工作区放回项目，不留下项目中有条目而目录已不在的状态
+        """
+        with self.lock:
+            workspace = project.get_workspace(workspace_id)
+            if workspace is None:
+                raise ValueError(f"工作区不存在: {workspace_id}")
+            meta = {"project_id": project.id, "project_path": str(project.path), "workspace": workspace.to_dict()}
+            # 目录已被手动删除时补一个空目录，撤销时仍能恢复项目中的工作区条目
+            workspace.path.mkdir(parents=True, exist_ok=True)
+            entry = self.trash.move(workspace.path, "workspace", workspace.name, meta=meta)
+            project.remove_workspace(workspace_id)
+            try:
+                self.save_project(project)
+            except BaseException:
+                print(f"[错误] 保存项目失败，撤销删除工作区: {workspace.name}")
+                self.trash.restore(entry.id)
+                project.add_workspace(workspace)
+                raise
+            disk_usage.notify(workspace.path)
+            return entry
+
+    def restore_deleted(self, entry_id: str) -> Project:
+        """撤销删除，返回恢复后的项目（工作区恢复时返回所属项目）；撤销期已过时抛出 ValueError"""
+        with self.lock:
+            entry = self.trash.get(entry_id)
+            if entry is None:
+                raise ValueError(f"回收站条目不存在或已清理: {entry_id}")
+            if entry.kind == "workspace":
+                project = Project.load(Path(entry.meta["project_path"]))
+                if project is None:
+                    raise ValueError(f"工作区所属项目已不存在: {entry.meta['project_path']}")
+                target = self.trash.restore(entry_id)
+                workspace = Workspace.from_dict(entry.meta["workspace"], project.path)
+                if project.get_workspace(workspace.id) is None:
+                    project.add_workspace(workspace)
+                    self.save_project(project)
+            else:
+                target = self.trash.restore(entry_id)
+                project = Project.load(target)
+                if project is None:
+                    raise ValueError(f"恢复的项目无法加载: {target}")
+                self.index.update([project])
+            disk_usage.notify(target)
+            return project
@@ -0,0 +1,266 @@
+"""
+实验结果缓存
+实验指纹 = 规范化 JSON（数据集清单版本、分割参数、训练配置、代码版本）的 sha256；
+完成的实验把结果和产物（硬链接，不额外占用磁盘）登记到 project_dir/result_cache/<指纹>/，
+再次提交相同指纹的实验时直接复用，除非指定 force；代码版本无法确定的实验不参与缓存；
+缓存项可按总大小和闲置时间淘汰
+"""
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import threading
+
+from app_core.archive import scan_tree
+from app_core.manifest import MANIFEST_FILE, meta_dir
+from app_core.split import SPLIT_FILE, SPLITS_DIR
+from app_ui.models import Experiment
+
+
+CACHE_DIR = "result_cache"
+INDEX_FILE = "index.json"
+EXPERIMENT_FILE = "experiment.json"
+# 不影响训练结果的配置项，不参与指纹
+VOLATILE_CONFIG_KEYS = {"sweep_id", "cpus", "memory_mb"}
+# 不参与指纹的分割元信息
+VOLATILE_SPLIT_KEYS = {"created_at"}
+
+# code_version_batch() 块内已计算的代码版本（按线程）
+_batch = threading.local()
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _sha256_files(paths: List[Path]) -> str:
+    digest = hashlib.sha256()
+    for path in sorted(paths):
+        digest.update(str(path).encode())
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+    return digest.hexdigest()
+
+
+def _compute_code_version(code_dir: Optional[str], scripts: tuple) -> str:
+    if code_dir:
+        try:
+            head = subprocess.run(["git", "rev-parse", "HEAD"], cwd=code_dir, capture_output=True,
+                                  text=True, check=True).stdout.strip()
+            diff = subprocess.run(["git", "diff", "HEAD"], cwd=code_dir, capture_output=True, check=True).stdout
+            return f"git:{head}" + (f"+{hashlib.sha256(diff).hexdigest()[:16]}" if diff else "")
+        except (OSError, subprocess.CalledProcessError):
+            return "tree:" + _sha256_files(list(Path(code_dir).rglob("*.py")))
+    return "files:" + _sha256_files([Path(p) for p in scripts]) if scripts else ""
+
+
+@contextmanager
+def code_version_batch():
+    """
+    批量提交（如搜索的全部子实验）：块内相同代码目录 / 脚本的版本只计算一次（git 或遍历目录），
+    块内假定代码不变
+    """
+    if getattr(_batch, "versions", None) is not None:
+        yield
+        return
+    _batch.versions = {}
+    try:
+        yield
+    finally:
+        _batch.versions = None
+
+
+def code_version(config: dict) -> str:
+    """
+    训练代码版本：
+    config["code_version"] 显式指定时直接使用；
+    config["code_dir"] 为 git 仓库时取 HEAD，加上未提交改动的摘要；不是仓库时取其中 .py 文件内容摘要；
+    否则取训练命令中存在的文件（通常是脚本）的内容摘要；都没有时返回空字符串（版本未知）
+    """
+    if config.get("code_version"):
+        return str(config["code_version"])
+    code_dir = config.get("code_dir")
+    scripts = () if code_dir else tuple(
+        arg for arg in config.get("command", []) if isinstance(arg, str) and os.path.isfile(arg))
+    versions = getattr(_batch, "versions", None)
+    if versions is None:
+        return _compute_code_version(code_dir, scripts)
+    key = (code_dir, scripts)
+    if key not in versions:
+        versions[key] = _compute_code_version(code_dir, scripts)
+    return versions[key]
+
+
+def experiment_fingerprint(experiment: Experiment) -> Optional[str]:
+    """
+    实验指纹；代码版本未知时返回 None（结果与代码无法对应，不能复用也不登记）
+
+    数据集位置取 config["dataset_path"]，分割名取 config["split"]（默认 default）
+    """
+    config = experiment.config
+    version = code_version(config)
+    if not version:
+        return None
+    dataset = {"id": experiment.dataset_id}
+    dataset_path = config.get("dataset_path")
+    if dataset_path:
+        manifest = _read_json(meta_dir(dataset_path) / MANIFEST_FILE) or {}
+        split_name = config.get("split", "default")
+        split = _read_json(meta_dir(dataset_path) / SPLITS_DIR / split_name / SPLIT_FILE) or {}
+        dataset.update({
+            "manifest_version": manifest.get("version"),
+            "split": {k: v for k, v in split.items() if k not in VOLATILE_SPLIT_KEYS}
+        })
+    canonical = json.dumps({
+        "dataset": dataset,
+        "config": {k: v for k, v in config.items() if k not in VOLATILE_CONFIG_KEYS},
+        "code_version": version
+    }, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _link_tree(source: Path, target: Path, files: List[str]):
+    """硬链接文件（跨文件系统时复制）"""
+    for rel in files:
+        dst = target / rel
+        dst.parent.mkdir(parents=True, exist_ok=True)
+        if dst.exists():
+            dst.unlink()
+        try:
+            os.link(source / rel, dst)
+        except OSError:
+            shutil.copy2(source / rel, dst)
+
+
+def detach_links(directory: Path):
+    """把目录中与缓存共享的硬链接替换为独立副本，重新运行实验时追加写入不会改动缓存"""
+    if not Path(directory).exists():
+        return
+    for rel in scan_tree(directory):
+        path = Path(directory) / rel
+        if path.stat().st_nlink > 1:
+            tmp_file = Path(f"{path}.tmp")
+            shutil.copy2(path, tmp_file)
+            os.replace(tmp_file, path)
+
+
+class ResultCache:
+    """
+    结果缓存
+
+    用法：
+        cache = ResultCache(project_dir)
+        if not cache.restore(fingerprint, experiment):   # 未命中
+            ...运行实验...
+            cache.store(experiment)
+    """
+
+    def __init__(self, project_dir: Path):
+        self.dir = Path(project_dir) / CACHE_DIR
+        self.index_file = self.dir / INDEX_FILE
+        self.entries: Dict[str, dict] = _read_json(self.index_file) or {}
+
+    def _save(self):
+        self.dir.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.index_file)
+
+    @property
+    def total_bytes(self) -> int:
+        return sum(e["bytes"] for e in self.entries.values())
+
+    def lookup(self, fingerprint: str) -> Optional[dict]:
+        entry = self.entries.get(fingerprint)
+        if entry and not (self.dir / fingerprint).is_dir():
+            # 产物目录被手动删除
+            self.entries.pop(fingerprint)
+            self._save()
+            return None
+        return entry
+
+    def store(self, experiment: Experiment):
+        """登记已完成实验的结果与产物"""
+        fingerprint = experiment.results.get("fingerprint")
+        if not fingerprint or experiment.status != "completed" or experiment.results.get("cached_from"):
+            return
+        # 提前停止的试验只跑了一部分，不能代替完整运行的结果
+        if experiment.results.get("early_stopped"):
+            return
+        files = {rel: v for rel, v in scan_tree(experiment.path).items()
+                 if rel != EXPERIMENT_FILE and not rel.endswith(".tmp")}
+        entry_dir = self.dir / fingerprint
+        if entry_dir.exists():
+            shutil.rmtree(entry_dir)
+        entry_dir.mkdir(parents=True)
+        _link_tree(experiment.path, entry_dir, list(files))
+        now = datetime.now().isoformat()
+        self.entries[fingerprint] = {
+            "experiment_id": experiment.id,
+            "experiment_name": experiment.name,
+            "results": experiment.results,
+            "files": sorted(files),
+            "bytes": sum(size for size, _ in files.values()),
+            "created_at": now,
+            "last_used": now
+        }
+        self._save()
+        print(f"[操作] 登记结果缓存: {experiment.name} (id={experiment.id}), 文件数={len(files)}")
+
+    def restore(self, fingerprint: str, experiment: Experiment) -> bool:
+        """命中时把缓存的结果和产物复制到实验目录并标记为已完成"""
+        entry = self.lookup(fingerprint)
+        if not entry:
+            return False
+        experiment.path.mkdir(parents=True, exist_ok=True)
+        _link_tree(self.dir / fingerprint, experiment.path, entry["files"])
+        experiment.results = dict(entry["results"])
+        experiment.results.update({
+            "fingerprint": fingerprint,
+            "cached_from": entry["experiment_id"],
+            "finished_at": datetime.now().isoformat()
+        })
+        experiment.status = "completed"
+        experiment.save()
+        entry["last_used"] = datetime.now().isoformat()
+        self._save()
+        print(f"[操作] 复用缓存结果: {experiment.name} <- {entry['experiment_name']} (id={entry['experiment_id']})")
+        return True
+
+    def invalidate(self, fingerprint: str):
+        if self.entries.pop(fingerprint, None) is not None:
+            shutil.rmtree(self.dir / fingerprint, ignore_errors=True)
+            self._save()
+
+    def evict(self, max_bytes: Optional[int] = None, max_age_days: Optional[float] = None) -> List[str]:
+        """淘汰超过闲置天数的缓存项，再按最久未使用淘汰到总大小不超过 max_bytes，返回被淘汰的指纹"""
+        removed = []
+        if max_age_days is not None:
+            cutoff = (datetime.now() - timedelta(days=max_age_days)).isoformat()
+            removed += [fp for fp, e in self.entries.items() if e["last_used"] < cutoff]
+        if max_bytes is not None:
+            total = sum(e["bytes"] for fp, e in self.entries.items() if fp not in removed)
+            for fp, entry in sorted(self.entries.items(), key=lambda item: item[1]["last_used"]):
+                if total <= max_bytes:
+                    break
+                if fp not in removed:
+                    removed.append(fp)
+                    total -= entry["bytes"]
+        for fp in removed:
+            self.entries.pop(fp)
+            shutil.rmtree(self.dir / fp, ignore_errors=True)
+        if removed:
+            self._save()
+            print(f"[操作] 淘汰结果缓存: {len(removed)} 项, 剩余 {self.total_bytes} 字节")
+        return removed
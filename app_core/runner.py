@@ -0,0 +1,79 @@
+"""
+实验子进程入口
+用法: python -m app_core.runner <实验目录>
+
+执行 experiment.json 中 config["command"]（参数列表），输出写入 train.log，
+结束后自行把状态写回 experiment.json，因此 GUI 退出后任务仍能正常收尾
+"""
+from datetime import datetime
+from pathlib import Path
+import os
+import signal
+import subprocess
+import sys
+
+from app_core.progress_channel import SOCKET_ENV, ProgressPublisher
+from app_ui.models import Experiment
+
+
+LOG_FILE = "train.log"
+
+
+def run(experiment_path: Path) -> int:
+    experiment = Experiment.load(experiment_path)
+    if experiment is None:
+        return 2
+    command = experiment.config.get("command")
+    if not command:
+        experiment.status = "failed"
+        experiment.results["error"] = "未配置训练命令 config.command"
+        experiment.save()
+        return 2
+
+    experiment.status = "running"
+    experiment.results["started_at"] = datetime.now().isoformat()
+    experiment.save()
+    publisher = ProgressPublisher(os.environ.get(SOCKET_ENV), experiment.id)
+    publisher.publish("status", reliable=True, status="running")
+
+    cancelled = False
+
+    def on_term(signum, frame):
+        nonlocal cancelled
+        cancelled = True
+
+    signal.signal(signal.SIGTERM, on_term)
+    env = dict(os.environ)
+    env["DEEPLOCAL_EXPERIMENT_DIR"] = str(experiment_path)
+    cpus = str(experiment.config.get("cpus", 1))
+    env.setdefault("OMP_NUM_THREADS", cpus)
+    env.setdefault("MKL_NUM_THREADS", cpus)
+    with open(experiment_path / LOG_FILE, "ab") as log:
+        proc = subprocess.Popen([str(c) for c in command], cwd=experiment_path, stdout=log, stderr=subprocess.STDOUT, env=env)
+        while True:
+            try:
+                code = proc.wait()
+                break
+            except InterruptedError:
+                continue
+
+    # 训练进程可能已更新 results，重新加载后再写状态
+    experiment = Experiment.load(experiment_path) or experiment
+    # 超参数搜索提前停止的试验：停止前的结果有效，记为完成（results 中有 early_stopped）
+    early_stopped = cancelled and "early_stopped" in experiment.results
+    experiment.status = "completed" if (code == 0 and not cancelled) or early_stopped else "failed"
+    experiment.results["exit_code"] = code
+    experiment.results["finished_at"] = datetime.now().isoformat()
+    if cancelled and not early_stopped:
+        experiment.results["error"] = "cancelled"
+    experiment.save()
+    publisher.publish("status", reliable=True, status=experiment.status, exit_code=code)
+    publisher.close()
+    return code
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 2:
+        print("用法: python -m app_core.runner <实验目录>")
+        sys.exit(2)
+    sys.exit(run(Path(sys.argv[1])))
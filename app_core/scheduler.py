@@ -0,0 +1,315 @@
+"""
+本地实验调度
+每个实验作为独立子进程运行（python -m app_core.runner），崩溃不影响 GUI；
+队列持久化在 project_dir/queue.json，GUI 重启后恢复；
+并发数按 CPU 核数与可用内存限制，支持优先级、暂停、恢复、取消
+"""
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+import json
+import os
+import signal
+import subprocess
+import sys
+
+from app_core import disk_usage
+from app_core.artifacts import refresh_experiment_usage
+from app_core.progress_channel import SOCKET_ENV, socket_path
+from app_core.result_cache import ResultCache, detach_links, experiment_fingerprint
+from app_ui.models import Experiment
+
+
+QUEUE_FILE = "queue.json"
+DEFAULT_MEMORY_MB = 2048
+MEMORY_RESERVE_MB = 1024
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# 队列项状态：queued 等待，running 运行中，paused 暂停（运行中的进程被 SIGSTOP 或等待中被挂起），done 已结束
+JOB_STATES = ("queued", "running", "paused", "done")
+
+
+@dataclass
+class Job:
+    experiment_id: str
+    experiment_path: str
+    priority: int = 0
+    state: str = "queued"
+    pid: int = 0
+    cpus: int = 1
+    memory_mb: int = DEFAULT_MEMORY_MB
+    cancelled: bool = False
+    submitted_at: str = field(default_factory=lambda: datetime.now().isoformat())
+    started_at: str = ""
+    finished_at: str = ""
+
+
+def available_memory_mb() -> Optional[int]:
+    """可用物理内存（MB），无法获取返回 None"""
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except OSError:
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1 << 20)
+    except (ValueError, OSError, AttributeError):
+        return None
+
+
+def _pid_alive(pid: int) -> bool:
+    if pid <= 0:
+        return False
+    if hasattr(os, "WNOHANG"):
+        # 本进程的子进程已退出时顺便回收，避免僵尸进程被当成仍在运行
+        try:
+            if os.waitpid(pid, os.WNOHANG)[0] == pid:
+                return False
+        except ChildProcessError:
+            pass
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ExperimentScheduler:
+    """
+    实验调度器 - 由 GUI 定时调用 poll()，或在脚本中调用 run_until_idle()
+    """
+
+    def __init__(self, project_dir: Path, max_cpus: Optional[int] = None, max_jobs: Optional[int] = None):
+        self.project_dir = Path(project_dir)
+        self.queue_file = self.project_dir / QUEUE_FILE
+        self.max_cpus = max_cpus or os.cpu_count() or 1
+        self.max_jobs = max_jobs or self.max_cpus
+        self.jobs: Dict[str, Job] = {}
+        self._procs: Dict[str, subprocess.Popen] = {}
+        self.cache = ResultCache(self.project_dir)
+        self._load()
+
+    # ------------------------------------------------------------ 持久化
+
+    def _load(self):
+        if not self.queue_file.exists():
+            return
+        with open(self.queue_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        for item in data.get("jobs", []):
+            job = Job(**item)
+            self.jobs[job.experiment_id] = job
+        # 恢复：进程已不在的运行项按实验文件中的最终状态收尾
+        restored = 0
+        for job in self.jobs.values():
+            if job.state in ("running", "paused") and job.pid:
+                if _pid_alive(job.pid):
+                    restored += 1
+                else:
+                    self._finish(job)
+        print(f"[启动] 恢复实验队列: {self.queue_file}, 任务数={len(self.jobs)}, 运行中={restored}")
+        self._save()
+
+    def _save(self):
+        self.queue_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.queue_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump({"jobs": [asdict(j) for j in self.jobs.values()]}, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, self.queue_file)
+
+    # ------------------------------------------------------------ 操作
+
+    def submit(self, experiment: Experiment, priority: int = 0, force: bool = False) -> Optional[Job]:
+        """
+        加入队列，实验状态置为 pending
+
+        已有相同指纹的完成结果时直接复用并返回 None，force=True 时强制重新运行；
+        代码版本未知（没有 code_version、code_dir，命令中也没有脚本文件）时不查找也不登记缓存
+        """
+        fingerprint = experiment_fingerprint(experiment)
+        if fingerprint and not force and self.cache.restore(fingerprint, experiment):
+            return None
+        detach_links(experiment.path)
+        experiment.results = {"fingerprint": fingerprint} if fingerprint else {}
+        job = Job(
+            experiment_id=experiment.id,
+            experiment_path=str(experiment.path),
+            priority=priority,
+            cpus=max(1, int(experiment.config.get("cpus", 1))),
+            memory_mb=int(experiment.config.get("memory_mb", DEFAULT_MEMORY_MB))
+        )
+        experiment.status = "pending"
+        experiment.save()
+        self.jobs[experiment.id] = job
+        self._save()
+        print(f"[操作] 提交实验: {experiment.name} (id={experiment.id}), priority={priority}")
+        self.poll()
+        return job
+
+    def set_priority(self, experiment_id: str, priority: int):
+        job = self.jobs.get(experiment_id)
+        if job:
+            job.priority = priority
+            self._save()
+
+    def pause(self, experiment_id: str) -> bool:
+        """暂停：等待中的任务不再启动，运行中的任务进程组收到 SIGSTOP"""
+        job = self.jobs.get(experiment_id)
+        if not job or job.state not in ("queued", "running"):
+            return False
+        if job.state == "running":
+            if not hasattr(signal, "SIGSTOP"):
+                print("[操作] 当前平台不支持暂停运行中的实验")
+                return False
+            self._signal(job, signal.SIGSTOP)
+        job.state = "paused"
+        self._save()
+        print(f"[操作] 暂停实验: {experiment_id}")
+        return True
+
+    def resume(self, experiment_id: str) -> bool:
+        job = self.jobs.get(experiment_id)
+        if not job or job.state != "paused":
+            return False
+        if job.pid:
+            self._signal(job, signal.SIGCONT)
+            job.state = "running"
+        else:
+            job.state = "queued"
+        self._save()
+        print(f"[操作] 恢复实验: {experiment_id}")
+        self.poll()
+        return True
+
+    def cancel(self, experiment_id: str) -> bool:
+        """取消：未启动的直接标记失败，运行中的进程组收到 SIGTERM，由 runner 写入最终状态"""
+        job = self.jobs.get(experiment_id)
+        if not job or job.state == "done":
+            return False
+        if job.pid:
+            job.cancelled = True
+            self._save()
+            self._signal(job, signal.SIGTERM)
+            if job.state == "paused" and hasattr(signal, "SIGCONT"):
+                self._signal(job, signal.SIGCONT)
+        else:
+            experiment = Experiment.load(Path(job.experiment_path))
+            if experiment:
+                experiment.status = "failed"
+                experiment.results["error"] = "cancelled"
+                experiment.save()
+            job.state = "done"
+            job.finished_at = datetime.now().isoformat()
+            self._save()
+        print(f"[操作] 取消实验: {experiment_id}")
+        return True
+
+    def remove_finished(self):
+        """清理已结束的队列项"""
+        self.jobs = {k: j for k, j in self.jobs.items() if j.state != "done"}
+        self._save()
+
+    # ------------------------------------------------------------ 调度
+
+    def running_jobs(self) -> List[Job]:
+        return [j for j in self.jobs.values() if j.state in ("running", "paused") and j.pid]
+
+    def poll(self) -> List[str]:
+        """回收已结束的进程并在资源允许时启动新任务，返回状态有变化的实验 id"""
+        changed = []
+        for job in self.running_jobs():
+            proc = self._procs.get(job.experiment_id)
+            finished = proc.poll() is not None if proc else not _pid_alive(job.pid)
+            if finished:
+                self._finish(job)
+                changed.append(job.experiment_id)
+
+        used_cpus = sum(j.cpus for j in self.running_jobs())
+        running = len(self.running_jobs())
+        free_memory = available_memory_mb()
+        queued = sorted(
+            (j for j in self.jobs.values() if j.state == "queued"),
+            key=lambda j: (-j.priority, j.submitted_at)
+        )
+        for job in queued:
+            if running >= self.max_jobs:
+                break
+            # 单个任务超过总核数时允许独占运行
+            if running and used_cpus + job.cpus > self.max_cpus:
+                break
+            if free_memory is not None and running and job.memory_mb > free_memory - MEMORY_RESERVE_MB:
+                break
+            if self._start(job):
+                running += 1
+                used_cpus += job.cpus
+                if free_memory is not None:
+                    free_memory -= job.memory_mb
+            changed.append(job.experiment_id)
+        if changed:
+            self._save()
+        return changed
+
+    def run_until_idle(self, interval: float = 1.0):
+        """阻塞运行直到队列中没有等待或运行的任务（供脚本使用）"""
+        import time
+        while any(j.state in ("queued", "running") for j in self.jobs.values()):
+            self.poll()
+            time.sleep(interval)
+
+    def _start(self, job: Job) -> bool:
+        experiment_path = Path(job.experiment_path)
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+        env[SOCKET_ENV] = str(socket_path(self.project_dir))
+        kwargs = {"start_new_session": True} if os.name == "posix" else {}
+        try:
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "app_core.runner", str(experiment_path)],
+                cwd=str(REPO_ROOT), env=env,
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, **kwargs
+            )
+        except OSError as e:
+            print(f"[错误] 启动实验失败: {job.experiment_id}, {str(e)}")
+            job.state = "done"
+            job.finished_at = datetime.now().isoformat()
+            return False
+        self._procs[job.experiment_id] = proc
+        job.pid = proc.pid
+        job.state = "running"
+        job.started_at = datetime.now().isoformat()
+        print(f"[操作] 启动实验: {job.experiment_id}, pid={proc.pid}, cpus={job.cpus}")
+        return True
+
+    def _finish(self, job: Job):
+        proc = self._procs.pop(job.experiment_id, None)
+        if proc:
+            proc.wait()
+        job.state = "done"
+        job.pid = 0
+        job.finished_at = datetime.now().isoformat()
+        experiment = Experiment.load(Path(job.experiment_path))
+        if experiment and experiment.status in ("pending", "running"):
+            # runner 未能写入最终状态（被强制结束或崩溃）
+            experiment.status = "failed"
+            experiment.results.setdefault("error", "cancelled" if job.cancelled else "进程异常退出")
+            experiment.save()
+        if experiment and experiment.status == "completed":
+            self.cache.store(experiment)
+        refresh_experiment_usage(Path(job.experiment_path))
+        disk_usage.notify(Path(job.experiment_path))
+        status = experiment.status if experiment else "unknown"
+        print(f"[操作] 实验结束: {job.experiment_id}, status={status}")
+
+    def _signal(self, job: Job, sig):
+        try:
+            if hasattr(os, "killpg"):
+                os.killpg(job.pid, sig)
+            else:
+                os.kill(job.pid, sig)
+        except ProcessLookupError:
+            pass
@@ -0,0 +1,178 @@
+"""
+数据集分割
+基于清单数组做向量化的分层（按标签）划分，可选按分组保持样本在同一子集
+结果保存为索引文件（.deeplocal/splits/<名称>/<子集>.npy），实验直接引用，不复制数据
+"""
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Optional
+import json
+
+import numpy as np
+
+from app_core.manifest import DatasetManifest, meta_dir, save_array
+
+
+SPLITS_DIR = "splits"
+SPLIT_FILE = "split.json"
+DEFAULT_RATIOS = {"train": 0.8, "val": 0.1, "test": 0.1}
+
+
+def split_indices(
+    labels: Optional[np.ndarray],
+    ratios: Dict[str, float] = None,
+    seed: int = 0,
+    groups: Optional[np.ndarray] = None
+) -> Dict[str, np.ndarray]:
+    """
+    计算各子集的样本索引
+
+    Args:
+        labels: 每个样本的标签，None 表示不分层
+        ratios: 子集名 -> 比例（会归一化）
+        seed: 随机种子，同一输入和种子结果一致
+        groups: 每个样本的分组编号，同组样本分到同一子集
+
+    Returns:
+        子集名 -> 升序的样本索引 (int64)
+    """
+    ratios = ratios or DEFAULT_RATIOS
+    names = list(ratios)
+    weights = np.array([ratios[n] for n in names], dtype=np.float64)
+    if len(weights) == 0 or np.any(weights < 0) or weights.sum() <= 0:
+        raise ValueError(f"无效的分割比例: {ratios}")
+    bounds = np.cumsum(weights / weights.sum())[:-1]
+
+    n = len(labels) if labels is not None else len(groups) if groups is not None else 0
+    if n == 0:
+        return {name: np.empty(0, dtype=np.int64) for name in names}
+
+    # 分组：以组为单位划分，组的标签取组内第一个样本的标签
+    if groups is not None:
+        member_group, group_count = _dense_codes(groups)
+        sizes = np.bincount(member_group, minlength=group_count).astype(np.float64)
+        first = np.full(group_count, n, dtype=np.int64)
+        np.minimum.at(first, member_group, np.arange(n, dtype=np.int64))
+        unit_labels = np.asarray(labels)[first] if labels is not None else None
+    else:
+        member_group = None
+        sizes = None
+        unit_labels = labels
+
+    m = len(unit_labels) if unit_labels is not None else len(sizes)
+    if unit_labels is not None:
+        strata, stratum_count = _dense_codes(unit_labels)
+    else:
+        strata, stratum_count = np.zeros(m, dtype=np.int64), 1
+    # 层数较少时用 16 位编码，稳定排序走基数排序
+    sort_keys = strata.astype(np.uint16) if stratum_count <= 0xFFFF else strata
+
+    # 随机打乱后按层稳定排序：每层内部顺序随机且连续
+    rng = np.random.default_rng(seed)
+    order = rng.permutation(m)
+    order = order[np.argsort(sort_keys[order], kind="stable")]
+    sorted_strata = strata[order]
+
+    unit_sizes = sizes[order] if sizes is not None else np.ones(m, dtype=np.float64)
+    cum = np.cumsum(unit_sizes)
+    stratum_totals = np.bincount(sorted_strata, weights=unit_sizes)
+    stratum_starts = np.concatenate(([0.0], np.cumsum(stratum_totals)[:-1]))
+    # 每个单元在本层内的中点位置（0~1），按比例边界落到对应子集
+    position = (cum - unit_sizes / 2 - stratum_starts[sorted_strata]) / stratum_totals[sorted_strata]
+    unit_split = np.empty(m, dtype=np.int64)
+    unit_split[order] = np.searchsorted(bounds, position, side="right")
+
+    sample_split = unit_split[member_group] if member_group is not None else unit_split
+    return {name: np.flatnonzero(sample_split == i) for i, name in enumerate(names)}
+
+
+def _dense_codes(values: np.ndarray):
+    """把取值映射为 0..k-1 的连续编码，返回 (编码, k)；整数且取值范围不大时避免排序"""
+    values = np.asarray(values)
+    if values.dtype.kind in "iub" and len(values):
+        lo = int(values.min())
+        span = int(values.max()) - lo + 1
+        if span <= max(4 * len(values), 1 << 16):
+            offset = (values - lo).astype(np.int64)
+            present = np.bincount(offset, minlength=span) > 0
+            remap = np.cumsum(present) - 1
+            return remap[offset], int(present.sum())
+    keys, codes = np.unique(values, return_inverse=True)
+    return codes.reshape(-1), len(keys)
+
+
+def split_dataset(
+    manifest: DatasetManifest,
+    name: str = "default",
+    ratios: Dict[str, float] = None,
+    seed: int = 0,
+    stratify: bool = True,
+    group_column: Optional[str] = None
+) -> Path:
+    """
+    分割数据集并写入索引文件
+
+    Returns:
+        分割目录路径
+    """
+    ratios = ratios or DEFAULT_RATIOS
+    print(f"[操作] 分割数据集: {manifest.root}, name={name}, ratios={ratios}, seed={seed}, group={group_column}")
+    groups = None
+    if group_column:
+        groups = manifest.column(group_column)
+        if groups is None:
+            raise ValueError(f"清单中不存在分组列: {group_column}")
+    labels = np.asarray(manifest.labels) if stratify else None
+    if labels is None and groups is None:
+        # 不分层也不分组时以样本数为准
+        labels = np.zeros(len(manifest), dtype=np.int32)
+    subsets = split_indices(labels, ratios, seed, groups)
+
+    split_dir = meta_dir(manifest.root) / SPLITS_DIR / name
+    split_dir.mkdir(parents=True, exist_ok=True)
+    for subset, indices in subsets.items():
+        save_array(split_dir / f"{subset}.npy", indices)
+    meta = {
+        "name": name,
+        "ratios": ratios,
+        "seed": seed,
+        "stratify": stratify,
+        "group_column": group_column,
+        "manifest_version": manifest.version,
+        "counts": {subset: int(len(indices)) for subset, indices in subsets.items()},
+        "created_at": datetime.now().isoformat()
+    }
+    with open(split_dir / SPLIT_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, ensure_ascii=False, indent=2)
+    print(f"[操作] 分割完成: {split_dir}, counts={meta['counts']}")
+    return split_dir
+
+
+def load_split(root: Path, name: str = "default", mmap: bool = True) -> Optional[Dict[str, np.ndarray]]:
+    """读取分割索引，默认内存映射"""
+    split_dir = meta_dir(root) / SPLITS_DIR / name
+    split_file = split_dir / SPLIT_FILE
+    if not split_file.exists():
+        print(f"[操作] 加载分割失败: 文件不存在 {split_file}")
+        return None
+    with open(split_file, "r", encoding="utf-8") as f:
+        meta = json.load(f)
+    mmap_mode = "r" if mmap else None
+    return {
+        subset: np.load(split_dir / f"{subset}.npy", mmap_mode=mmap_mode)
+        for subset in meta["ratios"]
+    }
+
+
+def list_splits(root: Path) -> Dict[str, dict]:
+    """列出数据集的所有分割及其元信息"""
+    splits_dir = meta_dir(root) / SPLITS_DIR
+    result = {}
+    if not splits_dir.exists():
+        return result
+    for split_dir in sorted(splits_dir.iterdir()):
+        split_file = split_dir / SPLIT_FILE
+        if split_file.exists():
+            with open(split_file, "r", encoding="utf-8") as f:
+                result[split_dir.name] = json.load(f)
+    return result
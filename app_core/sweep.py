@@ -0,0 +1,360 @@
+"""
+超参数搜索
+把参数空间展开为一组子实验（网格或随机采样），交给 ExperimentScheduler 按 CPU/内存限制并行运行；
+按阶梯（rung）提前停止：试验的目标指标到达第 k 个阶梯步数时记录当前最好值，
+明显落后于同一阶梯上其他试验中位数的试验被停止（状态仍为 completed，results 中记录 early_stopped）；
+GUI 定时调用 SweepRunner.poll_async()，指标读取在后台线程进行，不阻塞界面
+"""
+from concurrent.futures import Executor, Future
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import itertools
+import json
+import math
+import os
+import random
+
+import numpy as np
+
+from app_core.metrics_store import MetricsReader
+from app_core.result_cache import code_version_batch
+from app_core.scheduler import ExperimentScheduler
+from app_ui.models import Experiment, Workspace
+from utils.utils import generate_id
+
+
+SWEEPS_DIR = "sweeps"
+SWEEP_FILE = "sweep.json"
+SWEEP_METHODS = ("grid", "random")
+
+
+def expand_grid(space: Dict[str, List[Any]]) -> List[Dict[str, Any]]:
+    """网格展开：每个参数取值列表的笛卡尔积"""
+    names = sorted(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[n] for n in names))]
+
+
+def sample_random(space: Dict[str, Any], num_trials: int, seed: int = 0) -> List[Dict[str, Any]]:
+    """
+    随机采样
+
+    参数取值可以是列表（均匀选择）或区间 {"low", "high", "log": bool, "type": "int"/"float"}
+    """
+    rng = random.Random(seed)
+    trials = []
+    for _ in range(num_trials):
+        params = {}
+        for name in sorted(space):
+            spec = space[name]
+            if isinstance(spec, dict):
+                low, high = float(spec["low"]), float(spec["high"])
+                if spec.get("log"):
+                    value = math.exp(rng.uniform(math.log(low), math.log(high)))
+                else:
+                    value = rng.uniform(low, high)
+                params[name] = int(round(value)) if spec.get("type") == "int" else value
+            else:
+                params[name] = rng.choice(list(spec))
+        trials.append(params)
+    return trials
+
+
+def _set_param(config: dict, name: str, value: Any):
+    """点分参数名写入嵌套配置，如 optimizer.lr"""
+    node = config
+    keys = name.split(".")
+    for key in keys[:-1]:
+        node = node.setdefault(key, {})
+    node[keys[-1]] = value
+
+
+@dataclass
+class Sweep:
+    id: str
+    name: str
+    workspace_id: str
+    dataset_id: str
+    created_at: datetime
+    path: Path
+    method: str = "grid"
+    space: dict = field(default_factory=dict)
+    base_config: dict = field(default_factory=dict)
+    num_trials: int = 0
+    seed: int = 0
+    metric: str = ""
+    mode: str = "max"
+    # 提前停止：第一个阶梯步数、阶梯倍数、每个阶梯至少多少个试验才做比较；grace_steps 为 0 表示不提前停止
+    grace_steps: int = 0
+    reduction: int = 2
+    min_peers: int = 3
+    experiment_ids: List[str] = field(default_factory=list)
+    params: Dict[str, dict] = field(default_factory=dict)
+    rungs: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    stopped: List[str] = field(default_factory=list)
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "workspace_id": self.workspace_id,
+            "dataset_id": self.dataset_id,
+            "created_at": self.created_at.isoformat(),
+            "method": self.method,
+            "space": self.space,
+            "base_config": self.base_config,
+            "num_trials": self.num_trials,
+            "seed": self.seed,
+            "metric": self.metric,
+            "mode": self.mode,
+            "grace_steps": self.grace_steps,
+            "reduction": self.reduction,
+            "min_peers": self.min_peers,
+            "experiment_ids": self.experiment_ids,
+            "params": self.params,
+            "rungs": self.rungs,
+            "stopped": self.stopped
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, sweep_path: Path):
+        data = dict(data)
+        data["created_at"] = datetime.fromisoformat(data["created_at"])
+        return cls(path=sweep_path, **data)
+
+    def save(self):
+        sweep_file = self.path / SWEEP_FILE
+        sweep_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = sweep_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, sweep_file)
+
+    @classmethod
+    def load(cls, sweep_path: Path):
+        sweep_file = sweep_path / SWEEP_FILE
+        if not sweep_file.exists():
+            print(f"[操作] 加载搜索失败: 文件不存在 {sweep_file}")
+            return None
+        with open(sweep_file, "r", encoding="utf-8") as f:
+            return cls.from_dict(json.load(f), sweep_path)
+
+    def trials(self) -> List[Dict[str, Any]]:
+        if self.method == "grid":
+            return expand_grid(self.space)
+        if self.method == "random":
+            return sample_random(self.space, self.num_trials, self.seed)
+        raise ValueError(f"不支持的搜索方式: {self.method}")
+
+
+def load_sweeps(workspace: Workspace) -> List[Sweep]:
+    sweeps_dir = workspace.path / SWEEPS_DIR
+    sweeps = []
+    if sweeps_dir.exists():
+        for sweep_dir in sweeps_dir.iterdir():
+            if sweep_dir.is_dir():
+                sweep = Sweep.load(sweep_dir)
+                if sweep:
+                    sweeps.append(sweep)
+    return sorted(sweeps, key=lambda s: s.created_at)
+
+
+def create_sweep(workspace: Workspace, name: str, space: dict, base_config: dict, method: str = "grid",
+                 dataset_id: str = "", **options) -> Sweep:
+    """创建搜索并为每组参数创建子实验（尚未提交运行）"""
+    if method not in SWEEP_METHODS:
+        raise ValueError(f"不支持的搜索方式: {method}")
+    sweep_id = generate_id()
+    sweep = Sweep(
+        id=sweep_id,
+        name=name,
+        workspace_id=workspace.id,
+        dataset_id=dataset_id,
+        created_at=datetime.now(),
+        path=workspace.path / SWEEPS_DIR / sweep_id,
+        method=method,
+        space=space,
+        base_config=base_config,
+        **options
+    )
+    trials = sweep.trials()
+    for i, params in enumerate(trials):
+        config = json.loads(json.dumps(base_config))
+        for key, value in params.items():
+            _set_param(config, key, value)
+        config["sweep_id"] = sweep_id
+        experiment_id = generate_id()
+        experiment = Experiment(
+            id=experiment_id,
+            name=f"{name}-{i:03d}",
+            workspace_id=workspace.id,
+            dataset_id=dataset_id,
+            created_at=datetime.now(),
+            path=workspace.path / "experiments" / experiment_id,
+            config=config
+        )
+        experiment.save()
+        workspace.add_experiment(experiment)
+        sweep.experiment_ids.append(experiment_id)
+        sweep.params[experiment_id] = params
+    sweep.save()
+    print(f"[操作] 创建搜索: {name} (id={sweep_id}), 方式={method}, 试验数={len(trials)}")
+    return sweep
+
+
+class SweepRunner:
+    """
+    运行中的搜索：提交子实验、按阶梯提前停止、汇总结果
+
+    用法：
+        runner = SweepRunner(sweep, scheduler, workspace.path)
+        runner.submit()
+        runner.poll_async(pool)     # GUI 定时调用（不带界面时直接调用 poll()）
+        runner.summary()
+    """
+
+    SUMMARY_POINTS = 64
+
+    def __init__(self, sweep: Sweep, scheduler: ExperimentScheduler, workspace_path: Path):
+        self.sweep = sweep
+        self.scheduler = scheduler
+        self.experiments_dir = Path(workspace_path) / "experiments"
+        self._readers: Dict[str, MetricsReader] = {}
+        self._scan: Optional[Future] = None
+
+    def submit(self, priority: int = 0):
+        # 子实验共用代码目录，代码版本只计算一次
+        with code_version_batch():
+            for experiment_id in self.sweep.experiment_ids:
+                experiment = Experiment.load(self.experiments_dir / experiment_id)
+                if experiment and experiment.status == "pending" and experiment_id not in self.scheduler.jobs:
+                    self.scheduler.submit(experiment, priority)
+
+    def _reader(self, experiment_id: str) -> MetricsReader:
+        reader = self._readers.get(experiment_id)
+        if reader is None:
+            reader = self._readers[experiment_id] = MetricsReader(self.experiments_dir / experiment_id)
+        return reader
+
+    def _best(self, experiment_id: str, end_step: Optional[int] = None) -> Optional[float]:
+        """目标指标在 end_step 之前的最好值（读取汇总层，开销与总步数无关）"""
+        data = self._reader(experiment_id).read(self.sweep.metric, self.SUMMARY_POINTS, end_step=end_step)
+        values = data["max"] if self.sweep.mode == "max" else data["min"]
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return None
+        return float(values.max() if self.sweep.mode == "max" else values.min())
+
+    def _last_step(self, experiment_id: str) -> Optional[int]:
+        reader = self._reader(experiment_id)
+        count = reader.count(self.sweep.metric)
+        if count == 0:
+            return None
+        return int(reader.points(self.sweep.metric, count - 1)["step"][0])
+
+    def _rung_steps(self, last_step: int) -> List[int]:
+        steps = []
+        step = self.sweep.grace_steps
+        while step <= last_step:
+            steps.append(step)
+            step *= max(self.sweep.reduction, 2)
+        return steps
+
+    @property
+    def _enabled(self) -> bool:
+        return bool(self.sweep.grace_steps and self.sweep.metric)
+
+    def _running(self) -> List[str]:
+        return [experiment_id for experiment_id in self.sweep.experiment_ids
+                if experiment_id not in self.sweep.stopped
+                and getattr(self.scheduler.jobs.get(experiment_id), "state", None) == "running"]
+
+    def _arrivals(self, experiment_ids: List[str]) -> List[tuple]:
+        """读取各试验新到达的阶梯及到该阶梯为止的最好值；只读，可在后台线程执行"""
+        arrivals = []
+        for experiment_id in experiment_ids:
+            last_step = self._last_step(experiment_id)
+            if last_step is None:
+                continue
+            for rung in self._rung_steps(last_step):
+                if experiment_id in self.sweep.rungs.get(str(rung), {}):
+                    continue
+                value = self._best(experiment_id, end_step=rung)
+                if value is not None:
+                    arrivals.append((experiment_id, rung, value))
+        return arrivals
+
+    def _decide(self, arrivals: List[tuple]) -> List[str]:
+        """记录到达的阶梯，停止落后的试验；先记录全部再比较，同时到达的试验互为参照"""
+        for experiment_id, rung, value in arrivals:
+            self.sweep.rungs.setdefault(str(rung), {})[experiment_id] = value
+        running = set(self._running())
+        stopped = []
+        for experiment_id, rung, value in arrivals:
+            # 读取期间已结束或已停止的试验不再处理
+            if experiment_id in stopped or experiment_id not in running:
+                continue
+            records = self.sweep.rungs[str(rung)]
+            if self._losing(value, [v for k, v in records.items() if k != experiment_id]):
+                self._stop(experiment_id, rung, value)
+                stopped.append(experiment_id)
+        if arrivals:
+            self.sweep.save()
+        return stopped
+
+    def poll(self) -> List[str]:
+        """检查运行中的试验，返回本次提前停止的实验 id"""
+        if not self._enabled:
+            return []
+        return self._decide(self._arrivals(self._running()))
+
+    def poll_async(self, pool: Executor) -> List[str]:
+        """
+        GUI 定时调用：指标读取提交到 pool 执行，本次应用上一轮读取完成的结果；
+        上一轮还没读完时直接返回。返回本次提前停止的实验 id
+        """
+        if not self._enabled:
+            return []
+        stopped = []
+        if self._scan is not None:
+            if not self._scan.done():
+                return []
+            scan, self._scan = self._scan, None
+            stopped = self._decide(scan.result())
+        self._scan = pool.submit(self._arrivals, self._running())
+        return stopped
+
+    def _losing(self, value: float, peers: List[float]) -> bool:
+        if len(peers) < self.sweep.min_peers:
+            return False
+        median = float(np.median(peers))
+        return value < median if self.sweep.mode == "max" else value > median
+
+    def _stop(self, experiment_id: str, rung: int, value: float):
+        experiment = Experiment.load(self.experiments_dir / experiment_id)
+        if experiment:
+            # runner 结束时重新加载 experiment.json，看到这个标记后记为 completed 而不是 failed
+            experiment.results["early_stopped"] = {"step": rung, self.sweep.metric: value}
+            experiment.save()
+        self.sweep.stopped.append(experiment_id)
+        self.scheduler.cancel(experiment_id)
+        print(f"[操作] 提前停止试验: {experiment_id}, step={rung}, {self.sweep.metric}={value:.6g}")
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """各试验的参数、状态与目标指标最好值，按最好值排序（无结果的在最后）"""
+        rows = []
+        for experiment_id in self.sweep.experiment_ids:
+            experiment = Experiment.load(self.experiments_dir / experiment_id)
+            rows.append({
+                "experiment_id": experiment_id,
+                "name": experiment.name if experiment else "",
+                "status": experiment.status if experiment else "missing",
+                "early_stopped": experiment_id in self.sweep.stopped,
+                "params": self.sweep.params.get(experiment_id, {}),
+                "best": self._best(experiment_id) if self.sweep.metric else None,
+                "last_step": self._last_step(experiment_id) if self.sweep.metric else None
+            })
+        sign = -1 if self.sweep.mode == "max" else 1
+        rows.sort(key=lambda r: (r["best"] is None, sign * (r["best"] or 0)))
+        return rows
@@ -0,0 +1,282 @@
+"""
+回收站
+删除项目 / 工作区时只把目录改名移入 project_dir/trash/<条目 id>/data（同一文件系统，立即完成），
+条目信息写在同目录的 entry.json；撤销期内可以恢复，过期后由后台线程以低优先级、限速删除文件。
+条目状态：moving（正在移入）-> trashed（可恢复）-> purging（正在删除，不可恢复）。
+启动时 recover() 清理中断的操作：移入未完成的条目撤销或补全，删除中断的条目继续删除
+"""
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, List, Optional
+import json
+import os
+import shutil
+import threading
+import time
+
+from utils.utils import generate_id
+
+
+TRASH_DIR = "trash"
+ENTRY_FILE = "entry.json"
+DATA_DIR = "data"
+UNDO_SECONDS = 30.0
+# 后台删除速率上限（每秒删除的文件 / 目录数），避免占满磁盘 I/O
+PURGE_RATE = 2000
+PURGE_INTERVAL = 5.0
+
+
+@dataclass
+class TrashEntry:
+    id: str
+    kind: str                   # project / workspace
+    name: str
+    origin: str                 # 原路径
+    deleted_at: str
+    purge_after: str
+    state: str = "moving"
+    meta: dict = field(default_factory=dict)
+
+    @property
+    def due(self) -> bool:
+        return datetime.now() >= datetime.fromisoformat(self.purge_after)
+
+
+def _lower_priority():
+    """降低当前线程的 CPU 优先级；Linux 上未单独设置 I/O 优先级时 I/O 优先级随 nice 值降低"""
+    try:
+        os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+    except (AttributeError, OSError):
+        pass
+
+
+def _remove_tree(path: Path, rate: int, stop: Optional[threading.Event] = None) -> bool:
+    """自底向上逐个删除，按 rate 限速；stop 被设置时中途返回 False（下次继续）"""
+    started = time.monotonic()
+    count = 0
+    for dirpath, dirnames, filenames in os.walk(path, topdown=False):
+        for name in filenames + dirnames:
+            full = os.path.join(dirpath, name)
+            try:
+                if name in filenames or os.path.islink(full):
+                    os.unlink(full)
+                else:
+                    os.rmdir(full)
+            except FileNotFoundError:
+                pass
+            count += 1
+            ahead = count / rate - (time.monotonic() - started)
+            if ahead > 0:
+                if stop is not None and stop.wait(ahead):
+                    return False
+                if stop is None:
+                    time.sleep(ahead)
+    shutil.rmtree(path, ignore_errors=True)
+    return True
+
+
+class Trash:
+    """
+    回收站
+
+    用法：
+        trash = Trash(projects_dir)
+        entry = trash.move(workspace.path, "workspace", workspace.name, meta={...})
+        trash.restore(entry.id)         # 撤销期内
+        trash.purge_due()               # 删除过期条目（TrashPurger 在后台定期调用）
+    """
+
+    def __init__(self, projects_dir: Path, undo_seconds: float = UNDO_SECONDS):
+        self.dir = Path(projects_dir) / TRASH_DIR
+        self.undo_seconds = undo_seconds
+        self._lock = threading.Lock()
+
+    def _entry_dir(self, entry_id: str) -> Path:
+        return self.dir / entry_id
+
+    def _save(self, entry: TrashEntry):
+        entry_file = self._entry_dir(entry.id) / ENTRY_FILE
+        tmp_file = entry_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(asdict(entry), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, entry_file)
+
+    def _load(self, entry_id: str) -> Optional[TrashEntry]:
+        try:
+            with open(self._entry_dir(entry_id) / ENTRY_FILE, "r", encoding="utf-8") as f:
+                return TrashEntry(**json.load(f))
+        except (OSError, ValueError, TypeError):
+            return None
+
+    def entries(self) -> List[TrashEntry]:
+        """可恢复的条目（按删除时间倒序）"""
+        if not self.dir.exists():
+            return []
+        entries = [self._load(d.name) for d in self.dir.iterdir() if d.is_dir()]
+        entries = [e for e in entries if e is not None and e.state == "trashed"]
+        return sorted(entries, key=lambda e: e.deleted_at, reverse=True)
+
+    def get(self, entry_id: str) -> Optional[TrashEntry]:
+        return self._load(entry_id)
+
+    def move(self, path: Path, kind: str, name: str, meta: Optional[dict] = None) -> TrashEntry:
+        """把目录移入回收站（改名，立即完成）"""
+        path = Path(path)
+        if not path.is_dir():
+            raise FileNotFoundError(f"目录不存在: {path}")
+        now = datetime.now()
+        entry = TrashEntry(
+            id=f"{now.strftime('%Y%m%d_%H%M%S')}_{generate_id()[:8]}",
+            kind=kind,
+            name=name,
+            origin=str(path),
+            deleted_at=now.isoformat(),
+            purge_after=(now + timedelta(seconds=self.undo_seconds)).isoformat(),
+            meta=meta or {}
+        )
+        entry_dir = self._entry_dir(entry.id)
+        entry_dir.mkdir(parents=True)
+        # 先记下条目再改名：中途崩溃时 recover() 能判断改名是否已完成
+        self._save(entry)
+        os.rename(path, entry_dir / DATA_DIR)
+        entry.state = "trashed"
+        self._save(entry)
+        print(f"[操作] 移入回收站: {kind} {name}, {path} -> {entry_dir}, 撤销期 {self.undo_seconds:.0f}s")
+        return entry
+
+    def restore(self, entry_id: str, destination: Optional[Path] = None) -> Path:
+        """恢复到原路径（或 destination）；条目已开始删除或原路径已被占用时抛出 ValueError"""
+        with self._lock:
+            entry = self._load(entry_id)
+            if entry is None or entry.state != "trashed":
+                raise ValueError(f"回收站条目不存在或已清理: {entry_id}")
+            target = Path(destination or entry.origin)
+            if target.exists():
+                raise ValueError(f"原位置已存在同名目录: {target}")
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.rename(self._entry_dir(entry_id) / DATA_DIR, target)
+            shutil.rmtree(self._entry_dir(entry_id), ignore_errors=True)
+        print(f"[操作] 从回收站恢复: {entry.kind} {entry.name} -> {target}")
+        return target
+
+    def _claim(self, entry_id: str, force: bool) -> Optional[TrashEntry]:
+        """把到期（或 force）的条目标记为 purging，此后不可恢复"""
+        with self._lock:
+            entry = self._load(entry_id)
+            if entry is None or entry.state == "moving":
+                return None
+            if entry.state == "trashed" and not (force or entry.due):
+                return None
+            if entry.state != "purging":
+                entry.state = "purging"
+                self._save(entry)
+            return entry
+
+    def purge(self, entry_id: str, force: bool = False, rate: int = PURGE_RATE,
+              stop: Optional[threading.Event] = None) -> bool:
+        """删除条目的文件；返回是否删除完成"""
+        entry = self._claim(entry_id, force)
+        if entry is None:
+            return False
+        entry_dir = self._entry_dir(entry_id)
+        started = time.monotonic()
+        if not _remove_tree(entry_dir / DATA_DIR, rate, stop):
+            print(f"[操作] 回收站清理中断，下次继续: {entry.name}")
+            return False
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        print(f"[操作] 回收站清理完成: {entry.kind} {entry.name}, 耗时 {time.monotonic() - started:.1f}s")
+        return True
+
+    def purge_due(self, force: bool = False, rate: int = PURGE_RATE, stop: Optional[threading.Event] = None) -> int:
+        """删除所有到期（force 时全部）和中断删除的条目，返回完成数"""
+        if not self.dir.exists():
+            return 0
+        done = 0
+        for entry_dir in sorted(self.dir.iterdir()):
+            if stop is not None and stop.is_set():
+                break
+            if entry_dir.is_dir() and self.purge(entry_dir.name, force, rate, stop):
+                done += 1
+        return done
+
+    def recover(self) -> int:
+        """启动时清理中断的操作，返回处理的条目数"""
+        if not self.dir.exists():
+            return 0
+        fixed = 0
+        for entry_dir in self.dir.iterdir():
+            if not entry_dir.is_dir():
+                continue
+            entry = self._load(entry_dir.name)
+            data = entry_dir / DATA_DIR
+            if entry is None:
+                # 没有条目信息（写入前崩溃），只能删除
+                if data.exists():
+                    self._save_orphan(entry_dir)
+                else:
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                fixed += 1
+            elif entry.state == "moving":
+                if data.exists():
+                    # 改名已完成，补写状态
+                    entry.state = "trashed"
+                    self._save(entry)
+                else:
+                    shutil.rmtree(entry_dir, ignore_errors=True)
+                fixed += 1
+            elif entry.state == "purging":
+                fixed += 1
+        if fixed:
+            print(f"[操作] 回收站恢复检查: 处理中断的条目 {fixed} 个")
+        return fixed
+
+    def _save_orphan(self, entry_dir: Path):
+        now = datetime.now().isoformat()
+        self._save(TrashEntry(id=entry_dir.name, kind="unknown", name=entry_dir.name, origin="",
+                              deleted_at=now, purge_after=now, state="purging"))
+
+
+class TrashPurger:
+    """
+    后台清理线程：启动时先执行 recover()，之后每 PURGE_INTERVAL 秒删除到期条目；
+    线程降低优先级并限速删除，close() 时中途停止，未删完的条目下次启动继续
+
+    Args:
+        on_purged: 清理完若干条目后在后台线程中调用
+    """
+
+    def __init__(self, trash: Trash, rate: int = PURGE_RATE, on_purged: Optional[Callable[[int], None]] = None):
+        self.trash = trash
+        self.rate = rate
+        self.on_purged = on_purged
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="trash-purger", daemon=True)
+        self._thread.start()
+
+    def wake(self):
+        """有条目到期或需要立即清理时唤醒"""
+        self._wake.set()
+
+    def _run(self):
+        _lower_priority()
+        try:
+            self.trash.recover()
+        except OSError as e:
+            print(f"[错误] 回收站恢复检查失败: {str(e)}")
+        while not self._stop.is_set():
+            try:
+                done = self.trash.purge_due(rate=self.rate, stop=self._stop)
+            except OSError as e:
+                print(f"[错误] 回收站清理失败: {str(e)}")
+                done = 0
+            if done and self.on_purged:
+                self.on_purged(done)
+            self._wake.wait(PURGE_INTERVAL)
+            self._wake.clear()
+
+    def close(self):
+        self._stop.set()
+        self._wake.set()
+        self._thread.join(timeout=5)
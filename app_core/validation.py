@@ -0,0 +1,212 @@
+"""
+数据集校验
+检查零字节文件、无法解码的图片、没有图片的标注文件以及没有标注的图片；
+图片解码在进程池中并行执行，结果边完成边产出，支持取消和单项检查超时；
+结果按文件指纹（size, mtime）缓存在 .deeplocal/validation/ 下，重复校验只检查有变化的文件
+"""
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+import os
+import signal
+import threading
+import time
+
+import numpy as np
+
+from app_core.archive import scan_tree
+from app_core.manifest import IMAGE_EXTENSIONS, meta_dir, save_array
+
+
+VALIDATION_DIR = "validation"
+LABEL_EXTENSIONS = {".txt", ".xml"}
+LABEL_IGNORE = {"classes.txt"}
+PAIR_DIRS = {"images": "*", "labels": "*", "JPEGImages": "*", "Annotations": "*"}
+
+# 文件检查状态码（缓存用）
+OK, EMPTY, CORRUPT, TIMEOUT = 0, 1, 2, 3
+_STATUS_KIND = {EMPTY: "empty", CORRUPT: "corrupt", TIMEOUT: "timeout"}
+_STATUS_MESSAGE = {EMPTY: "文件为空", CORRUPT: "图片无法解码", TIMEOUT: "检查超时"}
+
+
+@dataclass
+class Finding:
+    """校验发现的问题"""
+    path: str
+    kind: str  # empty, corrupt, timeout, missing_image, missing_label
+    message: str = ""
+
+
+@contextmanager
+def _time_limit(seconds: float):
+    """Unix 下用 SIGALRM 限制单项检查耗时，其他平台不限制"""
+    if not seconds or not hasattr(signal, "setitimer") or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise TimeoutError()
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def _check_images(paths: List[str], time_budget: float) -> List[int]:
+    """子进程：逐个完整解码图片，返回状态码"""
+    from PIL import Image
+
+    result = []
+    for path in paths:
+        try:
+            with _time_limit(time_budget):
+                with Image.open(path) as img:
+                    img.load()
+            result.append(OK)
+        except TimeoutError:
+            result.append(TIMEOUT)
+        except Exception:
+            result.append(CORRUPT)
+    return result
+
+
+def _pair_key(rel: str) -> str:
+    """图片与标注的配对键：去掉扩展名，images/labels 等目录名视为同一层"""
+    parts = os.path.splitext(rel)[0].split("/")
+    return "/".join(PAIR_DIRS.get(p, p) for p in parts)
+
+
+class ValidationJob:
+    """
+    数据集校验任务
+
+    用法：
+        job = ValidationJob(dataset_path)
+        for finding in job.run():   # 可在另一线程调用 job.cancel()
+            ...
+    """
+
+    def __init__(self, root: Path, workers: Optional[int] = None, time_budget: float = 10.0, batch_size: int = 128):
+        self.root = Path(root)
+        self.workers = workers
+        self.time_budget = time_budget
+        self.batch_size = batch_size
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        print(f"[操作] 取消数据集校验: {self.root}")
+        self._cancel.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def run(self, progress: Optional[Callable[[int, int], None]] = None) -> Iterator[Finding]:
+        """执行校验，逐条产出问题；progress(已检查, 总数)"""
+        start = time.time()
+        files = scan_tree(self.root, skip_hidden=True)
+        images = {p: v for p, v in files.items() if os.path.splitext(p)[1].lower() in IMAGE_EXTENSIONS}
+        labels = {p: v for p, v in files.items()
+                  if os.path.splitext(p)[1].lower() in LABEL_EXTENSIONS and p.rsplit("/", 1)[-1] not in LABEL_IGNORE}
+        print(f"[操作] 数据集校验: {self.root}, 图片={len(images)}, 标注={len(labels)}")
+
+        # 配对检查（只有存在标注文件时才检查图片缺标注）
+        image_keys = {_pair_key(p) for p in images}
+        label_keys = {_pair_key(p) for p in labels}
+        for p in sorted(labels):
+            if _pair_key(p) not in image_keys:
+                yield Finding(p, "missing_image", "标注文件没有对应图片")
+        if labels:
+            for p in sorted(images):
+                if _pair_key(p) not in label_keys:
+                    yield Finding(p, "missing_label", "图片没有对应标注文件")
+
+        cache = self._load_cache()
+        status: Dict[str, Tuple[int, int, int]] = {}
+        todo = []
+        for p, (size, mtime) in sorted({**labels, **images}.items()):
+            cached = cache.get(p)
+            if cached is not None and cached[:2] == (size, mtime):
+                status[p] = cached
+            elif size == 0:
+                status[p] = (size, mtime, EMPTY)
+            elif p in images:
+                todo.append(p)
+            else:
+                status[p] = (size, mtime, OK)
+        for p, (_, _, code) in status.items():
+            if code != OK:
+                yield Finding(p, _STATUS_KIND[code], _STATUS_MESSAGE[code])
+
+        total = len(images) + len(labels)
+        done = total - len(todo)
+        print(f"[操作] 校验缓存命中={done}, 需解码={len(todo)}")
+        if progress:
+            progress(done, total)
+        try:
+            for p, code in self._decode(todo, images):
+                status[p] = (images[p][0], images[p][1], code)
+                done += 1
+                if progress:
+                    progress(done, total)
+                if code != OK:
+                    yield Finding(p, _STATUS_KIND[code], _STATUS_MESSAGE[code])
+        finally:
+            # 取消或中断时也保存已完成部分，下次从这里继续
+            self._save_cache(status)
+            state = "已取消" if self.cancelled else "完成"
+            print(f"[操作] 数据集校验{state}: {self.root}, 已检查={done}/{total}, 耗时={time.time() - start:.1f}s")
+
+    def _decode(self, todo: List[str], images: Dict[str, Tuple[int, int]]) -> Iterator[Tuple[str, int]]:
+        if not todo or self.cancelled:
+            return
+        batches = [todo[i:i + self.batch_size] for i in range(0, len(todo), self.batch_size)]
+        workers = self.workers or os.cpu_count() or 1
+        pool = ProcessPoolExecutor(max_workers=workers)
+        pending = {}
+        try:
+            next_batch = 0
+            while next_batch < len(batches) or pending:
+                # 在途批次数有上限，取消时不必等待大量排队任务
+                while next_batch < len(batches) and len(pending) < 2 * workers and not self.cancelled:
+                    batch = batches[next_batch]
+                    paths = [str(self.root / p) for p in batch]
+                    pending[pool.submit(_check_images, paths, self.time_budget)] = batch
+                    next_batch += 1
+                if self.cancelled:
+                    break
+                finished, _ = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    batch = pending.pop(future)
+                    for p, code in zip(batch, future.result()):
+                        yield p, code
+        finally:
+            pool.shutdown(wait=not self.cancelled, cancel_futures=True)
+
+    def _cache_dir(self) -> Path:
+        return meta_dir(self.root) / VALIDATION_DIR
+
+    def _load_cache(self) -> Dict[str, Tuple[int, int, int]]:
+        cache_dir = self._cache_dir()
+        if not (cache_dir / "status.npy").exists():
+            return {}
+        paths = np.load(cache_dir / "path.npy")
+        sizes = np.load(cache_dir / "size.npy")
+        mtimes = np.load(cache_dir / "mtime.npy")
+        codes = np.load(cache_dir / "status.npy")
+        return {p: (s, m, c) for p, s, m, c in zip(paths.tolist(), sizes.tolist(), mtimes.tolist(), codes.tolist())}
+
+    def _save_cache(self, status: Dict[str, Tuple[int, int, int]]):
+        cache_dir = self._cache_dir()
+        cache_dir.mkdir(parents=True, exist_ok=True)
+        paths = sorted(status)
+        save_array(cache_dir / "path.npy", np.array(paths, dtype=str))
+        save_array(cache_dir / "size.npy", np.array([status[p][0] for p in paths], dtype=np.int64))
+        save_array(cache_dir / "mtime.npy", np.array([status[p][1] for p in paths], dtype=np.int64))
+        save_array(cache_dir / "status.npy", np.array([status[p][2] for p in paths], dtype=np.int8))
@@ -1,3 +1,6 @@
-from .main_window import MainWindow
-
-
+def __getattr__(name):
+    # 延迟导入：只用 app_ui.models 的后台进程（如训练任务）不需要加载 PyQt6
+    if name == "MainWindow":
+        from .main_window import MainWindow
+        return MainWindow
+    raise AttributeError(name)
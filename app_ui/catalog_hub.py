@@ -0,0 +1,48 @@
+"""
+本地目录服务的 GUI 端
+服务在后台线程运行；外部脚本的写操作产生的变化先在这里攒起来，按固定频率合并成一次 changed 信号，
+脚本每秒提交上百个请求，界面也只刷新有限次数。提交实验的请求转到主线程，由 MainWindow 的调度器执行
+"""
+from collections import deque
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QTimer, pyqtSignal
+
+from app_core.catalog_server import CatalogServer
+from app_core.projects import ProjectService
+from cedar.utils import print
+
+
+class CatalogHub(QObject):
+    """目录服务的 GUI 端"""
+
+    changed = pyqtSignal(list)                  # 本周期内的 delta 列表
+    submit_requested = pyqtSignal(object, int)  # 实验, 优先级（跨线程信号，在主线程执行）
+
+    UPDATE_INTERVAL = 100
+
+    def __init__(self, service: ProjectService, port=None, parent=None):
+        super().__init__(parent)
+        self._pending = deque()
+        self.server = CatalogServer(service, port=port, on_delta=self._pending.append,
+                                    submit=self.submit_requested.emit)
+        self.server.start()
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._emit)
+        self._timer.start(self.UPDATE_INTERVAL)
+
+    def _emit(self):
+        deltas = []
+        while self._pending:
+            deltas.append(self._pending.popleft())
+        if deltas:
+            self.changed.emit(deltas)
+
+    def invalidate(self, project_path: Path):
+        """GUI 修改了项目，通知服务重新加载"""
+        self.server.invalidate(project_path)
+
+    def close(self):
+        print("[操作] 关闭本地目录服务")
+        self._timer.stop()
+        self.server.stop()
@@ -4,6 +4,9 @@ UI 组件模块
 from app_ui.component.layout import Row, Col
 from app_ui.component.card import Card
 from app_ui.component.gradio import GradioRow, GradioColumn, GradioGroup
+from app_ui.component.metric_chart import MetricChart
+from app_ui.component.log_view import LogView
+from app_ui.component.experiment_table import ExperimentTable
 
-__all__ = ['Row', 'Col', 'Card', 'GradioRow', 'GradioColumn', 'GradioGroup']
+__all__ = ['Row', 'Col', 'Card', 'GradioRow', 'GradioColumn', 'GradioGroup', 'MetricChart', 'LogView', 'ExperimentTable']
 
@@ -0,0 +1,185 @@
+"""
+实验对比表
+数据来自 ExperimentIndex：模型只持有当前页，排序、过滤、分页都交给索引查询，
+QTableView 只绘制可见单元格，实验数量再多表格也保持流畅；
+索引刷新（扫描实验目录）在后台线程执行，先按已保存的索引显示，刷新到变化后再重新查询
+"""
+from pathlib import Path
+from typing import Any, List, Optional
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLineEdit, QPushButton, QLabel, QTableView, QHeaderView
+)
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, QTimer, pyqtSignal
+
+from app_core.experiment_index import ExperimentIndex, QueryResult
+from app_ui.workers import IndexRefreshWorker
+from cedar.utils import print
+
+
+class ExperimentTableModel(QAbstractTableModel):
+    """当前页的实验行"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.result = QueryResult(total=0, columns=[], rows=[])
+
+    def set_result(self, result: QueryResult):
+        self.beginResetModel()
+        self.result = result
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.result.rows)
+
+    def columnCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self.result.columns)
+
+    def data(self, index: QModelIndex, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if not index.isValid():
+            return None
+        value = self.result.rows[index.row()].get(self.result.columns[index.column()])
+        if role == Qt.ItemDataRole.DisplayRole:
+            if value is None:
+                return ""
+            return f"{value:.6g}" if isinstance(value, float) else str(value)
+        if role == Qt.ItemDataRole.TextAlignmentRole and isinstance(value, (int, float)):
+            return int(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+        return None
+
+    def headerData(self, section: int, orientation: Qt.Orientation, role=Qt.ItemDataRole.DisplayRole) -> Any:
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.result.columns[section]
+        return None
+
+
+class ExperimentTable(QWidget):
+    """
+    实验对比表 - 过滤框 + 表格 + 分页
+
+    过滤示例：lr<1e-3 and status==completed；点击表头按该列排序
+    """
+
+    experiments_selected = pyqtSignal(list)     # 用户选中的行（当前页的行字典，含 id、name 等列）
+
+    PAGE_SIZE = 100
+    REFRESH_INTERVAL = 2000
+
+    def __init__(self, parent: Optional[QWidget] = None):
+        super().__init__(parent)
+        self.index: Optional[ExperimentIndex] = None
+        self._worker: Optional[IndexRefreshWorker] = None
+        self.page = 0
+        self.sort_column: Optional[str] = None
+        self.descending = False
+        self.init_ui()
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+
+    def init_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText("过滤，如 lr<1e-3 and status==completed")
+        self.filter_edit.returnPressed.connect(self._on_filter)
+        layout.addWidget(self.filter_edit)
+
+        self.model = ExperimentTableModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.verticalHeader().setVisible(False)
+        header = self.table.horizontalHeader()
+        header.setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        header.setSortIndicatorShown(True)
+        header.sectionClicked.connect(self._on_header_clicked)
+        self.table.selectionModel().selectionChanged.connect(self._on_selection_changed)
+        layout.addWidget(self.table)
+
+        pager = QHBoxLayout()
+        self.status_label = QLabel("")
+        pager.addWidget(self.status_label)
+        pager.addStretch()
+        self.btn_prev = QPushButton("上一页")
+        self.btn_prev.clicked.connect(lambda: self._goto(self.page - 1))
+        pager.addWidget(self.btn_prev)
+        self.btn_next = QPushButton("下一页")
+        self.btn_next.clicked.connect(lambda: self._goto(self.page + 1))
+        pager.addWidget(self.btn_next)
+        layout.addLayout(pager)
+
+    def set_workspace(self, workspace_path: Path):
+        """切换到一个工作区的实验"""
+        print(f"[操作] 加载实验对比表: {workspace_path}")
+        self.index = ExperimentIndex(workspace_path)
+        self.page = 0
+        self.reload()
+        self.refresh()
+        self._timer.start(self.REFRESH_INTERVAL)
+
+    def close_workspace(self):
+        """离开工作区：停止定时刷新，等待正在进行的刷新结束"""
+        self._timer.stop()
+        if self._worker:
+            self._worker.wait()
+            self._worker = None
+        self.index = None
+        self.model.set_result(QueryResult(total=0, columns=[], rows=[]))
+        self.status_label.setText("")
+
+    def refresh(self):
+        """在后台线程增量刷新索引（实验结束后结果写入 experiment.json），有变化时重新查询"""
+        if not self.index or (self._worker and self._worker.isRunning()):
+            return
+        self._worker = IndexRefreshWorker(self.index, self)
+        self._worker.refreshed.connect(self._on_refreshed)
+        self._worker.start()
+
+    def _on_refreshed(self, changed: list):
+        # 刷新期间已切换到其他工作区时忽略
+        if self.sender().index is self.index:
+            self.reload()
+
+    def reload(self):
+        if not self.index:
+            return
+        try:
+            result = self.index.query(
+                self.filter_edit.text(), sort=self.sort_column, descending=self.descending,
+                offset=self.page * self.PAGE_SIZE, limit=self.PAGE_SIZE
+            )
+        except (KeyError, ValueError) as e:
+            self.status_label.setText(str(e).strip("'"))
+            return
+        self.model.set_result(result)
+        pages = max(1, -(-result.total // self.PAGE_SIZE))
+        self.status_label.setText(f"共 {result.total} 个实验，第 {self.page + 1}/{pages} 页")
+        self.btn_prev.setEnabled(self.page > 0)
+        self.btn_next.setEnabled(self.page + 1 < pages)
+
+    def _on_selection_changed(self, *_):
+        rows = sorted({i.row() for i in self.table.selectionModel().selectedRows()})
+        # 重新查询（模型重置）清空选中时不通知，保持下方面板显示的实验
+        if rows:
+            self.experiments_selected.emit([self.model.result.rows[r] for r in rows])
+
+    def _goto(self, page: int):
+        self.page = max(0, page)
+        self.reload()
+
+    def _on_filter(self):
+        self.page = 0
+        self.reload()
+
+    def _on_header_clicked(self, section: int):
+        columns: List[str] = self.model.result.columns
+        if section >= len(columns):
+            return
+        column = columns[section]
+        self.descending = not self.descending if column == self.sort_column else False
+        self.sort_column = column
+        order = Qt.SortOrder.DescendingOrder if self.descending else Qt.SortOrder.AscendingOrder
+        self.table.horizontalHeader().setSortIndicator(section, order)
+        self.page = 0
+        self.reload()
@@ -0,0 +1,128 @@
+"""
+实时日志视图
+只绘制可见行，行内容来自 LogTail（末尾从环形缓冲取，早期内容经稀疏索引 seek 读取），
+日志再大也不会把全文放进 QTextEdit；大文件第一次打开时每个事件循环周期只读取 READ_BUDGET 字节，
+分多次追上，不阻塞界面；滚动到底部时自动跟随新内容
+"""
+from pathlib import Path
+from typing import Optional
+
+from PyQt6.QtWidgets import QAbstractScrollArea, QWidget
+from PyQt6.QtCore import Qt, QSocketNotifier, QTimer
+from PyQt6.QtGui import QFontDatabase, QPainter
+
+from app_core.log_tail import READ_BUDGET, FileWatcher, LogTail
+from cedar.utils import print
+
+
+class LogView(QAbstractScrollArea):
+    """
+    日志跟随视图
+
+    用法：
+        view = LogView()
+        view.open(experiment.path / "train.log")
+    """
+
+    POLL_INTERVAL = 500
+
+    def __init__(self, parent: Optional[QWidget] = None, max_lines: int = 10000):
+        super().__init__(parent)
+        self.max_lines = max_lines
+        self.tail: Optional[LogTail] = None
+        self._watcher: Optional[FileWatcher] = None
+        self._notifier: Optional[QSocketNotifier] = None
+        self._follow = True
+        self.setFont(QFontDatabase.systemFont(QFontDatabase.SystemFont.FixedFont))
+        self.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._poll)
+        # 大文件分批读取：每个事件循环周期读一批，直到追上文件末尾
+        self._catch_up = QTimer(self)
+        self._catch_up.setSingleShot(True)
+        self._catch_up.setInterval(0)
+        self._catch_up.timeout.connect(self._read)
+        self.verticalScrollBar().valueChanged.connect(self._on_scrolled)
+
+    def open(self, path: Path):
+        """开始跟随一个日志文件"""
+        self.close_log()
+        print(f"[操作] 打开实时日志: {path}")
+        self.tail = LogTail(path, max_lines=self.max_lines)
+        self._watcher = FileWatcher(path)
+        fd = self._watcher.fileno()
+        if fd is not None:
+            self._notifier = QSocketNotifier(fd, QSocketNotifier.Type.Read, self)
+            self._notifier.activated.connect(self._poll)
+        else:
+            self._timer.start(self.POLL_INTERVAL)
+        self._follow = True
+        self._read()
+
+    def close_log(self):
+        self._timer.stop()
+        self._catch_up.stop()
+        if self._notifier:
+            self._notifier.setEnabled(False)
+            self._notifier.deleteLater()
+            self._notifier = None
+        if self._watcher:
+            self._watcher.close()
+            self._watcher = None
+        self.tail = None
+        self.viewport().update()
+
+    def _poll(self):
+        if self._watcher and self._watcher.changed():
+            self._read()
+
+    def _read(self):
+        if self.tail is None:
+            return
+        count = self.tail.read_new(READ_BUDGET)
+        if self.tail.pending:
+            # 还没追上：下个事件循环周期继续读，期间界面照常响应
+            self._catch_up.start()
+        if not count:
+            return
+        self._update_scrollbar()
+        self.viewport().update()
+
+    def _line_height(self) -> int:
+        return self.fontMetrics().lineSpacing()
+
+    def _visible_lines(self) -> int:
+        return max(1, self.viewport().height() // self._line_height())
+
+    def _max_scroll(self) -> int:
+        return max(0, self.tail.line_count - self._visible_lines()) if self.tail else 0
+
+    def _update_scrollbar(self):
+        bar = self.verticalScrollBar()
+        bar.blockSignals(True)
+        bar.setRange(0, self._max_scroll())
+        bar.setPageStep(self._visible_lines())
+        if self._follow:
+            bar.setValue(bar.maximum())
+        bar.blockSignals(False)
+
+    def _on_scrolled(self, value: int):
+        # 用户滚到底部时恢复跟随，向上翻看时停止跟随
+        self._follow = value >= self.verticalScrollBar().maximum()
+        self.viewport().update()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self._update_scrollbar()
+
+    def paintEvent(self, event):
+        if not self.tail:
+            return
+        painter = QPainter(self.viewport())
+        painter.setFont(self.font())
+        height = self._line_height()
+        ascent = self.fontMetrics().ascent()
+        first = self.verticalScrollBar().value()
+        for i, line in enumerate(self.tail.lines(first, self._visible_lines() + 1)):
+            painter.drawText(4, i * height + ascent, line)
+        painter.end()
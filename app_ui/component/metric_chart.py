@@ -0,0 +1,167 @@
+"""
+实验指标曲线组件
+多个实验的同一指标画在共享坐标轴上；定时只读取新增的点追加到定容缓冲，
+绘制时按像素列取 min/max 包络，重绘开销只与控件宽度有关，与训练步数无关
+"""
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from PyQt6.QtWidgets import QWidget
+from PyQt6.QtCore import Qt, QTimer, QPointF, QRectF
+from PyQt6.QtGui import QPainter, QPen, QColor, QPolygonF
+
+from app_core.downsample import EnvelopeBuffer, pixel_envelope
+from app_core.metrics_store import MetricsReader
+
+
+SERIES_COLORS = ["#409eff", "#e6a23c", "#67c23a", "#f56c6c", "#909399", "#9b59b6", "#1abc9c", "#34495e"]
+
+
+@dataclass
+class _Series:
+    label: str
+    reader: MetricsReader
+    color: QColor
+    buffer: EnvelopeBuffer = field(default_factory=EnvelopeBuffer)
+
+
+class MetricChart(QWidget):
+    """
+    指标曲线 - 类似 TensorBoard 的标量图
+
+    用法：
+        chart = MetricChart(metric="loss")
+        chart.add_experiment(experiment.path, experiment.name)
+    """
+
+    MARGIN_LEFT = 56
+    MARGIN_RIGHT = 12
+    MARGIN_TOP = 12
+    MARGIN_BOTTOM = 28
+
+    def __init__(self, parent: Optional[QWidget] = None, metric: str = "loss", interval: int = 1000):
+        super().__init__(parent)
+        self.metric = metric
+        self.series: List[_Series] = []
+        self.setMinimumHeight(200)
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self.refresh)
+        if interval:
+            self._timer.start(interval)
+
+    def add_experiment(self, experiment_path: Path, label: str):
+        color = QColor(SERIES_COLORS[len(self.series) % len(SERIES_COLORS)])
+        self.series.append(_Series(label, MetricsReader(Path(experiment_path)), color))
+        self.refresh()
+
+    def clear(self):
+        self.series.clear()
+        self.update()
+
+    def set_metric(self, metric: str):
+        """切换指标，已有序列重新加载"""
+        self.metric = metric
+        for s in self.series:
+            s.buffer.clear()
+        self.refresh()
+        self.update()
+
+    def refresh(self):
+        """读取各实验新增的点，有变化时重绘"""
+        changed = False
+        for s in self.series:
+            count = s.reader.count(self.metric)
+            if count < s.buffer.total:
+                # 指标文件被重建（例如训练重新开始）
+                s.buffer.clear()
+            if count > s.buffer.total:
+                points = s.reader.points(self.metric, s.buffer.total)[:count - s.buffer.total]
+                s.buffer.extend(points["step"], points["value"])
+                changed = True
+        if changed:
+            self.update()
+
+    def _bounds(self):
+        visible = [s.buffer for s in self.series if s.buffer.n]
+        if not visible:
+            return None
+        x0 = min(b.step[0] for b in visible)
+        x1 = max(b.step[-1] for b in visible)
+        y0 = min(np.nanmin(b.min) for b in visible)
+        y1 = max(np.nanmax(b.max) for b in visible)
+        if not np.isfinite(y0) or not np.isfinite(y1):
+            return None
+        if y1 <= y0:
+            y0, y1 = y0 - 0.5, y1 + 0.5
+        pad = (y1 - y0) * 0.05
+        return float(x0), float(max(x1, x0 + 1)), float(y0 - pad), float(y1 + pad)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        plot = QRectF(
+            self.MARGIN_LEFT, self.MARGIN_TOP,
+            max(self.width() - self.MARGIN_LEFT - self.MARGIN_RIGHT, 1),
+            max(self.height() - self.MARGIN_TOP - self.MARGIN_BOTTOM, 1)
+        )
+        text_color = self.palette().color(self.foregroundRole())
+        painter.setPen(QPen(text_color, 1))
+        painter.drawRect(plot)
+
+        bounds = self._bounds()
+        if bounds is None:
+            painter.drawText(plot, Qt.AlignmentFlag.AlignCenter, f"暂无指标数据: {self.metric}")
+            painter.end()
+            return
+        x0, x1, y0, y1 = bounds
+        self._draw_ticks(painter, plot, bounds, text_color)
+
+        width = int(plot.width())
+        y_scale = plot.height() / (y1 - y0)
+        for s in self.series:
+            b = s.buffer
+            if not b.n:
+                continue
+            columns, low, high, mean = pixel_envelope(b.step, b.min, b.max, b.mean, x0, x1, width)
+            xs = plot.left() + columns * (plot.width() / max(width - 1, 1))
+            to_y = lambda v: plot.bottom() - (v - y0) * y_scale
+            ok = np.isfinite(mean)
+            if b.bucket_size > 1 and len(xs) > 1:
+                # min/max 包络（半透明），保留降采样中的尖峰
+                band = QColor(s.color)
+                band.setAlpha(60)
+                painter.setPen(Qt.PenStyle.NoPen)
+                painter.setBrush(band)
+                env = np.isfinite(low) & np.isfinite(high)
+                upper = [QPointF(x, y) for x, y in zip(xs[env].tolist(), to_y(high[env]).tolist())]
+                lower = [QPointF(x, y) for x, y in zip(xs[env][::-1].tolist(), to_y(low[env][::-1]).tolist())]
+                painter.drawPolygon(QPolygonF(upper + lower))
+                painter.setBrush(Qt.BrushStyle.NoBrush)
+            painter.setPen(QPen(s.color, 1.5))
+            line = [QPointF(x, y) for x, y in zip(xs[ok].tolist(), to_y(mean[ok]).tolist())]
+            painter.drawPolyline(QPolygonF(line))
+
+        # 图例
+        painter.setPen(QPen(text_color, 1))
+        legend_y = plot.top() + 14
+        for s in self.series:
+            painter.fillRect(QRectF(plot.left() + 8, legend_y - 8, 10, 10), s.color)
+            painter.drawText(QPointF(plot.left() + 22, legend_y + 1), s.label)
+            legend_y += 16
+        painter.end()
+
+    def _draw_ticks(self, painter: QPainter, plot: QRectF, bounds, color: QColor, ticks: int = 5):
+        x0, x1, y0, y1 = bounds
+        painter.setPen(QPen(color, 1))
+        for i in range(ticks):
+            frac = i / (ticks - 1)
+            x = plot.left() + frac * plot.width()
+            y = plot.bottom() - frac * plot.height()
+            painter.drawLine(QPointF(x, plot.bottom()), QPointF(x, plot.bottom() + 4))
+            painter.drawLine(QPointF(plot.left() - 4, y), QPointF(plot.left(), y))
+            painter.drawText(QRectF(x - 40, plot.bottom() + 6, 80, 16),
+                             Qt.AlignmentFlag.AlignHCenter, f"{x0 + frac * (x1 - x0):.0f}")
+            painter.drawText(QRectF(0, y - 8, plot.left() - 6, 16),
+                             Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter, f"{y0 + frac * (y1 - y0):.4g}")
@@ -0,0 +1,40 @@
+"""
+配置文件监视的 GUI 端
+监视 app.yaml（编辑器常以替换方式保存，同时监视所在目录），连续的修改合并后重新解析一次，
+有变化时发出 changed 信号，由 MainWindow 应用可以在运行中生效的配置
+"""
+from PyQt6.QtCore import QFileSystemWatcher, QObject, QTimer, pyqtSignal
+
+from app_core.config import ConfigService
+
+
+class ConfigHub(QObject):
+    """配置服务的 GUI 端"""
+
+    changed = pyqtSignal(object, object, list)  # 旧配置, 新配置, 变化的字段
+
+    RELOAD_DELAY = 300
+
+    def __init__(self, service: ConfigService, parent=None):
+        super().__init__(parent)
+        self.service = service
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.addPath(str(service.path.parent))
+        if service.path.exists():
+            self.watcher.addPath(str(service.path))
+        self.watcher.fileChanged.connect(lambda path: self._timer.start())
+        self.watcher.directoryChanged.connect(lambda path: self._timer.start())
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(self.RELOAD_DELAY)
+        self._timer.timeout.connect(self._reload)
+
+    def _reload(self):
+        path = str(self.service.path)
+        # 替换保存后原文件的监视失效，重新加上
+        if self.service.path.exists() and path not in self.watcher.files():
+            self.watcher.addPath(path)
+        old = self.service.config
+        changed = self.service.reload()
+        if changed:
+            self.changed.emit(old, self.service.config, changed)
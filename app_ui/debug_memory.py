@@ -0,0 +1,183 @@
+"""
+内存调试模式（app.yaml 中 debug_memory: true 或环境变量 DEEPLOCAL_DEBUG_MEMORY=1）
+刷新项目列表、显示项目详情、进入工作区等操作包在 cycle(名称) 中；每次操作前后先执行 deleteLater、回收 Python 垃圾，
+再按类名统计存活的 QObject 并记录 tracemalloc 的内存。重复多次同一操作后，report() 列出每次操作都留下的
+QObject 类和增长最多的代码行。未开启时 cycle() 返回空的上下文，没有额外开销
+"""
+from collections import Counter, defaultdict
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+import gc
+import os
+import tracemalloc
+
+from PyQt6 import sip
+from PyQt6.QtCore import QCoreApplication, QEvent, QObject
+from PyQt6.QtWidgets import QApplication
+
+from cedar.utils import print
+
+
+DEBUG_ENV = "DEEPLOCAL_DEBUG_MEMORY"
+TOP_LINES = 10
+
+_probe: Optional["MemoryProbe"] = None
+
+
+def enabled(config) -> bool:
+    """app.yaml 开启，或环境变量为 1 / true / yes / on（0、false、空值等视为关闭）"""
+    flag = os.environ.get(DEBUG_ENV, "").strip().lower()
+    return bool(config.debug_memory) or flag in ("1", "true", "yes", "on")
+
+
+def install(probe: Optional["MemoryProbe"]):
+    """设置当前进程使用的探针（None 关闭）"""
+    global _probe
+    _probe = probe
+
+
+def active() -> Optional["MemoryProbe"]:
+    return _probe
+
+
+def cycle(name: str):
+    """包住一次界面操作；调试模式关闭时什么也不做"""
+    return _probe.cycle(name) if _probe is not None else nullcontext()
+
+
+def count_qobjects() -> Counter:
+    """
+    存活的 QObject 按类名计数：应用和顶层窗口的对象树（setParent(None) 后未释放的部件是隐藏的顶层窗口），
+    加上只被 Python 引用、不在任何对象树中的对象
+    """
+    live = {}
+    app = QCoreApplication.instance()
+    roots = [app] if app is not None else []
+    if isinstance(app, QApplication):
+        roots += QApplication.topLevelWidgets()
+    for root in roots:
+        live[sip.unwrapinstance(root)] = root
+        for child in root.findChildren(QObject):
+            live[sip.unwrapinstance(child)] = child
+    for obj in gc.get_objects():
+        if isinstance(obj, QObject) and not sip.isdeleted(obj):
+            live.setdefault(sip.unwrapinstance(obj), obj)
+    return Counter(type(obj).__name__ for obj in live.values())
+
+
+def _settle():
+    """执行已排队的 deleteLater 并回收 Python 垃圾（闭包引用环中的部件要等 gc 才释放）"""
+    QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete.value)
+    gc.collect()
+
+
+@dataclass
+class Sample:
+    objects: Counter
+    traced: int
+    snapshot: Optional[tracemalloc.Snapshot] = None
+
+
+@dataclass
+class Growth:
+    """某个操作预热后平均每次留下的增长"""
+    name: str
+    cycles: int
+    bytes_per_cycle: float
+    objects: Dict[str, float] = field(default_factory=dict)    # 类名 -> 每次增加的个数（只含每次都不减少的类）
+    lines: List[str] = field(default_factory=list)             # tracemalloc 增长最多的代码行
+
+    @property
+    def objects_per_cycle(self) -> float:
+        return sum(self.objects.values())
+
+
+class MemoryProbe:
+    """
+    操作前后的内存采样：每次操作开始前和结束后各采样一次，差值即这次操作留下的对象和内存，
+    不同操作交替执行时互不影响
+
+    用法：
+        probe = MemoryProbe(warmup=3)
+        install(probe)
+        with cycle("refresh"):
+            ...
+        for growth in probe.report():
+            ...
+
+    Args:
+        warmup: 每种操作前几次不计入（缓存、懒加载的模块等第一次操作时的正常增长）
+        frames: tracemalloc 记录的调用栈深度
+    """
+
+    def __init__(self, warmup: int = 3, frames: int = 1):
+        self.warmup = warmup
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(frames)
+        # 操作名 -> 每次的 (类名 -> 增加个数, 增加字节数)
+        self._deltas: Dict[str, List[tuple]] = defaultdict(list)
+        # 操作名 -> 代码行 -> 预热后累计增加的字节数
+        self._lines: Dict[str, Counter] = defaultdict(Counter)
+        self._depth = 0
+
+    @contextmanager
+    def cycle(self, name: str):
+        # 嵌套的操作（如撤销删除时刷新列表再显示项目）只按最外层计
+        outer = self._depth == 0
+        before = self._sample(name) if outer else None
+        self._depth += 1
+        try:
+            yield
+        finally:
+            self._depth -= 1
+        if outer:
+            self._record(name, before)
+
+    def _sample(self, name: str) -> Sample:
+        _settle()
+        snapshot = None
+        # 快照较慢，预热期间不取
+        if len(self._deltas[name]) >= self.warmup:
+            snapshot = tracemalloc.take_snapshot().filter_traces([
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, __file__),
+            ])
+        return Sample(objects=count_qobjects(), traced=tracemalloc.get_traced_memory()[0], snapshot=snapshot)
+
+    def _record(self, name: str, before: Sample):
+        after = self._sample(name)
+        objects = {cls: after.objects[cls] - before.objects[cls] for cls in after.objects | before.objects}
+        self._deltas[name].append((objects, after.traced - before.traced))
+        if before.snapshot is not None and after.snapshot is not None:
+            for stat in after.snapshot.compare_to(before.snapshot, "lineno"):
+                if stat.size_diff:
+                    self._lines[name][str(stat.traceback)] += stat.size_diff
+
+    def report(self) -> List[Growth]:
+        """预热后至少重复两次的操作，按每次增长的字节数从大到小"""
+        result = []
+        for name, deltas in self._deltas.items():
+            measured = deltas[self.warmup:]
+            if len(measured) < 2:
+                continue
+            cycles = len(measured)
+            objects = {}
+            for cls in set().union(*(d[0] for d in measured)):
+                counts = [d[0].get(cls, 0) for d in measured]
+                if sum(counts) > 0 and min(counts) >= 0:
+                    objects[cls] = sum(counts) / cycles
+            lines = [f"{where}: 每次 {size / cycles / 1024:+.1f} KiB"
+                     for where, size in self._lines[name].most_common(TOP_LINES) if size > 0]
+            result.append(Growth(name=name, cycles=cycles, bytes_per_cycle=sum(d[1] for d in measured) / cycles,
+                                 objects=objects, lines=lines))
+        return sorted(result, key=lambda g: g.bytes_per_cycle, reverse=True)
+
+    def print_report(self):
+        for growth in self.report():
+            print(f"[内存] {growth.name}: {growth.cycles} 次, 每次 {growth.bytes_per_cycle / 1024:+.1f} KiB, "
+                  f"QObject 每次 {growth.objects_per_cycle:+.1f}")
+            for cls, per_cycle in sorted(growth.objects.items(), key=lambda item: -item[1]):
+                print(f"[内存]   {cls}: 每次 +{per_cycle:.1f}")
+            for line in growth.lines:
+                print(f"[内存]   {line}")
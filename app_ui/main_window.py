@@ -1,11 +1,23 @@
-from PyQt6.QtWidgets import QMainWindow
-from datetime import datetime
+from PyQt6.QtWidgets import QMainWindow, QStackedWidget
+from PyQt6.QtCore import QTimer
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from app_ui.models import Project, Workspace
+from app_ui.models import Project, Workspace, Experiment
+from app_core.artifacts import ArtifactJanitor, RetentionPolicy
+from app_core.config import AppConfig, config_service
+from app_core.projects import ProjectService
+from app_core.scheduler import ExperimentScheduler
+from app_core.sweep import Sweep, SweepRunner, create_sweep, load_sweeps
+from app_core.trash import TrashEntry, TrashPurger
+from app_ui import debug_memory
+from app_ui.catalog_hub import CatalogHub
+from app_ui.config_hub import ConfigHub
+from app_ui.progress_hub import ProgressHub
+from app_ui.usage_hub import DiskUsageHub
 
 from app_ui.project_center import ProjectCenterWidget
-from utils.utils import generate_id, format_datetime
-from cedar.utils import print, load_config
+from app_ui.workspace_view import WorkspaceViewWidget
+from cedar.utils import print
 
 
 class MainWindow(QMainWindow):
@@ -13,125 +25,235 @@ class MainWindow(QMainWindow):
     
     def __init__(self):
         super().__init__()
-        config = load_config()
-        self.setWindowTitle(config['window_title'])
-        self.resize(config['window_width'], config['window_height'])
+        # 配置只解析一次（进程内缓存）；app.yaml 修改后由 ConfigHub 重新解析，可在运行中生效的配置直接应用
+        self.config_service = config_service()
+        config = self.config_service.config
+        self.setWindowTitle(config.window_title)
+        self.resize(config.window_width, config.window_height)
         self.current_project = None
         self.current_workspace = None
-        self.projects_dir = Path(config['project_dir'])
-        print(f"[启动] 主窗口初始化，项目目录: {self.projects_dir}")
+        print(f"[启动] 主窗口初始化，项目目录: {config.project_dir}")
+        # 内存调试模式：刷新列表、显示项目、进入工作区前后采样，关闭窗口时输出持续增长的对象
+        if debug_memory.enabled(config):
+            print("[启动] 内存调试模式已开启")
+            debug_memory.install(debug_memory.MemoryProbe())
+        self.scheduler_timer = QTimer(self)
+        self.scheduler_timer.timeout.connect(self._on_scheduler_tick)
+        self.artifact_janitor = ArtifactJanitor()
+        # 搜索提前停止检查的指标读取
+        self.sweep_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sweep-poll")
+        # 磁盘占用：后台建立索引并按事件增量更新，详情面板直接读取合计
+        self.disk_usage = DiskUsageHub(config.project_dir, self)
+        self._open_project_dir(config)
+        self.scheduler_timer.start(1000)
+        self.config_hub = ConfigHub(self.config_service, self)
+        self.config_hub.changed.connect(self._on_config_changed)
         
         self.init_ui()
     
+    def _open_project_dir(self, config: AppConfig):
+        """创建与项目目录绑定的服务（启动时和切换 project_dir 时调用）"""
+        self.projects_dir = config.project_dir
+        self.project_service = ProjectService(self.projects_dir)
+        # 删除先移入回收站，撤销期（app.yaml 中 trash_undo_seconds）过后后台低优先级清理；启动时继续中断的清理
+        self.project_service.trash.undo_seconds = config.trash_undo_seconds
+        self.trash_purger = TrashPurger(self.project_service.trash)
+        
+        # 实验调度：子进程运行，定时回收结束的任务并启动排队任务
+        self.scheduler = ExperimentScheduler(self.projects_dir)
+        self.sweep_runners = {}
+        # 训练进程实时上报进度；实验结束的状态事件到达时立即回收，不必等下一次定时
+        self.progress_hub = ProgressHub(self.projects_dir, self)
+        self.progress_hub.status_changed.connect(lambda experiment_id, status: self.scheduler.poll())
+        self.progress_hub.updated.connect(self._on_progress_updated)
+        self._start_catalog_hub(config)
+    
+    def _close_project_dir(self):
+        self._stop_catalog_hub()
+        self.progress_hub.close()
+        self.progress_hub.deleteLater()
+        self.trash_purger.close()
+    
+    def _start_catalog_hub(self, config: AppConfig):
+        """可选的本地目录服务（app.yaml 中 rpc_server: true），供脚本在 GUI 打开时操作项目"""
+        self.catalog_hub = None
+        if config.rpc_server:
+            self.catalog_hub = CatalogHub(self.project_service, config.rpc_port, self)
+            self.catalog_hub.changed.connect(self._on_catalog_changed)
+            self.catalog_hub.submit_requested.connect(self.submit_experiment)
+    
+    def _stop_catalog_hub(self):
+        if self.catalog_hub:
+            self.catalog_hub.close()
+            self.catalog_hub.deleteLater()
+            self.catalog_hub = None
+    
+    def _on_config_changed(self, old: AppConfig, new: AppConfig, changed: list):
+        """app.yaml 被修改：应用可以在运行中生效的配置"""
+        if "window_title" in changed:
+            self.setWindowTitle(new.window_title)
+        if "window_width" in changed or "window_height" in changed:
+            self.resize(new.window_width, new.window_height)
+        if "project_dir" in changed and self._switch_project_dir(new):
+            # 新目录的服务已按新配置创建
+            return
+        if "trash_undo_seconds" in changed:
+            self.project_service.trash.undo_seconds = new.trash_undo_seconds
+        if "rpc_server" in changed or "rpc_port" in changed:
+            self._stop_catalog_hub()
+            self._start_catalog_hub(new)
+    
+    def _switch_project_dir(self, config: AppConfig) -> bool:
+        """
+        切换项目目录；有实验正在运行时不切换（重启后生效）。
+        新目录的项目列表索引和磁盘占用索引从各自保存的结果加载，只重新读取有变化的项目
+        """
+        running = self.scheduler.running_jobs()
+        if running:
+            print(f"[配置] 有 {len(running)} 个实验正在运行，project_dir 的修改在重启后生效")
+            return False
+        print(f"[配置] 切换项目目录: {self.projects_dir} -> {config.project_dir}")
+        self._close_project_dir()
+        self.disk_usage.set_projects_dir(config.project_dir)
+        self._open_project_dir(config)
+        self.current_project = None
+        self.show_project_center()
+        self.project_center.project_detail.show_project(None)
+        self.project_center.refresh()
+        return True
+    
+    def closeEvent(self, event):
+        if debug_memory.active():
+            debug_memory.active().print_report()
+        self.workspace_view.close_workspace()
+        self._close_project_dir()
+        self.disk_usage.close()
+        self.artifact_janitor.shutdown(wait=False)
+        self.sweep_pool.shutdown(wait=False, cancel_futures=True)
+        super().closeEvent(event)
+    
     def init_ui(self):
         """初始化UI"""
-        # 创建项目中心页面
+        # 项目中心与工作区页面，进入 / 离开工作区时切换
+        self.stack = QStackedWidget()
         self.project_center = ProjectCenterWidget(self)
-        self.setCentralWidget(self.project_center)
+        self.stack.addWidget(self.project_center)
+        self.workspace_view = WorkspaceViewWidget(self)
+        self.stack.addWidget(self.workspace_view)
+        self.setCentralWidget(self.stack)
         
         # 刷新项目列表
         self.project_center.refresh()
     
     def get_projects(self) -> list:
         """获取所有项目列表"""
-        print(f"[操作] 加载项目列表: {self.projects_dir}")
-        projects = []
-        if not self.projects_dir.exists():
-            print(f"[操作] 项目目录不存在，返回空列表")
-            return projects
-        
-        for project_dir in self.projects_dir.iterdir():
-            if project_dir.is_dir():
-                project = Project.load(project_dir)
-                if project:
-                    projects.append(project)
-        
-        result = sorted(projects, key=lambda p: p.created_at, reverse=True)
-        print(f"[操作] 加载完成，共 {len(result)} 个项目")
-        return result
+        return self.project_service.get_projects()
+    
+    def query_projects(self, **kwargs):
+        """分页查询项目摘要（项目中心侧边栏滚动加载）"""
+        return self.project_service.query_projects(**kwargs)
+    
+    def open_project(self, project_path) -> Project:
+        """按目录加载项目（项目已被删除时返回 None）"""
+        return self.project_service.load_project(Path(project_path))
     
     def create_project(self, name: str, desc: str = "") -> Project:
         """创建新项目"""
-        print(f"[操作] 创建项目: name={name}, desc={desc}")
-        project_id = generate_id()
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        project_folder_name = f"project_{timestamp}"
-        project_path = self.projects_dir / project_folder_name
-        project_path.mkdir(parents=True, exist_ok=True)
-        
-        project = Project(
-            id=project_id,
-            name=name,
-            desc=desc,
-            created_at=datetime.now(),
-            path=project_path
-        )
-        
-        self.create_workspace(project, "默认工作区", auto_save=False)
-        project.save()
-        self._create_project_readme(project)
-        print(f"[操作] 项目创建成功: id={project_id}, path={project_path}")
+        project = self.project_service.create_project(name, desc)
+        if self.catalog_hub:
+            self.catalog_hub.invalidate(project.path)
         return project
     
-    def _create_project_readme(self, project: Project):
-        """创建项目 README 文件"""
-        readme_path = project.path / "README.md"
-        readme_content = f"""# {project.name}
-
-## 项目信息
-
-- **项目ID**: {project.id}
-- **项目名称**: {project.name}
-- **项目描述**: {project.desc}
-- **创建时间**: {project.created_at.strftime("%Y-%m-%d %H:%M:%S")}
-- **项目路径**: {project.path}
-
-## 工作区列表
-
-"""
-        for i, workspace in enumerate(project.workspaces, 1):
-            readme_content += f"{i}. {workspace.name} (ID: {workspace.id})\n"
-        
-        readme_content += f"""
-## 说明
-
-此项目由 deeplocal-gui 创建和管理。
-项目配置文件: `project.json`
-"""
-        with open(readme_path, "w", encoding="utf-8") as f:
-            f.write(readme_content)
-        print(f"[操作] 创建项目 README: {readme_path}")
-    
     def create_workspace(self, project: Project, name: str, auto_save: bool = True) -> Workspace:
         """创建工作区"""
-        print(f"[操作] 创建工作区: project={project.name}, name={name}, auto_save={auto_save}")
-        workspace_id = generate_id()
-        workspace_path = project.path / "workspaces" / workspace_id
-        workspace_path.mkdir(parents=True, exist_ok=True)
-        
-        workspace = Workspace(
-            id=workspace_id,
-            name=name,
-            project_id=project.id,
-            created_at=datetime.now(),
-            path=workspace_path
-        )
-        
-        project.add_workspace(workspace)
-        if auto_save:
-            project.save()
-        
-        print(f"[操作] 工作区创建成功: id={workspace_id}, path={workspace_path}")
+        workspace = self.project_service.create_workspace(project, name, auto_save)
+        if self.catalog_hub and auto_save:
+            self.catalog_hub.invalidate(project.path)
         return workspace
     
+    def delete_project(self, project: Project) -> TrashEntry:
+        """删除项目（移入回收站，立即返回）"""
+        entry = self.project_service.delete_project(project)
+        if self.catalog_hub:
+            self.catalog_hub.invalidate(project.path)
+        if self.current_project is project:
+            self.current_project = None
+        return entry
+    
+    def delete_workspace(self, project: Project, workspace_id: str) -> TrashEntry:
+        """删除工作区（移入回收站，立即返回）"""
+        entry = self.project_service.delete_workspace(project, workspace_id)
+        if self.catalog_hub:
+            self.catalog_hub.invalidate(project.path)
+        return entry
+    
+    def restore_deleted(self, entry_id: str) -> Project:
+        """撤销删除，返回恢复后的项目"""
+        project = self.project_service.restore_deleted(entry_id)
+        if self.catalog_hub:
+            self.catalog_hub.invalidate(project.path)
+        return project
+    
+    def create_experiment(self, workspace: Workspace, name: str, dataset_id: str = "", config: dict = None) -> Experiment:
+        """创建实验（状态为 pending，尚未提交运行）"""
+        return self.project_service.create_experiment(workspace, name, dataset_id, config)
+    
+    def submit_experiment(self, experiment: Experiment, priority: int = 0, force: bool = False):
+        """提交实验到调度队列；相同指纹已有结果时直接复用，force=True 强制重新运行"""
+        self.scheduler.submit(experiment, priority, force)
+    
+    def create_sweep(self, workspace: Workspace, name: str, space: dict, base_config: dict,
+                     method: str = "grid", dataset_id: str = "", priority: int = 0, **options) -> Sweep:
+        """创建超参数搜索并提交全部子实验"""
+        sweep = create_sweep(workspace, name, space, base_config, method=method, dataset_id=dataset_id, **options)
+        runner = SweepRunner(sweep, self.scheduler, workspace.path)
+        self.sweep_runners[sweep.id] = runner
+        runner.submit(priority)
+        return sweep
+    
+    def apply_retention(self, workspace: Workspace, policy: RetentionPolicy):
+        """后台按保留策略清理工作区产物"""
+        print(f"[操作] 提交产物清理: workspace={workspace.name}, policy={policy}")
+        return self.artifact_janitor.apply(workspace.path, policy)
+    
+    def _on_scheduler_tick(self):
+        self.scheduler.poll()
+        for runner in self.sweep_runners.values():
+            runner.poll_async(self.sweep_pool)
+    
+    def _on_progress_updated(self, batch: dict):
+        """训练进度汇总（每 UPDATE_INTERVAL 毫秒最多一次）：交给工作区页面刷新曲线和进度"""
+        self.workspace_view.on_progress(batch)
+    
+    def _on_catalog_changed(self, deltas: list):
+        """脚本通过本地服务修改了项目：刷新项目列表（当前项目的变化由项目详情面板监视 project.json 自动重新加载）"""
+        print(f"[操作] 本地服务变更: {len(deltas)} 项")
+        if any(d["type"] in ("project_created", "project_deleted") for d in deltas):
+            self.project_center.refresh()
+    
     def show_project_detail(self, project: Project):
         """显示项目详情"""
         print(f"[操作] 显示项目详情: {project.name} (id={project.id})")
-        self.current_project = project
-        self.project_center.project_detail.show_project(project)
+        with debug_memory.cycle("show_project"):
+            self.current_project = project
+            self.project_service.mark_opened(project)
+            self.project_center.project_detail.show_project(project)
     
     def show_workspace(self, project: Project, workspace: Workspace):
         """进入工作区"""
         print(f"[操作] 进入工作区: project={project.name}, workspace={workspace.name} (id={workspace.id})")
-        self.current_project = project
-        self.current_workspace = workspace
+        with debug_memory.cycle("show_workspace"):
+            self.current_project = project
+            self.current_workspace = workspace
+            # 恢复该工作区中的搜索，继续执行提前停止检查
+            for sweep in load_sweeps(workspace):
+                if sweep.id not in self.sweep_runners:
+                    self.sweep_runners[sweep.id] = SweepRunner(sweep, self.scheduler, workspace.path)
+            self.workspace_view.show_workspace(project, workspace)
+            self.stack.setCurrentWidget(self.workspace_view)
+    
+    def show_project_center(self):
+        """离开工作区，回到项目中心"""
+        self.workspace_view.close_workspace()
+        self.current_workspace = None
+        self.stack.setCurrentWidget(self.project_center)
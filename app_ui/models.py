@@ -3,56 +3,240 @@ from datetime import datetime
 from pathlib import Path
 from typing import List, Optional
 import json
+import os
+import sys
 import uuid
 
+from app_core import journal
+from app_core.journal import JOURNAL_FILE, dir_lock, file_stat, read_records
+
+
+EXPERIMENT_STATUSES = ("pending", "running", "completed", "failed")
+# 项目中按字段合并的属性（update 变更记录只含改动过的字段）
+PROJECT_FIELDS = ("name", "desc", "path")
+
 
 @dataclass
-class Workspace:
+class Experiment:
     id: str
     name: str
-    project_id: str
+    workspace_id: str
+    dataset_id: str
     created_at: datetime
     path: Path
-    datasets: List[dict] = field(default_factory=list)
-    experiments: List[dict] = field(default_factory=list)
+    status: str = "pending"
+    config: dict = field(default_factory=dict)
+    results: dict = field(default_factory=dict)
     
     def to_dict(self):
         return {
             "id": self.id,
             "name": self.name,
-            "project_id": self.project_id,
+            "workspace_id": self.workspace_id,
+            "dataset_id": self.dataset_id,
+            "status": self.status,
+            "config": self.config,
+            "results": self.results,
             "created_at": self.created_at.isoformat()
         }
     
     @classmethod
-    def from_dict(cls, data: dict, project_path: Path):
-        workspace_path = project_path / "workspaces" / data["id"]
+    def from_dict(cls, data: dict, experiment_path: Path):
         return cls(
             id=data["id"],
             name=data["name"],
-            project_id=data["project_id"],
+            workspace_id=data["workspace_id"],
+            dataset_id=data.get("dataset_id", ""),
             created_at=datetime.fromisoformat(data["created_at"]),
-            path=workspace_path
+            path=experiment_path,
+            status=data.get("status", "pending"),
+            config=data.get("config", {}),
+            results=data.get("results", {})
         )
+    
+    def save(self):
+        experiment_file = self.path / "experiment.json"
+        experiment_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = experiment_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+        os.replace(tmp_file, experiment_file)
+        print(f"[操作] 保存实验: {self.name} ({self.status}) -> {experiment_file}")
+    
+    @classmethod
+    def load(cls, experiment_path: Path):
+        experiment_file = experiment_path / "experiment.json"
+        if not experiment_file.exists():
+            print(f"[操作] 加载实验失败: 文件不存在 {experiment_file}")
+            return None
+        with open(experiment_file, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        return cls.from_dict(data, experiment_path)
+
+
+class Workspace:
+    """
+    工作区；__slots__ 节省内存（项目多、工作区多时对象数量很大），
+    id 做字符串驻留，路径不单独保存，由所属项目目录（同一项目的工作区共用一个 Path 对象）按需拼出
+    """
+    __slots__ = ("id", "name", "project_id", "created_at", "_root", "_datasets", "_experiments")
+    
+    def __init__(self, id: str, name: str, project_id: str, created_at: datetime, path: Path,
+                 datasets: Optional[List[dict]] = None, experiments: Optional[List[Experiment]] = None):
+        self.id = sys.intern(id)
+        self.name = name
+        self.project_id = sys.intern(project_id)
+        self.created_at = created_at
+        self.path = path
+        self._datasets = datasets
+        self._experiments = experiments
+    
+    @property
+    def path(self) -> Path:
+        return self._root / "workspaces" / self.id
+    
+    @path.setter
+    def path(self, value: Path):
+        # 工作区目录固定为 <项目目录>/workspaces/<id>
+        self._root = Path(value).parent.parent
+    
+    @property
+    def datasets(self) -> List[dict]:
+        if self._datasets is None:
+            self._datasets = []
+        return self._datasets
+    
+    @datasets.setter
+    def datasets(self, value: List[dict]):
+        self._datasets = value
+    
+    @property
+    def experiments(self) -> List[Experiment]:
+        if self._experiments is None:
+            self._experiments = []
+        return self._experiments
+    
+    @experiments.setter
+    def experiments(self, value: List[Experiment]):
+        self._experiments = value
+    
+    def __eq__(self, other):
+        if not isinstance(other, Workspace):
+            return NotImplemented
+        return (self.id, self.name, self.project_id, self.created_at, self.path) == \
+            (other.id, other.name, other.project_id, other.created_at, other.path)
+    
+    def __repr__(self):
+        return f"Workspace(id={self.id!r}, name={self.name!r}, project_id={self.project_id!r}, path={self.path!r})"
+    
+    def add_experiment(self, experiment: Experiment):
+        self.experiments.append(experiment)
+    
+    def load_experiments(self) -> List[Experiment]:
+        """从 experiments/ 目录加载实验列表"""
+        experiments_dir = self.path / "experiments"
+        self.experiments = []
+        if experiments_dir.exists():
+            for experiment_dir in experiments_dir.iterdir():
+                if experiment_dir.is_dir():
+                    experiment = Experiment.load(experiment_dir)
+                    if experiment:
+                        self.experiments.append(experiment)
+        self.experiments.sort(key=lambda e: e.created_at)
+        return self.experiments
+    
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "name": self.name,
+            "project_id": self.project_id,
+            "created_at": self.created_at.isoformat()
+        }
+    
+    @classmethod
+    def from_dict(cls, data: dict, project_path: Path):
+        # 不经过 __init__：直接共用项目目录对象，不为每个工作区构造路径
+        workspace = cls.__new__(cls)
+        workspace.id = sys.intern(data["id"])
+        workspace.name = data["name"]
+        workspace.project_id = sys.intern(data["project_id"])
+        workspace.created_at = datetime.fromisoformat(data["created_at"])
+        workspace._root = project_path
+        workspace._datasets = None
+        workspace._experiments = None
+        return workspace
 
 
-@dataclass
 class Project:
-    id: str
-    name: str
-    desc: str
-    created_at: datetime
-    path: Path
-    workspaces: List[Workspace] = field(default_factory=list)
+    """
+    项目；__slots__ 节省内存。Project.load 默认只读取项目信息和工作区数量，
+    工作区列表在第一次访问 workspaces（如打开项目详情）时才从磁盘展开
+    """
+    __slots__ = ("id", "name", "desc", "created_at", "path", "revision", "_workspaces", "_workspace_count",
+                 "_pending", "_synced_stat", "_journal_end", "_synced_fields")
+    
+    def __init__(self, id: str, name: str, desc: str, created_at: datetime, path: Path,
+                 workspaces: Optional[List[Workspace]] = None, revision: int = 0):
+        self.id = sys.intern(id)
+        self.name = name
+        self.desc = desc
+        self.created_at = created_at
+        self.path = Path(path)
+        # 每条变更记录递增；快照（project.json）记录写快照时的值，之后的变更在操作日志中
+        self.revision = revision
+        self._workspaces = workspaces if workspaces is not None else []
+        self._workspace_count = 0
+        # 尚未写入的变更记录（add_workspace / remove_workspace 产生）
+        self._pending: List[dict] = []
+        # 上次读写后 project.json 的 (inode, mtime, size)，变化说明其他写入方写了新快照
+        self._synced_stat: Optional[tuple] = None
+        # 已读取到的操作日志偏移
+        self._journal_end = 0
+        # 上次同步时的 (name, desc, path)，保存时比较得出字段变更
+        self._synced_fields: Optional[tuple] = None
+    
+    @property
+    def workspaces(self) -> List[Workspace]:
+        if self._workspaces is None:
+            self._hydrate()
+        return self._workspaces
+    
+    @workspaces.setter
+    def workspaces(self, value: List[Workspace]):
+        self._workspaces = value
+    
+    @property
+    def hydrated(self) -> bool:
+        return self._workspaces is not None
+    
+    @property
+    def workspace_count(self) -> int:
+        """工作区数量，不展开工作区列表"""
+        return len(self._workspaces) if self._workspaces is not None else self._workspace_count
+    
+    def __eq__(self, other):
+        if not isinstance(other, Project):
+            return NotImplemented
+        return (self.id, self.name, self.desc, self.created_at, self.path, self.revision, self.workspaces) == \
+            (other.id, other.name, other.desc, other.created_at, other.path, other.revision, other.workspaces)
+    
+    def __repr__(self):
+        return f"Project(id={self.id!r}, name={self.name!r}, path={self.path!r}, revision={self.revision})"
     
     def add_workspace(self, workspace: Workspace):
         self.workspaces.append(workspace)
+        self._pending.append({"op": "add_workspace", "workspace": workspace.to_dict()})
     
     def remove_workspace(self, workspace_id: str):
         before_count = len(self.workspaces)
         self.workspaces = [w for w in self.workspaces if w.id != workspace_id]
         after_count = len(self.workspaces)
         if before_count != after_count:
+            # 还没写入的新增直接撤销，不必记录删除
+            pending = [r for r in self._pending if r["op"] != "add_workspace" or r["workspace"]["id"] != workspace_id]
+            if len(pending) == len(self._pending):
+                pending.append({"op": "remove_workspace", "id": workspace_id})
+            self._pending = pending
             print(f"[操作] 删除工作区: project={self.name}, workspace_id={workspace_id}")
     
     def get_workspace(self, workspace_id: str) -> Optional[Workspace]:
@@ -68,6 +252,7 @@ class Project:
             "desc": self.desc,
             "created_at": self.created_at.isoformat(),
             "path": str(self.path),
+            "revision": self.revision,
             "workspaces": [w.to_dict() for w in self.workspaces]
         }
     
@@ -78,29 +263,173 @@ class Project:
             name=data["name"],
             desc=data.get("desc", ""),
             created_at=datetime.fromisoformat(data["created_at"]),
-            path=project_path
+            path=project_path,
+            revision=data.get("revision", 0)
         )
         for w_data in data.get("workspaces", []):
             workspace = Workspace.from_dict(w_data, project.path)
             project.workspaces.append(workspace)
+        project._synced_fields = (project.name, project.desc, data.get("path", str(project_path)))
         return project
     
-    def save(self):
+    # ------------------------------------------------------------ 快照与操作日志
+    
+    def _fields(self) -> tuple:
+        return self.name, self.desc, str(self.path)
+    
+    def _changed_fields(self) -> dict:
+        """上次同步后本地改动过的字段"""
+        synced = dict(zip(PROJECT_FIELDS, self._synced_fields or self._fields()))
+        return {k: v for k, v in zip(PROJECT_FIELDS, self._fields()) if synced[k] != v}
+    
+    def _merge_fields(self, remote: dict):
+        """合并其他写入方的字段值：本地没有改动的字段取对方的值，改动过的保留本地值（保存时写入）"""
+        synced = dict(zip(PROJECT_FIELDS, self._synced_fields or self._fields()))
+        changed = self._changed_fields()
+        for name in ("name", "desc"):
+            if name in remote and name not in changed:
+                setattr(self, name, remote[name])
+        synced.update(remote)
+        self._synced_fields = tuple(synced[k] for k in PROJECT_FIELDS)
+    
+    def _replay(self, records: List[dict], skip_applied: bool = True):
+        """按顺序应用变更记录；skip_applied 时跳过 revision 不比当前新的记录"""
+        if not records:
+            return
+        ids = {w.id for w in self._workspaces}
+        for record in records:
+            if skip_applied and record["rev"] <= self.revision:
+                continue
+            self._apply(record, ids)
+            if skip_applied:
+                self.revision = record["rev"]
+    
+    def _apply(self, record: dict, ids: set):
+        """应用一条变更记录（重放日志或合并其他写入方的变更），ids 为当前工作区 id 集合"""
+        op = record["op"]
+        if op == "add_workspace":
+            if record["workspace"]["id"] not in ids:
+                workspace = Workspace.from_dict(record["workspace"], self.path)
+                self._workspaces.append(workspace)
+                ids.add(workspace.id)
+        elif op == "remove_workspace":
+            if record["id"] in ids:
+                self._workspaces = [w for w in self._workspaces if w.id != record["id"]]
+                ids.discard(record["id"])
+        elif op == "update":
+            self._merge_fields(record["fields"])
+    
+    def _catch_up(self):
+        """读取其他写入方的变更（调用方持有目录锁）：有新快照则重新加载并重新应用本地未写入的变更，再应用日志中的新记录"""
         project_file = self.path / "project.json"
-        project_file.parent.mkdir(parents=True, exist_ok=True)
-        with open(project_file, "w", encoding="utf-8") as f:
+        stat = file_stat(project_file)
+        if stat != self._synced_stat:
+            with open(project_file, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            local = {w.id: w for w in self.workspaces}
+            self.workspaces = [local.get(w_data["id"]) or Workspace.from_dict(w_data, self.path)
+                               for w_data in data.get("workspaces", [])]
+            self._merge_fields({"name": data["name"], "desc": data.get("desc", ""),
+                                "path": data.get("path", str(self.path))})
+            self.revision = data.get("revision", 0)
+            self._synced_stat = stat
+            self._journal_end = 0
+            self._replay(self._pending, skip_applied=False)
+        records, self._journal_end = read_records(self.path / JOURNAL_FILE, self._journal_end)
+        self._replay(records)
+    
+    def _write_snapshot(self):
+        project_file = self.path / "project.json"
+        tmp_file = project_file.with_suffix(".json.tmp")
+        with open(tmp_file, "w", encoding="utf-8") as f:
             json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
-        print(f"[操作] 保存项目: {self.name} -> {project_file}")
+            # 快照落盘后才能清空日志
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, project_file)
+        journal.reset(self.path / JOURNAL_FILE)
+        self._synced_stat = file_stat(project_file)
+        self._journal_end = 0
+    
+    def changed_on_disk(self) -> bool:
+        """其他写入方是否写过快照或追加过变更"""
+        journal_stat = file_stat(self.path / JOURNAL_FILE)
+        return (file_stat(self.path / "project.json") != self._synced_stat
+                or (journal_stat[2] if journal_stat else 0) != self._journal_end)
+    
+    def save(self, sync: bool = False):
+        """
+        保存变更：新项目写快照，之后的变更追加到操作日志，日志超过阈值时写新快照；
+        期间其他写入方的变更按记录合并。sync=True 时立即 fsync，否则由后台批量落盘
+        """
+        project_file = self.path / "project.json"
+        project_file.parent.mkdir(parents=True, exist_ok=True)
+        with dir_lock(self.path):
+            if not self.hydrated:
+                self._hydrate()
+            if not project_file.exists():
+                self.revision += 1
+                self._write_snapshot()
+                mode = "快照"
+            else:
+                self._catch_up()
+                records = list(self._pending)
+                # 只记录本地改动的字段，其他写入方同时改动的其他字段不被覆盖
+                changed = self._changed_fields()
+                if changed:
+                    records.append({"op": "update", "fields": changed})
+                for record in records:
+                    self.revision += 1
+                    record["rev"] = self.revision
+                if records:
+                    self._journal_end = journal.append_records(self.path / JOURNAL_FILE, records,
+                                                               self._journal_end, sync=sync)
+                mode = f"日志 +{len(records)}"
+                if self._journal_end > max(journal.COMPACT_MIN_BYTES, self._synced_stat[2]):
+                    self._write_snapshot()
+                    mode += "，压缩为快照"
+        self._pending = []
+        self._synced_fields = self._fields()
+        print(f"[操作] 保存项目: {self.name} (revision={self.revision}, {mode}) -> {project_file}")
+    
+    def _hydrate(self):
+        """从磁盘展开工作区列表（快照 + 操作日志），同时更新到磁盘上的最新状态"""
+        loaded = Project.load(self.path, lazy=False)
+        if loaded is None:
+            self._workspaces = []
+            return
+        self._workspaces = loaded._workspaces
+        for name in ("revision", "_synced_stat", "_journal_end"):
+            setattr(self, name, getattr(loaded, name))
+        self._merge_fields(dict(zip(PROJECT_FIELDS, loaded._synced_fields)))
     
     @classmethod
-    def load(cls, project_path: Path):
+    def load(cls, project_path: Path, lazy: bool = True):
+        """
+        加载项目
+
+        Args:
+            lazy: 只读取项目信息和工作区数量，工作区列表第一次访问时再展开；
+                  有未压缩的操作日志时需要重放，直接完整加载
+        """
         project_file = project_path / "project.json"
         if not project_file.exists():
             print(f"[操作] 加载项目失败: 文件不存在 {project_file}")
             return None
+        stat = file_stat(project_file)
         with open(project_file, "r", encoding="utf-8") as f:
             data = json.load(f)
-        project = cls.from_dict(data, project_path)
+        records, journal_end = read_records(project_path / JOURNAL_FILE)
+        if lazy and not any(r["rev"] > data.get("revision", 0) for r in records):
+            workspaces_data = data.pop("workspaces", [])
+            project = cls.from_dict(data, project_path)
+            project._workspaces = None
+            project._workspace_count = len(workspaces_data)
+        else:
+            project = cls.from_dict(data, project_path)
+            # 重放快照之后的变更；崩溃留下的残缺记录之后的内容忽略
+            project._replay(records)
+        project._synced_stat = stat
+        project._journal_end = journal_end
         print(f"[操作] 加载项目: {project.name} from {project_file}")
         return project
-
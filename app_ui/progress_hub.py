@@ -0,0 +1,52 @@
+"""
+实时进度汇总
+从进度通道收取各训练进程的事件，按实验合并后以固定频率发出一次 updated 信号，
+并发实验再多、上报再频繁，界面每秒也只刷新有限次数
+"""
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QSocketNotifier, QTimer, pyqtSignal
+
+from app_core.progress_channel import ProgressAggregator, ProgressServer
+from cedar.utils import print
+
+
+class ProgressHub(QObject):
+    """进度通道的 GUI 端"""
+
+    updated = pyqtSignal(dict)              # {实验 id: {"step", "metrics", "progress", "status", "time"}}
+    status_changed = pyqtSignal(str, str)   # 实验 id, 状态
+
+    UPDATE_INTERVAL = 100
+
+    def __init__(self, project_dir: Path, parent=None):
+        super().__init__(parent)
+        self.server = ProgressServer(project_dir)
+        self.aggregator = ProgressAggregator()
+        self._notifier = None
+        fd = self.server.fileno()
+        if fd is not None:
+            self._notifier = QSocketNotifier(fd, QSocketNotifier.Type.Read, self)
+            self._notifier.activated.connect(self._receive)
+        self._timer = QTimer(self)
+        self._timer.timeout.connect(self._emit)
+        self._timer.start(self.UPDATE_INTERVAL)
+
+    def _receive(self):
+        events = self.server.drain()
+        self.aggregator.add(events)
+        for event in events:
+            if event.get("type") == "status":
+                self.status_changed.emit(event.get("experiment_id", ""), event.get("status", ""))
+
+    def _emit(self):
+        batch = self.aggregator.take()
+        if batch:
+            self.updated.emit(batch)
+
+    def close(self):
+        print("[操作] 关闭实时进度通道")
+        self._timer.stop()
+        if self._notifier:
+            self._notifier.setEnabled(False)
+        self.server.close()
@@ -1,15 +1,42 @@
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QScrollArea, QFrame,
-    QPushButton, QLabel, QMessageBox, QInputDialog, QLineEdit, QGridLayout
+    QPushButton, QLabel, QMessageBox, QInputDialog, QLineEdit, QGridLayout, QComboBox
 )
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QFileSystemWatcher, QTimer, pyqtSignal
 from datetime import datetime, timedelta
+from app_core.journal import JOURNAL_FILE
+from app_ui import debug_memory
 from app_ui.models import Project
 from cedar.utils import print
+from utils.utils import format_size
 
 def format_datetime(dt: datetime):
     return dt.strftime("%Y-%m-%d %H:%M:%S")
 
+# 侧边栏每次加载的项目数；滚动到距底部 LOAD_MORE_MARGIN 像素内时加载下一页
+PAGE_SIZE = 30
+LOAD_MORE_MARGIN = 200
+# (显示名, 排序键, 降序)
+SORT_OPTIONS = [
+    ("最新创建", "created_at", True),
+    ("最早创建", "created_at", False),
+    ("名称", "name", False),
+    ("最近打开", "last_opened", True),
+]
+
+class ProjectCard(QFrame):
+    """项目卡片；点击时发出 clicked(卡片)，不在实例上挂闭包（闭包引用卡片自身会形成引用环，卡片要等 gc 才释放）"""
+    
+    clicked = pyqtSignal(object)
+    
+    def __init__(self, row: dict, parent=None):
+        super().__init__(parent)
+        self.row = row
+    
+    def mousePressEvent(self, event):
+        self.clicked.emit(self)
+        super().mousePressEvent(event)
+
 class ProjectListWidget(QWidget):
     """项目列表侧边栏"""
     
@@ -19,6 +46,9 @@ class ProjectListWidget(QWidget):
         self.selected_project = None
         self.selected_card = None
         self.project_cards = []
+        # 下一页的游标，None 表示已加载完
+        self._next_cursor = None
+        self._total = 0
         self.init_ui()
     
     def init_ui(self):
@@ -32,47 +62,86 @@ class ProjectListWidget(QWidget):
         title.setStyleSheet("font-size: 16px; font-weight: bold;")
         layout.addWidget(title)
         
-        # 搜索框
-        search = QLineEdit()
-        search.setPlaceholderText("搜索项目...")
-        layout.addWidget(search)
+        # 搜索框（输入停顿后再查询）
+        self.search = QLineEdit()
+        self.search.setPlaceholderText("搜索项目...")
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(300)
+        self._search_timer.timeout.connect(self.reload)
+        self.search.textChanged.connect(lambda _: self._search_timer.start())
+        layout.addWidget(self.search)
+        
+        # 排序
+        self.sort_combo = QComboBox()
+        for label, _, _ in SORT_OPTIONS:
+            self.sort_combo.addItem(label)
+        self.sort_combo.currentIndexChanged.connect(lambda _: self.reload())
+        layout.addWidget(self.sort_combo)
         
         # 滚动区域
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.scroll = QScrollArea()
+        self.scroll.setWidgetResizable(True)
+        self.scroll.setHorizontalScrollBarPolicy(Qt.ScrollBarPolicy.ScrollBarAlwaysOff)
+        self.scroll.verticalScrollBar().valueChanged.connect(lambda _: self._maybe_load_more())
         
         scroll_widget = QWidget()
         self.scroll_layout = QVBoxLayout(scroll_widget)
         self.scroll_layout.setSpacing(12)
         self.scroll_layout.addStretch()
         
-        scroll.setWidget(scroll_widget)
-        layout.addWidget(scroll)
+        self.scroll.setWidget(scroll_widget)
+        layout.addWidget(self.scroll)
+        
+        self.count_label = QLabel()
+        self.count_label.setStyleSheet("font-size: 12px; color: #999;")
+        layout.addWidget(self.count_label)
         
         # 新建项目按钮
         btn_new = QPushButton("新建项目")
         btn_new.clicked.connect(self.create_project)
         layout.addWidget(btn_new)
     
-    def load_projects(self, projects: list):
-        """加载项目列表"""
-        # 清除现有卡片
+    def reload(self):
+        """按当前排序和搜索条件重新加载第一页"""
+        # 清除现有卡片：移出布局后 deleteLater 释放（setParent(None) 只会让卡片变成隐藏的顶层窗口）
         for card in self.project_cards:
-            card.setParent(None)
+            self.scroll_layout.removeWidget(card)
+            card.deleteLater()
         self.project_cards.clear()
         self.selected_card = None
         self.selected_project = None
-        
-        # 创建新卡片
-        for project in projects:
-            card = self._create_project_card(project)
+        self._next_cursor = None
+        self._load_page(None)
+    
+    def _load_page(self, cursor):
+        if not self.main_window:
+            return
+        _, sort, descending = SORT_OPTIONS[self.sort_combo.currentIndex()]
+        page = self.main_window.query_projects(sort=sort, descending=descending, cursor=cursor, limit=PAGE_SIZE,
+                                               search=self.search.text().strip() or None)
+        for row in page.rows:
+            card = self._create_project_card(row)
             self.scroll_layout.insertWidget(self.scroll_layout.count() - 1, card)
             self.project_cards.append(card)
+        self._next_cursor = page.next_cursor
+        self._total = page.total
+        matched = "个匹配的项目" if self.search.text().strip() else "个项目"
+        self.count_label.setText(f"已显示 {len(self.project_cards)} 个，共 {self._total} {matched}")
+        # 第一页不足以出现滚动条时继续加载
+        QTimer.singleShot(0, self._maybe_load_more)
     
-    def _create_project_card(self, project: Project):
-        """创建项目卡片"""
-        card = QFrame()
+    def _maybe_load_more(self):
+        if self._next_cursor is None:
+            return
+        bar = self.scroll.verticalScrollBar()
+        if bar.maximum() - bar.value() <= LOAD_MORE_MARGIN:
+            print(f"[操作] 加载更多项目: 已显示 {len(self.project_cards)} 个")
+            self._load_page(self._next_cursor)
+    
+    def _create_project_card(self, row: dict):
+        """创建项目卡片（row 为 ProjectService.query_projects 返回的项目摘要，点击时再加载项目）"""
+        card = ProjectCard(row)
         card.setFrameShape(QFrame.Shape.Box)
         card.setFrameShadow(QFrame.Shadow.Raised)
         card.setCursor(Qt.CursorShape.PointingHandCursor)
@@ -83,30 +152,25 @@ class ProjectListWidget(QWidget):
         layout.setSpacing(8)
         
         # 项目名称
-        name = QLabel(project.name)
+        name = QLabel(row["name"])
         name.setStyleSheet("font-size: 16px; font-weight: bold;")
         layout.addWidget(name)
         
         # 项目描述
-        desc = QLabel(project.desc or "无描述")
+        desc = QLabel(row["desc"] or "无描述")
         desc.setWordWrap(True)
         desc.setMaximumHeight(40)
         desc.setStyleSheet("color: #666;")
         layout.addWidget(desc)
         
         # 时间标签
-        time_str = self._format_time(project.created_at)
+        time_str = self._format_time(datetime.fromisoformat(row["created_at"]))
         time_label = QLabel(time_str)
         time_label.setStyleSheet("font-size: 12px; color: #999;")
         layout.addWidget(time_label)
         
         # 点击事件
-        def make_click_handler(card_ref, project_ref):
-            def handler(event):
-                self._on_card_clicked(card_ref, project_ref)
-            return handler
-        
-        card.mousePressEvent = make_click_handler(card, project)
+        card.clicked.connect(self._on_card_clicked)
         
         return card
     
@@ -126,11 +190,17 @@ class ProjectListWidget(QWidget):
         else:
             return format_datetime(dt)
     
-    def _on_card_clicked(self, card, project):
+    def _on_card_clicked(self, card):
         """卡片点击处理"""
         if self.selected_card == card:
             return
         
+        row = card.row
+        project = self.main_window.open_project(row["path"]) if self.main_window else None
+        if project is None:
+            QMessageBox.warning(self, "提示", f"项目 '{row['name']}' 已不存在")
+            return
+        
         # 更新选中状态
         if self.selected_card:
             self.selected_card.setStyleSheet("padding: 12px; margin: 4px;")
@@ -139,9 +209,7 @@ class ProjectListWidget(QWidget):
         
         self.selected_card = card
         self.selected_project = project
-        
-        if self.main_window:
-            self.main_window.show_project_detail(project)
+        self.main_window.show_project_detail(project)
     
     def create_project(self):
         """创建新项目"""
@@ -158,7 +226,7 @@ class ProjectListWidget(QWidget):
             if self.main_window:
                 project = self.main_window.create_project(name.strip(), desc.strip())
                 if project:
-                    self.load_projects(self.main_window.get_projects())
+                    self.reload()
                     QMessageBox.information(self, "成功", f"项目 '{name}' 创建成功")
         except Exception as e:
             print(f"[错误] 创建项目失败: {str(e)}")
@@ -173,7 +241,25 @@ class ProjectDetailWidget(QWidget):
         self.main_window = parent.main_window if parent and hasattr(parent, 'main_window') else None
         self.current_project = None
         self.selected_workspace = None
+        # 其他应用实例或脚本修改了当前项目时自动重新加载：
+        # 快照 project.json 以替换方式写入，监视所在目录；变更记录追加到操作日志，监视日志文件
+        self.watcher = QFileSystemWatcher(self)
+        self.watcher.directoryChanged.connect(lambda path: self.reload_timer.start())
+        self.watcher.fileChanged.connect(lambda path: self.reload_timer.start())
+        self.reload_timer = QTimer(self)
+        self.reload_timer.setSingleShot(True)
+        self.reload_timer.setInterval(200)
+        self.reload_timer.timeout.connect(self._reload_if_changed)
+        # 工作区 id -> 卡片上的占用标签
+        self.workspace_usage_labels = {}
+        # 最近一次删除的回收站条目；撤销期内显示撤销栏
+        self.last_deleted = None
+        self.undo_timer = QTimer(self)
+        self.undo_timer.setSingleShot(True)
+        self.undo_timer.timeout.connect(self._hide_undo)
         self.init_ui()
+        if self.main_window:
+            self.main_window.disk_usage.updated.connect(self._on_usage_updated)
     
     def init_ui(self):
         """设置UI"""
@@ -181,6 +267,20 @@ class ProjectDetailWidget(QWidget):
         layout.setContentsMargins(24, 24, 24, 24)
         layout.setSpacing(16)
         
+        # 撤销删除栏（删除后显示，撤销期过后隐藏）
+        self.undo_bar = QFrame()
+        self.undo_bar.setStyleSheet("background: #fff4ce; padding: 4px;")
+        undo_layout = QHBoxLayout(self.undo_bar)
+        undo_layout.setContentsMargins(12, 4, 12, 4)
+        self.undo_label = QLabel("")
+        undo_layout.addWidget(self.undo_label)
+        undo_layout.addStretch()
+        btn_undo = QPushButton("撤销")
+        btn_undo.clicked.connect(self.undo_delete)
+        undo_layout.addWidget(btn_undo)
+        self.undo_bar.hide()
+        layout.addWidget(self.undo_bar)
+        
         # 项目详情卡片
         self.detail_card = QFrame()
         self.detail_card.setFrameShape(QFrame.Shape.Box)
@@ -211,6 +311,20 @@ class ProjectDetailWidget(QWidget):
         self.path_label.setStyleSheet("color: #666; font-size: 12px;")
         detail_layout.addWidget(self.path_label)
         
+        # 磁盘占用（读取后台索引的合计）
+        usage_row = QHBoxLayout()
+        self.usage_label = QLabel("")
+        self.usage_label.setStyleSheet("color: #666; font-size: 12px;")
+        usage_row.addWidget(self.usage_label)
+        usage_row.addStretch()
+        btn_largest = QPushButton("占用排行")
+        btn_largest.clicked.connect(self.show_largest)
+        usage_row.addWidget(btn_largest)
+        btn_delete = QPushButton("删除项目")
+        btn_delete.clicked.connect(self.delete_project)
+        usage_row.addWidget(btn_delete)
+        detail_layout.addLayout(usage_row)
+        
         layout.addWidget(self.detail_card)
         
         # 工作区卡片
@@ -250,6 +364,7 @@ class ProjectDetailWidget(QWidget):
         """显示项目信息"""
         self.current_project = project
         self.selected_workspace = None
+        self._watch(project)
         
         if not project:
             self._clear_project_info()
@@ -263,6 +378,39 @@ class ProjectDetailWidget(QWidget):
         self.path_label.setText(f"项目路径: {project.path}")
         
         self._load_workspaces(project.workspaces)
+        self._update_usage()
+    
+    def _watch(self, project):
+        watched = self.watcher.directories() + self.watcher.files()
+        if watched:
+            self.watcher.removePaths(watched)
+        if project and project.path.exists():
+            self.watcher.addPath(str(project.path))
+            if (project.path / JOURNAL_FILE).exists():
+                self.watcher.addPath(str(project.path / JOURNAL_FILE))
+    
+    def _reload_if_changed(self):
+        """快照或操作日志被其他写入方修改时重新加载，保留选中的工作区"""
+        project = self.current_project
+        if not project or not self.main_window:
+            return
+        journal_file = project.path / JOURNAL_FILE
+        if journal_file.exists() and str(journal_file) not in self.watcher.files():
+            self.watcher.addPath(str(journal_file))
+        self.main_window.disk_usage.verify(project.path)
+        if not project.changed_on_disk():
+            return
+        reloaded = self.main_window.project_service.load_project(project.path)
+        if not reloaded:
+            if not project.path.exists():
+                print(f"[操作] 项目已被其他写入方删除: {project.name}")
+                self.show_project(None)
+                self.main_window.project_center.refresh()
+            return
+        print(f"[操作] 项目已被其他写入方修改，重新加载: {project.name}, revision {project.revision} -> {reloaded.revision}")
+        selected = self.selected_workspace.id if self.selected_workspace else None
+        self.main_window.show_project_detail(reloaded)
+        self.selected_workspace = reloaded.get_workspace(selected) if selected else None
     
     def _clear_project_info(self):
         """清空项目信息显示"""
@@ -271,6 +419,7 @@ class ProjectDetailWidget(QWidget):
         self.desc_label.setText("")
         self.time_label.setText("")
         self.path_label.setText("")
+        self.usage_label.setText("")
         self._clear_workspaces()
     
     def _load_workspaces(self, workspaces):
@@ -285,6 +434,7 @@ class ProjectDetailWidget(QWidget):
     
     def _clear_workspaces(self):
         """清空工作区列表"""
+        self.workspace_usage_labels.clear()
         while self.grid_layout.count():
             item = self.grid_layout.takeAt(0)
             if item.widget():
@@ -305,14 +455,53 @@ class ProjectDetailWidget(QWidget):
         name.setStyleSheet("font-size: 14px; font-weight: bold;")
         layout.addWidget(name)
         
+        usage = QLabel("")
+        usage.setStyleSheet("font-size: 12px; color: #999;")
+        layout.addWidget(usage)
+        self.workspace_usage_labels[workspace.id] = usage
+        
         layout.addStretch()
         
+        buttons = QHBoxLayout()
         btn = QPushButton("进入")
         btn.clicked.connect(lambda: self._on_workspace_clicked(workspace))
-        layout.addWidget(btn)
+        buttons.addWidget(btn)
+        btn_delete = QPushButton("删除")
+        btn_delete.clicked.connect(lambda: self.delete_workspace(workspace))
+        buttons.addWidget(btn_delete)
+        layout.addLayout(buttons)
         
         return card
     
+    def _update_usage(self):
+        """从磁盘占用索引读取合计；项目还没有索引时显示统计中，建立后由 updated 信号再次调用"""
+        project = self.current_project
+        if not project or not self.main_window:
+            return
+        usage = self.main_window.disk_usage.usage(project.path)
+        if usage is None:
+            self.usage_label.setText("磁盘占用: 统计中...")
+            return
+        self.usage_label.setText(f"磁盘占用: {format_size(usage[0])}（{usage[1]} 个文件）")
+        for workspace_id, label in self.workspace_usage_labels.items():
+            workspace_usage = self.main_window.disk_usage.usage(project.path / "workspaces" / workspace_id)
+            label.setText(format_size(workspace_usage[0]) if workspace_usage else "")
+    
+    def _on_usage_updated(self, project_path: str):
+        if self.current_project and str(self.current_project.path) == project_path:
+            self._update_usage()
+    
+    def show_largest(self):
+        """占用最大的工作区 / 数据集 / 实验（已建立索引的项目）"""
+        if not self.main_window:
+            return
+        rows = self.main_window.disk_usage.largest(20)
+        if not rows:
+            QMessageBox.information(self, "占用排行", "还没有统计结果，请稍后再试")
+            return
+        lines = [f"{format_size(r['bytes'])}  [{r['kind']}]  {r['path']}" for r in rows]
+        QMessageBox.information(self, "占用排行", "\n".join(lines))
+    
     def _on_workspace_clicked(self, workspace):
         """工作区点击处理"""
         self.selected_workspace = workspace
@@ -334,6 +523,64 @@ class ProjectDetailWidget(QWidget):
             if workspace:
                 self.show_project(self.current_project)
     
+    def delete_project(self):
+        """删除当前项目：移入回收站后立即更新界面，撤销期内可撤销"""
+        project = self.current_project
+        if not project or not self.main_window:
+            return
+        try:
+            entry = self.main_window.delete_project(project)
+        except Exception as e:
+            print(f"[错误] 删除项目失败: {str(e)}")
+            QMessageBox.critical(self, "错误", f"删除项目失败: {str(e)}")
+            return
+        self.show_project(None)
+        self.main_window.project_center.refresh()
+        self._show_undo(entry, f"已删除项目 '{project.name}'")
+    
+    def delete_workspace(self, workspace):
+        """删除工作区：移入回收站后立即更新界面，撤销期内可撤销"""
+        project = self.current_project
+        if not project or not self.main_window:
+            return
+        try:
+            entry = self.main_window.delete_workspace(project, workspace.id)
+        except Exception as e:
+            print(f"[错误] 删除工作区失败: {str(e)}")
+            QMessageBox.critical(self, "错误", f"删除工作区失败: {str(e)}")
+            return
+        self.show_project(project)
+        self._show_undo(entry, f"已删除工作区 '{workspace.name}'")
+    
+    def _show_undo(self, entry, text: str):
+        self.last_deleted = entry
+        self.undo_label.setText(text)
+        self.undo_bar.show()
+        self.undo_timer.start(int(self.main_window.project_service.trash.undo_seconds * 1000))
+    
+    def _hide_undo(self):
+        self.last_deleted = None
+        self.undo_bar.hide()
+    
+    def undo_delete(self):
+        """撤销最近一次删除"""
+        entry = self.last_deleted
+        self.undo_timer.stop()
+        self._hide_undo()
+        if not entry or not self.main_window:
+            return
+        try:
+            project = self.main_window.restore_deleted(entry.id)
+        except Exception as e:
+            print(f"[错误] 撤销删除失败: {str(e)}")
+            QMessageBox.warning(self, "错误", f"撤销删除失败: {str(e)}")
+            return
+        if entry.kind == "project":
+            self.main_window.project_center.refresh()
+            self.main_window.show_project_detail(project)
+        elif self.current_project and self.current_project.path == project.path:
+            self.main_window.show_project_detail(project)
+    
     def enter_workspace(self):
         """进入工作区"""
         if not self.current_project:
@@ -380,6 +627,5 @@ class ProjectCenterWidget(QWidget):
     def refresh(self):
         """刷新项目列表"""
         print("[操作] 刷新项目中心")
-        if self.main_window:
-            projects = self.main_window.get_projects()
-            self.project_list.load_projects(projects)
+        with debug_memory.cycle("refresh"):
+            self.project_list.reload()
@@ -0,0 +1,45 @@
+"""
+磁盘占用的 GUI 端
+索引在后台线程扫描和增量更新，某个项目的合计变化后通过跨线程信号通知主线程刷新显示；
+界面只读取内存中的合计，选中项目时不做任何磁盘遍历
+"""
+from pathlib import Path
+from typing import List, Optional, Tuple
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from app_core.disk_usage import DiskUsageIndex
+from cedar.utils import print
+
+
+class DiskUsageHub(QObject):
+    """磁盘占用索引的 GUI 端"""
+
+    updated = pyqtSignal(str)   # 合计有变化的项目目录（跨线程信号，在主线程执行）
+
+    def __init__(self, projects_dir: Path, parent=None):
+        super().__init__(parent)
+        self.index = DiskUsageIndex(projects_dir, on_update=self._on_update)
+
+    def _on_update(self, path: Path):
+        self.updated.emit(str(path))
+
+    def set_projects_dir(self, projects_dir: Path):
+        """切换项目目录：关闭原索引，新目录的项目从各自保存的索引加载后按目录 mtime 增量更新"""
+        self.index.close()
+        self.index = DiskUsageIndex(projects_dir, on_update=self._on_update)
+
+    def usage(self, path: Path) -> Optional[Tuple[int, int]]:
+        """(字节数, 文件数)；还没有索引时返回 None，建立后发出 updated"""
+        return self.index.usage(path)
+
+    def largest(self, limit: int = 20) -> List[dict]:
+        return self.index.largest(limit)
+
+    def verify(self, project_path: Path):
+        """项目目录有变化（监视到或其他进程修改），按目录 mtime 增量更新"""
+        self.index.verify(project_path)
+
+    def close(self):
+        print("[操作] 关闭磁盘占用索引")
+        self.index.close()
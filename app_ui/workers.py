@@ -0,0 +1,64 @@
+"""
+后台任务线程
+耗时操作放到 QThread 中执行，结果通过信号回到 UI 线程
+"""
+import time
+from PyQt6.QtCore import QThread, pyqtSignal
+from app_core.experiment_index import ExperimentIndex
+from app_core.validation import ValidationJob
+from cedar.utils import print
+
+
+class ValidationWorker(QThread):
+    """数据集校验线程 - 每发现一个问题发一次 finding 信号"""
+
+    finding = pyqtSignal(object)          # Finding
+    progress = pyqtSignal(int, int)       # 已检查, 总数
+    failed = pyqtSignal(str)
+
+    PROGRESS_INTERVAL = 0.1
+
+    def __init__(self, dataset_path, parent=None, **job_kwargs):
+        super().__init__(parent)
+        self.job = ValidationJob(dataset_path, **job_kwargs)
+        self._last_progress = 0.0
+
+    def _on_progress(self, done: int, total: int):
+        # 限制进度信号频率，避免百万级文件时信号淹没事件循环
+        now = time.monotonic()
+        if done == total or now - self._last_progress >= self.PROGRESS_INTERVAL:
+            self._last_progress = now
+            self.progress.emit(done, total)
+
+    def run(self):
+        try:
+            for item in self.job.run(progress=self._on_progress):
+                self.finding.emit(item)
+        except Exception as e:
+            print(f"[错误] 数据集校验失败: {str(e)}")
+            self.failed.emit(str(e))
+
+    def cancel(self):
+        """请求取消，线程在当前批次结束后退出"""
+        self.job.cancel()
+
+
+class IndexRefreshWorker(QThread):
+    """实验索引刷新线程 - 逐个 stat experiment.json 的扫描不占用 UI 线程，有变化时发 refreshed 信号"""
+
+    refreshed = pyqtSignal(list)          # 有变化的实验 id
+    failed = pyqtSignal(str)
+
+    def __init__(self, index: ExperimentIndex, parent=None):
+        super().__init__(parent)
+        self.index = index
+
+    def run(self):
+        try:
+            changed = self.index.refresh()
+        except OSError as e:
+            print(f"[错误] 刷新实验索引失败: {str(e)}")
+            self.failed.emit(str(e))
+            return
+        if changed:
+            self.refreshed.emit(changed)
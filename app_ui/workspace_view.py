@@ -0,0 +1,243 @@
+"""
+工作区页面
+上方是实验对比表；选中实验后，下方显示所选实验的指标曲线和最后一个所选实验的实时日志，
+训练进度（ProgressHub.updated）到达时立即刷新曲线并显示最新进度；
+数据集校验在 ValidationWorker 线程中执行，问题边发现边列出
+"""
+from typing import List
+
+from PyQt6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QSplitter, QTabWidget, QComboBox,
+    QListWidget, QInputDialog, QMessageBox
+)
+from PyQt6.QtCore import Qt
+
+from app_core.catalog_server import DATASETS_DIR
+from app_core.experiment_index import EXPERIMENTS_DIR
+from app_core.metrics_store import MetricsReader
+from app_core.runner import LOG_FILE
+from app_ui.component import ExperimentTable, LogView, MetricChart
+from app_ui.models import Project, Workspace
+from app_ui.workers import ValidationWorker
+from cedar.utils import print
+
+# 指标曲线最多同时对比的实验数（与曲线颜色数一致）
+MAX_CHART_SERIES = 8
+# 校验结果列表最多显示的问题数，其余只计数
+MAX_FINDINGS = 1000
+
+
+class WorkspaceViewWidget(QWidget):
+    """工作区页面 - 实验对比表 + 指标曲线 + 实时日志"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.main_window = parent
+        self.project = None
+        self.workspace = None
+        self.selected_ids: List[str] = []
+        self.validation_worker = None
+        self._finding_count = 0
+        self._validation_failed = False
+        self.init_ui()
+
+    def init_ui(self):
+        """设置UI"""
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(16, 16, 16, 16)
+        layout.setSpacing(12)
+
+        header = QHBoxLayout()
+        btn_back = QPushButton("返回项目中心")
+        btn_back.clicked.connect(self.leave)
+        header.addWidget(btn_back)
+        self.title_label = QLabel("")
+        self.title_label.setStyleSheet("font-size: 16px; font-weight: bold;")
+        header.addWidget(self.title_label)
+        header.addStretch()
+        self.progress_label = QLabel("")
+        self.progress_label.setStyleSheet("font-size: 12px; color: #999;")
+        header.addWidget(self.progress_label)
+        btn_validate = QPushButton("校验数据集")
+        btn_validate.clicked.connect(self.validate_dataset)
+        header.addWidget(btn_validate)
+        layout.addLayout(header)
+
+        splitter = QSplitter(Qt.Orientation.Vertical)
+        self.experiment_table = ExperimentTable()
+        self.experiment_table.experiments_selected.connect(self._on_experiments_selected)
+        splitter.addWidget(self.experiment_table)
+
+        self.tabs = QTabWidget()
+        chart_page = QWidget()
+        chart_layout = QVBoxLayout(chart_page)
+        chart_layout.setContentsMargins(0, 8, 0, 0)
+        self.metric_combo = QComboBox()
+        self.metric_combo.currentTextChanged.connect(self._on_metric_changed)
+        chart_layout.addWidget(self.metric_combo)
+        self.metric_chart = MetricChart()
+        chart_layout.addWidget(self.metric_chart, stretch=1)
+        self.tabs.addTab(chart_page, "指标曲线")
+        self.log_view = LogView()
+        self.tabs.addTab(self.log_view, "训练日志")
+        self.validation_page = QWidget()
+        validation_layout = QVBoxLayout(self.validation_page)
+        validation_layout.setContentsMargins(0, 8, 0, 0)
+        validation_row = QHBoxLayout()
+        self.validation_label = QLabel("点击“校验数据集”检查空文件、损坏图片和缺失的标注")
+        validation_row.addWidget(self.validation_label)
+        validation_row.addStretch()
+        self.btn_cancel_validation = QPushButton("取消")
+        self.btn_cancel_validation.setEnabled(False)
+        self.btn_cancel_validation.clicked.connect(self._cancel_validation)
+        validation_row.addWidget(self.btn_cancel_validation)
+        validation_layout.addLayout(validation_row)
+        self.findings_list = QListWidget()
+        self.findings_list.setUniformItemSizes(True)
+        validation_layout.addWidget(self.findings_list)
+        self.tabs.addTab(self.validation_page, "数据集校验")
+        splitter.addWidget(self.tabs)
+        layout.addWidget(splitter, stretch=1)
+
+    def show_workspace(self, project: Project, workspace: Workspace):
+        """显示工作区的实验"""
+        self.close_workspace()
+        self.project = project
+        self.workspace = workspace
+        self.title_label.setText(f"{project.name} / {workspace.name}")
+        self.experiment_table.set_workspace(workspace.path)
+
+    def close_workspace(self):
+        """停止对比表刷新、日志跟随和数据集校验，清空曲线"""
+        self._stop_validation()
+        self.experiment_table.close_workspace()
+        self.log_view.close_log()
+        self.metric_chart.clear()
+        self.progress_label.setText("")
+        self.selected_ids = []
+        self.project = None
+        self.workspace = None
+
+    def leave(self):
+        """返回项目中心（由主窗口关闭本页面）"""
+        if self.main_window:
+            self.main_window.show_project_center()
+        else:
+            self.close_workspace()
+
+    def _on_experiments_selected(self, rows: list):
+        rows = [r for r in rows if r.get("id")][:MAX_CHART_SERIES]
+        ids = [r["id"] for r in rows]
+        if not ids or ids == self.selected_ids or not self.workspace:
+            return
+        print(f"[操作] 查看实验: {', '.join(ids)}")
+        self.selected_ids = ids
+        experiments_dir = self.workspace.path / EXPERIMENTS_DIR
+        self.metric_chart.clear()
+        self.progress_label.setText("")
+        names = set()
+        for row in rows:
+            experiment_path = experiments_dir / row["id"]
+            self.metric_chart.add_experiment(experiment_path, row.get("name") or row["id"])
+            names.update(MetricsReader(experiment_path).names)
+        self._set_metric_names(sorted(names))
+        # 日志跟随最后一个选中的实验
+        self.log_view.open(experiments_dir / ids[-1] / LOG_FILE)
+
+    def _set_metric_names(self, names: List[str]):
+        """指标下拉框换成所选实验的指标，当前指标仍存在时保留"""
+        current = self.metric_chart.metric
+        self.metric_combo.blockSignals(True)
+        self.metric_combo.clear()
+        self.metric_combo.addItems(names)
+        if current in names:
+            self.metric_combo.setCurrentText(current)
+        self.metric_combo.blockSignals(False)
+        if names and current not in names:
+            self.metric_chart.set_metric(names[0])
+
+    def _on_metric_changed(self, metric: str):
+        if metric and metric != self.metric_chart.metric:
+            self.metric_chart.set_metric(metric)
+
+    def on_progress(self, batch: dict):
+        """实时进度（已按实验合并、限频）：所选实验有新进度时刷新曲线，显示最后一个所选实验的进度"""
+        if not any(experiment_id in batch for experiment_id in self.selected_ids):
+            return
+        self.metric_chart.refresh()
+        latest = batch.get(self.selected_ids[-1])
+        if not latest:
+            return
+        parts = []
+        if latest.get("step") is not None:
+            parts.append(f"step {latest['step']}")
+        if latest.get("progress"):
+            done, total, message = latest["progress"]
+            parts.append(f"{done}/{total} {message}".strip())
+        if latest.get("status"):
+            parts.append(latest["status"])
+        if parts:
+            self.progress_label.setText(" · ".join(parts))
+
+    def validate_dataset(self):
+        """选择工作区中的数据集，在后台线程校验"""
+        if not self.workspace:
+            return
+        datasets_dir = self.workspace.path / DATASETS_DIR
+        names = sorted(p.name for p in datasets_dir.iterdir()
+                       if p.is_dir() and not p.name.startswith(".")) if datasets_dir.exists() else []
+        if not names:
+            QMessageBox.information(self, "数据集校验", "工作区中还没有数据集")
+            return
+        name, ok = QInputDialog.getItem(self, "数据集校验", "数据集:", names, 0, False)
+        if not ok:
+            return
+        self._stop_validation()
+        print(f"[操作] 校验数据集: {datasets_dir / name}")
+        self.findings_list.clear()
+        self._finding_count = 0
+        self._validation_failed = False
+        self.validation_label.setText(f"{name}: 扫描文件...")
+        self.validation_worker = ValidationWorker(datasets_dir / name, self)
+        self.validation_worker.finding.connect(self._on_finding)
+        self.validation_worker.progress.connect(self._on_validation_progress)
+        self.validation_worker.failed.connect(self._on_validation_failed)
+        self.validation_worker.finished.connect(self._on_validation_finished)
+        self.btn_cancel_validation.setEnabled(True)
+        self.tabs.setCurrentWidget(self.validation_page)
+        self.validation_worker.start()
+
+    def _cancel_validation(self):
+        if self.validation_worker:
+            self.validation_worker.cancel()
+
+    def _stop_validation(self):
+        """取消正在进行的校验并等待线程退出（当前批次结束后）"""
+        worker, self.validation_worker = self.validation_worker, None
+        if worker and worker.isRunning():
+            worker.cancel()
+            worker.wait()
+        self.btn_cancel_validation.setEnabled(False)
+
+    def _on_finding(self, finding):
+        self._finding_count += 1
+        if self._finding_count <= MAX_FINDINGS:
+            self.findings_list.addItem(f"[{finding.kind}] {finding.path}  {finding.message}".rstrip())
+
+    def _on_validation_progress(self, done: int, total: int):
+        self.validation_label.setText(f"已检查 {done}/{total}，发现 {self._finding_count} 个问题")
+
+    def _on_validation_failed(self, message: str):
+        self._validation_failed = True
+        self.validation_label.setText(f"校验失败: {message}")
+
+    def _on_validation_finished(self):
+        worker = self.sender()
+        if worker is not self.validation_worker:
+            return
+        self.btn_cancel_validation.setEnabled(False)
+        if self._validation_failed:
+            return
+        state = "已取消" if worker.job.cancelled else "完成"
+        shown = f"（显示前 {MAX_FINDINGS} 个）" if self._finding_count > MAX_FINDINGS else ""
+        self.validation_label.setText(f"校验{state}，发现 {self._finding_count} 个问题{shown}")
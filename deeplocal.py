@@ -0,0 +1,8 @@
+"""deeplocal 命令行入口（不启动 GUI）：python deeplocal.py --help"""
+import sys
+
+from app_core.cli import main
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,117 @@
+"""
+本地目录服务并发压测
+服务按 GUI 中的方式在后台线程运行，多个客户端线程并发发送读写混合请求；
+主线程模拟 GUI 事件循环（每 10 ms 一次定时器），统计定时器的最大延迟，检查服务是否拖慢界面；
+有请求出错、吞吐低于 --min-rps 或定时器 p99 延迟超过 --max-timer-ms 时以状态码 1 退出
+
+    python scripts/bench_catalog_server.py --clients 8 --seconds 5 --write-ratio 0.1 --min-rps 500 --max-timer-ms 20
+"""
+from pathlib import Path
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app_core.catalog_server import CatalogClient, CatalogServer
+from app_core.projects import ProjectService
+
+
+TICK = 0.01
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))] if values else 0.0
+
+
+def client_loop(address, project_ids, workspace_ids, write_ratio, deadline, latencies, errors):
+    client = CatalogClient(address)
+    rng = random.Random()
+    try:
+        while time.monotonic() < deadline:
+            start = time.perf_counter()
+            try:
+                if rng.random() < write_ratio:
+                    if rng.random() < 0.5:
+                        client.call("workspace.create", project_id=rng.choice(project_ids), name="bench")
+                    else:
+                        client.call("experiment.create", workspace_id=rng.choice(workspace_ids), name="bench",
+                                    config={"lr": rng.random()}, submit=False)
+                else:
+                    method = rng.choice(("project.list", "project.get", "workspace.list"))
+                    if method == "project.list":
+                        client.call(method, limit=50)
+                    else:
+                        client.call(method, project_id=rng.choice(project_ids))
+            except Exception as e:
+                errors.append(str(e))
+            latencies.append(time.perf_counter() - start)
+    finally:
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--projects", type=int, default=200)
+    parser.add_argument("--write-ratio", type=float, default=0.1)
+    parser.add_argument("--min-rps", type=float, default=500.0, help="允许的最低吞吐（请求/秒）")
+    parser.add_argument("--max-timer-ms", type=float, default=20.0, help="允许的 GUI 定时器 p99 延迟（毫秒）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull, \
+            contextlib.redirect_stdout(devnull):
+        service = ProjectService(Path(tmp))
+        with service.batch():
+            projects = [service.create_project(f"bench-{i}") for i in range(args.projects)]
+        project_ids = [p.id for p in projects]
+        workspace_ids = [p.workspaces[0].id for p in projects]
+        deltas = []
+        server = CatalogServer(service, path=Path(tmp) / "rpc.sock", on_delta=deltas.append)
+        server.start()
+
+        latencies, errors = [], []
+        deadline = time.monotonic() + args.seconds
+        threads = [threading.Thread(target=client_loop, args=(server.address, project_ids, workspace_ids,
+                                                              args.write_ratio, deadline, latencies, errors))
+                   for _ in range(args.clients)]
+        started = time.monotonic()
+        for thread in threads:
+            thread.start()
+        # 模拟 GUI 主线程的定时器
+        delays = []
+        while time.monotonic() < deadline:
+            expected = time.monotonic() + TICK
+            time.sleep(TICK)
+            delays.append(max(0.0, time.monotonic() - expected))
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+        server.stop()
+
+    throughput = len(latencies) / elapsed
+    timer_p99 = percentile(delays, 0.99) * 1000
+    slow = throughput < args.min_rps
+    stalled = timer_p99 > args.max_timer_ms
+    print(f"客户端: {args.clients}, 时长: {elapsed:.1f}s, 写比例: {args.write_ratio}")
+    print(f"{'超出' if slow or errors else '正常'}  请求数: {len(latencies)}, 吞吐: {throughput:.0f} req/s "
+          f"(下限 {args.min_rps:.0f}), 错误: {len(errors)}")
+    print(f"延迟 p50: {percentile(latencies, 0.5) * 1000:.2f} ms, p99: {percentile(latencies, 0.99) * 1000:.2f} ms, "
+          f"最大: {max(latencies, default=0) * 1000:.2f} ms")
+    print(f"{'超出' if stalled else '正常'}  GUI 定时器延迟 p99: {timer_p99:.2f} ms (上限 {args.max_timer_ms:.0f}), "
+          f"最大: {max(delays, default=0) * 1000:.2f} ms")
+    print(f"推送 delta: {len(deltas)}")
+    if errors:
+        print(f"错误示例: {errors[0]}")
+    return 1 if errors or slow or stalled else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
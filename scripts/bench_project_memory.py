@@ -0,0 +1,95 @@
+"""
+项目模型内存压测
+在临时目录生成若干项目（每个项目含若干工作区的 project.json），分别测量：
+按需加载（项目中心列表，只读项目信息和工作区数量）和全部展开工作区后的常驻内存与耗时
+
+    python scripts/bench_project_memory.py --projects 10000 --workspaces 100
+"""
+from datetime import datetime, timedelta
+from pathlib import Path
+import argparse
+import contextlib
+import gc
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app_core.projects import ProjectService
+from utils.utils import generate_id
+
+
+def generate(projects_dir: Path, num_projects: int, num_workspaces: int):
+    """直接写 project.json（不经过 ProjectService，生成百万级工作区也只需几十秒）"""
+    start = datetime(2024, 1, 1)
+    for i in range(num_projects):
+        project_id = generate_id()
+        created_at = start + timedelta(minutes=i)
+        path = projects_dir / f"project_{created_at.strftime('%Y%m%d_%H%M%S')}_{i}"
+        path.mkdir()
+        data = {
+            "id": project_id,
+            "name": f"bench-{i}",
+            "desc": "",
+            "created_at": created_at.isoformat(),
+            "path": str(path),
+            "revision": 1,
+            "workspaces": [
+                {"id": generate_id(), "name": f"ws-{j}", "project_id": project_id,
+                 "created_at": (created_at + timedelta(seconds=j)).isoformat()}
+                for j in range(num_workspaces)
+            ]
+        }
+        with open(path / "project.json", "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+
+def measure(func):
+    """返回 (结果, 结果常驻内存字节, 峰值字节, 耗时秒)"""
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    started = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current - base, peak - base, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--projects", type=int, default=10000)
+    parser.add_argument("--workspaces", type=int, default=100)
+    parser.add_argument("--dir", help="使用已生成的项目目录（跳过生成）")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        projects_dir = Path(args.dir) if args.dir else Path(tmp)
+        if not args.dir:
+            started = time.perf_counter()
+            generate(projects_dir, args.projects, args.workspaces)
+            print(f"生成 {args.projects} 个项目 × {args.workspaces} 个工作区: {time.perf_counter() - started:.1f}s")
+
+        service = ProjectService(projects_dir)
+        with contextlib.redirect_stdout(devnull):
+            projects, lazy_bytes, lazy_peak, lazy_time = measure(service.get_projects)
+            total = sum(p.workspace_count for p in projects)
+            _, full_bytes, full_peak, full_time = measure(lambda: [p.workspaces for p in projects])
+
+    mib = 1 << 20
+    print(f"项目: {len(projects)}, 工作区: {total}")
+    print(f"按需加载: {lazy_time:.2f}s, 常驻 {lazy_bytes / mib:.1f} MiB（峰值 {lazy_peak / mib:.1f} MiB）, "
+          f"每项目 {lazy_bytes / max(len(projects), 1):.0f} B")
+    print(f"展开工作区: {full_time:.2f}s, 增加 {full_bytes / mib:.1f} MiB（峰值 {full_peak / mib:.1f} MiB）, "
+          f"每工作区 {full_bytes / max(total, 1):.0f} B")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
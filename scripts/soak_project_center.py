@@ -0,0 +1,104 @@
+"""
+项目中心内存浸泡测试
+在临时目录生成若干项目，以内存调试模式打开主窗口（无界面平台），反复执行
+刷新项目列表 -> 点击项目卡片显示详情 -> 进入工作区，预热后统计每次操作的内存和 QObject 增长，
+超过阈值时列出增长的对象和代码行并以状态码 1 退出
+
+    QT_QPA_PLATFORM=offscreen python scripts/soak_project_center.py --cycles 50 --max-kib 32
+"""
+from pathlib import Path
+import argparse
+import contextlib
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app_core.projects import ProjectService
+
+
+def generate(projects_dir: Path, num_projects: int, num_workspaces: int):
+    service = ProjectService(projects_dir)
+    with service.batch():
+        for i in range(num_projects):
+            project = service.create_project(f"soak-{i}", "浸泡测试")
+            for j in range(num_workspaces - 1):
+                service.create_workspace(project, f"ws-{j}")
+
+
+def write_config(config_file: Path, projects_dir: Path):
+    with open(config_file, "w", encoding="utf-8") as f:
+        f.write(f"project_dir: {projects_dir}\n"
+                "window_title: soak\n"
+                "window_width: 1200\n"
+                "window_height: 800\n"
+                "rpc_server: false\n"
+                "debug_memory: true\n")
+
+
+def run_cycles(app, window, cycles: int):
+    project_list = window.project_center.project_list
+    for i in range(cycles):
+        window.project_center.refresh()
+        app.processEvents()
+        card = project_list.project_cards[i % len(project_list.project_cards)]
+        card.clicked.emit(card)
+        app.processEvents()
+        project = window.current_project
+        window.show_workspace(project, project.workspaces[i % len(project.workspaces)])
+        app.processEvents()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cycles", type=int, default=50)
+    parser.add_argument("--warmup", type=int, default=5, help="每种操作前几次不计入")
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--workspaces", type=int, default=5)
+    parser.add_argument("--max-kib", type=float, default=32.0, help="每次操作允许的内存增长（KiB）")
+    parser.add_argument("--max-objects", type=float, default=0.5, help="每次操作允许增加的 QObject 个数")
+    args = parser.parse_args()
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    with tempfile.TemporaryDirectory() as tmp, open(os.devnull, "w") as devnull:
+        tmp = Path(tmp)
+        projects_dir = tmp / "projects"
+        config_file = tmp / "app.yaml"
+        with contextlib.redirect_stdout(devnull):
+            generate(projects_dir, args.projects, args.workspaces)
+        write_config(config_file, projects_dir)
+        os.environ["CONFIG_FILE"] = str(config_file)
+        os.environ["LOG_PATH"] = str(projects_dir / "logs" / "app.log")
+
+        from PyQt6.QtWidgets import QApplication
+        from app_ui import debug_memory
+        from app_ui.main_window import MainWindow
+
+        app = QApplication(sys.argv[:1])
+        with contextlib.redirect_stdout(devnull):
+            window = MainWindow()
+            window.show()
+            debug_memory.install(debug_memory.MemoryProbe(warmup=args.warmup))
+            run_cycles(app, window, args.warmup + args.cycles)
+            report = debug_memory.active().report()
+            debug_memory.install(None)
+            window.close()
+
+    print(f"项目: {args.projects} × {args.workspaces} 个工作区, 循环 {args.cycles} 次（预热 {args.warmup} 次）")
+    failed = False
+    for growth in report:
+        over = growth.bytes_per_cycle > args.max_kib * 1024 or growth.objects_per_cycle > args.max_objects
+        failed = failed or over
+        print(f"{'超出' if over else '正常'}  {growth.name}: 每次 {growth.bytes_per_cycle / 1024:+.1f} KiB, "
+              f"QObject 每次 {growth.objects_per_cycle:+.2f}")
+        if over:
+            for cls, per_cycle in sorted(growth.objects.items(), key=lambda item: -item[1]):
+                print(f"    {cls}: 每次 +{per_cycle:.2f}")
+            for line in growth.lines:
+                print(f"    {line}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())